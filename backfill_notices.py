@@ -0,0 +1,105 @@
+"""Backfill notice extracts: parse historical notices with BatchNoticeParser,
+several notices per model request, and write one JSON extract per notice as
+each batch finishes.
+
+Input is read like process_inbox.py: a JSONL file (one {"id": ..., "email": ...}
+object or JSON string per line), a directory (one notice per file) or "-" for
+JSONL on stdin.
+
+Run from the project root:
+    python backfill_notices.py notices.jsonl --output extracts.jsonl --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, List, TextIO, Tuple
+
+from chains.notice_extraction import BATCH_MAX_NOTICES, BATCH_MAX_TOKENS, BatchNoticeParser
+from process_inbox import iter_emails
+from utils.logging_config import LOGGER
+from utils.metrics import write_metrics
+
+
+async def backfill_notices(
+    notices: Iterable[Tuple[str, str]],
+    output: TextIO,
+    parser: BatchNoticeParser,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """Parse notices with at most `concurrency` batches in flight (see
+    BatchNoticeParser.aparse_batches), writing each extract to `output` as
+    its batch finishes. Returns throughput statistics.
+    """
+    stats = {"processed": 0, "errors": 0}
+
+    def write(batch: List[Tuple[str, str]], extracts: Dict[str, Any]) -> None:
+        for notice_id, _ in batch:
+            extract = extracts.get(notice_id)
+            record = {"id": notice_id, "status": "ok" if extract else "error"}
+            if extract:
+                record["extract"] = extract.model_dump(mode="json")
+            output.write(json.dumps(record) + "\n")
+            stats["processed"] += 1
+            stats["errors"] += extract is None
+        output.flush()
+
+    start = time.perf_counter()
+    await parser.aparse_batches(notices, write, concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["notices_per_s"] = round(stats["processed"] / elapsed, 3) if elapsed else 0.0
+    stats["batch_requests"] = parser.batch_calls
+    stats["single_requests"] = parser.single_calls
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill notice extracts with batched model requests.")
+    parser.add_argument("source", help="JSONL file, directory of notices, or '-' for JSONL on stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Max batches in flight")
+    parser.add_argument(
+        "--batch-tokens", type=int, default=BATCH_MAX_TOKENS,
+        help="Estimated prompt and output tokens per batch request",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_MAX_NOTICES,
+        help="Max notices per request (1 = one request per notice)",
+    )
+    parser.add_argument(
+        "--metrics", metavar="PATH",
+        help="Write chain and model metrics at exit (Prometheus text for *.prom, else JSON)",
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    LOGGER.setLevel(args.log_level.upper())
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = asyncio.run(
+            backfill_notices(
+                iter_emails(args.source),
+                output,
+                BatchNoticeParser(max_tokens=args.batch_tokens, max_notices=args.batch_size),
+                concurrency=args.concurrency,
+            )
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        f"Parsed {stats['processed']} notices ({stats['errors']} errors) in {stats['elapsed_s']:.1f}s - "
+        f"{stats['notices_per_s']:.2f} notices/s, {stats['batch_requests']} batch and "
+        f"{stats['single_requests']} single-notice requests",
+        file=sys.stderr,
+    )
+    if args.metrics:
+        write_metrics(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
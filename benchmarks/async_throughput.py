@@ -0,0 +1,80 @@
+"""Compare sequential invoke() against concurrent ainvoke() on
+NOTICE_EXTRACTION_GRAPH with stubbed chains.
+
+Run from the project root:
+    python benchmarks/async_throughput.py --notices 50 --latency 0.2
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_notice_chains
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_notice_chains
+
+from graphs.notice_extraction import NOTICE_EXTRACTION_GRAPH
+from graphs.example_emails import EMAILS
+from utils import graph_utils
+
+
+def make_state(message: str, batch_follow_ups: bool = False) -> dict:
+    return {
+        "notice_message": message,
+        "notice_email_extract": None,
+        "escalation_text_criteria": "Workers explicitly violating safety protocols",
+        "escalation_dollar_criteria": 20000.0,
+        "text_escalation_check": None,
+        "requires_escalation": False,
+        "escalation_emails": ["manager1@example.com", "ceo@example.com"],
+        "escalation_results": None,
+        "follow_ups": None,
+        "current_follow_up": None,
+        "batch_follow_ups": batch_follow_ups,
+    }
+
+
+def run_sync(n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        NOTICE_EXTRACTION_GRAPH.invoke(make_state(EMAILS[i % len(EMAILS)]))
+    return time.perf_counter() - start
+
+
+async def run_async(n: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(NOTICE_EXTRACTION_GRAPH.ainvoke(make_state(EMAILS[i % len(EMAILS)])) for i in range(n))
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notices", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (s)")
+    parser.add_argument("--delay-scale", type=float, default=0.1, help="Scale for simulated API delays")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    install_fake_notice_chains(latency=args.latency)
+    graph_utils.SIMULATED_DELAY_SCALE = args.delay_scale
+
+    sync_elapsed = run_sync(args.notices)
+    async_elapsed = asyncio.run(run_async(args.notices))
+
+    print(f"notices={args.notices} fake_latency={args.latency}s delay_scale={args.delay_scale}")
+    print(f"sync  invoke : {sync_elapsed:8.2f}s  {args.notices / sync_elapsed:8.2f} notices/s")
+    print(f"async ainvoke: {async_elapsed:8.2f}s  {args.notices / async_elapsed:8.2f} notices/s")
+    print(f"speedup      : {sync_elapsed / async_elapsed:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
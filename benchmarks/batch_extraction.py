@@ -0,0 +1,140 @@
+"""Backfill throughput and prompt tokens per notice: one NOTICE_PARSER_CHAIN
+request per notice versus BatchNoticeParser packing several notices into one
+request (chains/notice_extraction.py).
+
+The fake model takes --request-latency per request plus --extract-latency per
+extract it returns, which is roughly how a real model's time splits between
+fixed overhead and generating the output. Every --invalid-every-th notice gets
+an invalid extract in its batch (a malformed email address), so it goes
+through the single-notice fallback. Tokens are estimated at CHARS_PER_TOKEN
+from the rendered prompts.
+
+Run from the project root:
+    python benchmarks/batch_extraction.py --notices 100 --concurrency 4 --batch-sizes 1 5 10
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Optional
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import CANNED_NOTICE_EXTRACT, FakeStructuredChain
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import CANNED_NOTICE_EXTRACT, FakeStructuredChain
+
+from langchain_core.runnables import RunnableConfig
+
+from backfill_notices import backfill_notices
+from chains import notice_extraction
+from chains.notice_extraction import (
+    BatchNoticeParser,
+    NoticeBatchItem,
+    NoticeEmailExtract,
+    NoticeExtractBatch,
+    batch_parse_prompt,
+    estimate_tokens,
+    info_parse_prompt,
+)
+from graphs.example_emails import EMAILS
+from utils.logging_config import configure_logging
+from utils.notice_pre_extraction import pre_extract_notice_fields
+
+
+class TimedFakeChain(FakeStructuredChain):
+    """Fake whose latency grows with the number of extracts it returns, and
+    which tallies the estimated tokens of the prompts it receives."""
+
+    def __init__(self, output: Any, prompt, request_latency: float, extract_latency: float):
+        super().__init__(output)
+        self.prompt = prompt
+        self.request_latency = request_latency
+        self.extract_latency = extract_latency
+        self.prompt_tokens = 0
+
+    def _respond(self, input: Any) -> tuple[Any, float]:
+        self.calls += 1
+        self.prompt_tokens += sum(estimate_tokens(m.content) for m in self.prompt.format_messages(**input))
+        output = self._output_for(input)
+        extracts = len(output.extracts) if isinstance(output, NoticeExtractBatch) else 1
+        return output, self.request_latency + self.extract_latency * extracts
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        output, latency = self._respond(input)
+        time.sleep(latency)
+        return output
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        output, latency = self._respond(input)
+        await asyncio.sleep(latency)
+        return output
+
+
+def answer_batch(input: dict) -> NoticeExtractBatch:
+    """The canned extract for every notice in the batch prompt, with the
+    fields the notice's own text settles filled in from it (as a model would
+    read them) and a malformed email address for notices marked INVALID."""
+    canned = {name: getattr(CANNED_NOTICE_EXTRACT, name) for name in NoticeEmailExtract.model_fields}
+    notices = [notice.split("\n", 1)[1].rsplit("\n</notice>", 1)[0] for notice in input["notices"].split('<notice number="')[1:]]
+    extracts = []
+    for i, notice in enumerate(notices, 1):
+        values = {**canned, **{name: value for name, value in pre_extract_notice_fields(notice).items() if name in canned}}
+        if "INVALID" in notice:
+            values["entity_email"] = "not an email"
+        extracts.append(NoticeBatchItem(notice_id=i, **values))
+    return NoticeExtractBatch(extracts=extracts)
+
+
+class _Sink:
+    def write(self, text: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notices", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 5, 10], help="Max notices per request")
+    parser.add_argument("--request-latency", type=float, default=0.5, help="Fake model overhead per request (s)")
+    parser.add_argument("--extract-latency", type=float, default=0.1, help="Fake model time per extract (s)")
+    parser.add_argument("--invalid-every", type=int, default=20, help="Every n-th notice's batch extract is invalid")
+    args = parser.parse_args()
+
+    configure_logging(level="ERROR")
+    # Unique notices, so the batches are not answered from the response cache
+    invalid = {i for i in range(args.notices) if args.invalid_every and i % args.invalid_every == 0}
+    notices = [
+        (str(i), f"{EMAILS[i % len(EMAILS)]}\nReference: BF-{i:06d}{' INVALID' if i in invalid else ''}")
+        for i in range(args.notices)
+    ]
+
+    print(
+        f"notices={args.notices} concurrency={args.concurrency} request_latency={args.request_latency}s "
+        f"extract_latency={args.extract_latency}s invalid={len(invalid)} (fake model)"
+    )
+    print(f"{'batch size':>10} {'requests':>9} {'fallbacks':>10} {'notices/s':>10} {'prompt tokens/notice':>21}")
+    for batch_size in args.batch_sizes:
+        single = TimedFakeChain(CANNED_NOTICE_EXTRACT, info_parse_prompt, args.request_latency, args.extract_latency)
+        batch = TimedFakeChain(answer_batch, batch_parse_prompt, args.request_latency, args.extract_latency)
+        notice_extraction.NOTICE_PARSER_CHAIN = single
+        notice_extraction.BATCH_NOTICE_PARSER_CHAIN = batch
+        notice_parser = BatchNoticeParser(max_notices=batch_size)
+        stats = asyncio.run(backfill_notices(notices, _Sink(), notice_parser, concurrency=args.concurrency))
+        fallbacks = notice_parser.single_calls if batch_size > 1 else 0
+        tokens = (single.prompt_tokens + batch.prompt_tokens) / args.notices
+        print(
+            f"{batch_size:>10} {single.calls + batch.calls:>9} {fallbacks:>10} "
+            f"{stats['notices_per_s']:>10.2f} {tokens:>21.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
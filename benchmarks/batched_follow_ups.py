@@ -0,0 +1,70 @@
+"""Per-notice latency of the one-question-per-cycle follow-up loop versus
+batched follow-up answers in NOTICE_EXTRACTION_GRAPH.
+
+Run from the project root:
+    python benchmarks/batched_follow_ups.py --notices 20 --latency 0.5
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_notice_chains
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_notice_chains
+
+from benchmarks.async_throughput import make_state
+from graphs.example_emails import EMAILS
+from graphs.notice_extraction import NOTICE_EXTRACTION_GRAPH
+from utils import graph_utils
+
+
+def run(n: int, batch_follow_ups: bool) -> list[tuple[float, int]]:
+    """Return (latency, ticket attempts) per notice."""
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        attempts = 0
+        for update in NOTICE_EXTRACTION_GRAPH.stream(
+            make_state(EMAILS[i % len(EMAILS)], batch_follow_ups), stream_mode="updates"
+        ):
+            attempts += "create_legal_ticket" in update
+        samples.append((time.perf_counter() - start, attempts))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notices", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency per call (s)")
+    parser.add_argument("--delay-scale", type=float, default=1.0, help="Scale for simulated API delays")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    install_fake_notice_chains(latency=args.latency)
+    graph_utils.SIMULATED_DELAY_SCALE = args.delay_scale
+
+    print(f"notices={args.notices} fake_latency={args.latency}s delay_scale={args.delay_scale}")
+    for label, batch in (("cycle  ", False), ("batched", True)):
+        random.seed(args.seed)
+        samples = run(args.notices, batch)
+        latencies = [latency for latency, _ in samples]
+        cycled = [latency for latency, attempts in samples if attempts >= 2]
+        print(
+            f"{label}: mean {statistics.mean(latencies):.2f}s per notice, "
+            f"mean ticket attempts {statistics.mean(a for _, a in samples):.2f}"
+            + (f", mean {statistics.mean(cycled):.2f}s for notices that cycled" if cycled else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Per-notice memory and checkpoint size with long notices, with the email
+text carried inline in graph state versus by reference to a blob store
+(in-memory or mmap'd file, see utils/blob_store.py).
+
+Each notice is the first example email padded to --notice-kb with unique
+text. email_agent_graph runs them (fast path off, so the agent's tool call
+carries the email too) --concurrency at a time on SQLite-checkpointed
+threads; the checkpoints are kept to be measured.
+
+Run from the project root:
+    python benchmarks/blob_refs.py --notices 100 --notice-kb 50 --concurrency 16
+"""
+import argparse
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+
+from langchain_core.messages import HumanMessage
+
+from graphs import email_agent, notice_extraction
+from graphs.example_emails import EMAILS
+from utils.blob_store import InMemoryBlobStore, MmapBlobStore, set_blob_store
+from utils.checkpointing import SQLiteCheckpointSaver
+from utils.graph_utils import configure_simulation
+from utils.logging_config import configure_logging
+
+CRITERIA = "Workers explicitly violating safety protocols"
+
+
+def long_notice(i: int, kb: int) -> str:
+    """The OSHA example notice followed by ~`kb` KB of unique inspection notes."""
+    line = f"Inspection note {i}: scaffolding on the north face was re-checked and logged.\n"
+    return EMAILS[0] + "\n" + line * (kb * 1024 // len(line))
+
+
+def checkpoint_bytes(saver: SQLiteCheckpointSaver) -> int:
+    with saver._lock:
+        checkpoints = saver._conn.execute("SELECT SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints").fetchone()[0]
+        blobs = saver._conn.execute("SELECT SUM(LENGTH(blob)) FROM blobs").fetchone()[0]
+        writes = saver._conn.execute("SELECT SUM(LENGTH(value)) FROM writes").fetchone()[0]
+    return (checkpoints or 0) + (blobs or 0) + (writes or 0)
+
+
+async def run_all(graph, notices, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(i: int, notice: str):
+        async with semaphore:
+            return await graph.ainvoke(
+                {"messages": [HumanMessage(content=email_agent.build_agent_input(notice, CRITERIA))]},
+                {"recursion_limit": 10, "configurable": {"thread_id": f"email-{i}", "fast_path": False}},
+            )
+
+    return await asyncio.gather(*(run_one(i, n) for i, n in enumerate(notices)))
+
+
+def measure(mode: str, notices, concurrency: int, workdir: str) -> dict:
+    if mode == "memory":
+        set_blob_store(InMemoryBlobStore())
+    elif mode == "file":
+        set_blob_store(MmapBlobStore(os.path.join(workdir, f"{mode}.blobs")))
+    else:
+        set_blob_store(None)
+    saver = SQLiteCheckpointSaver(os.path.join(workdir, f"{mode}.sqlite"))
+    notice_extraction.NOTICE_EXTRACTION_GRAPH = notice_extraction.build_notice_extraction_graph(saver)
+    graph = email_agent.build_email_agent_graph(saver)
+    configure_simulation(delay_scale=0.0, seed=0)
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = asyncio.run(run_all(graph, notices, concurrency))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stored = checkpoint_bytes(saver)
+    blob_file = os.path.getsize(os.path.join(workdir, f"{mode}.blobs")) if mode == "file" else 0
+    del results
+    return {
+        "mode": mode,
+        "peak_kb": peak / 1024 / concurrency,
+        "retained_kb": retained / 1024 / len(notices),
+        "checkpoint_kb": stored / 1024 / len(notices),
+        "blob_file_kb": blob_file / 1024 / len(notices),
+        "ms": elapsed * 1000 / len(notices),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notices", type=int, default=100)
+    parser.add_argument("--notice-kb", type=int, default=50, help="Approximate size of each notice")
+    parser.add_argument("--concurrency", type=int, default=16, help="Notices in flight")
+    args = parser.parse_args()
+
+    configure_logging(level="WARNING")
+    install_fake_notice_chains()
+    install_fake_agent_model()
+    install_temp_outbox()
+    notices = [long_notice(i, args.notice_kb) for i in range(args.notices)]
+    workdir = tempfile.mkdtemp(prefix="blob-bench-")
+
+    print(f"notices={args.notices} size={len(notices[0]) / 1024:.0f}KB concurrency={args.concurrency} (fake models)")
+    print("peak: traced heap per notice in flight; retained: per final state held by the caller")
+    print(f"{'state carries':<16} {'peak':>9} {'retained':>9} {'checkpoints':>12} {'blob file':>10} {'time':>8}")
+    for mode in ("inline", "memory", "file"):
+        r = measure(mode, notices, args.concurrency, workdir)
+        print(
+            f"{r['mode']:<16} {r['peak_kb']:7.0f}KB {r['retained_kb']:7.0f}KB {r['checkpoint_kb']:10.0f}KB "
+            f"{r['blob_file_kb']:8.0f}KB {r['ms']:6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Checkpoint write overhead per graph step for the notice extraction graph
+with the SQLite checkpointer, and a resume after a killed worker.
+
+Run from the project root:
+    python benchmarks/checkpointing.py --notices 200
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_notice_chains
+except ImportError:
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_notice_chains
+
+from graphs import notice_extraction
+from graphs.email_agent import _build_notice_state
+from graphs.example_emails import EMAILS
+from utils import graph_utils
+from utils.checkpointing import SQLiteCheckpointSaver, run_checkpointed
+
+RESUME_THREAD = "notice-resume-demo"
+
+
+def time_runs(graph, notices: int, persist: bool) -> float:
+    """Seconds to run the graph `notices` times, each on its own thread if persisted."""
+    state = _build_notice_state(EMAILS[0], "Water damage")
+    start = time.perf_counter()
+    for i in range(notices):
+        graph.invoke(state, {"configurable": {"thread_id": f"notice-{i}" if persist else None}})
+    return time.perf_counter() - start
+
+
+def run_until_killed(path: str) -> None:
+    """Child process: run one notice and die abruptly in create_legal_ticket,
+    after the parser and escalation check have been checkpointed."""
+    install_fake_notice_chains()
+    graph_utils.SIMULATED_DELAY_SCALE = 0.0
+    notice_extraction.create_legal_ticket = lambda *args, **kwargs: os._exit(1)
+    graph = notice_extraction.build_notice_extraction_graph(SQLiteCheckpointSaver(path))
+    run_checkpointed(graph, _build_notice_state(EMAILS[0], "Water damage"), RESUME_THREAD)
+
+
+def demo_resume(path: str, fakes: dict) -> None:
+    """Kill a worker mid-notice, then rerun the notice in this process: the
+    parser and escalation check are not called again."""
+    child = subprocess.run([sys.executable, __file__, "--killed-worker", path])
+    saver = SQLiteCheckpointSaver(path)
+    print(f"  worker exited with {child.returncode}; in-flight threads: {saver.threads()}")
+    for fake in fakes.values():
+        fake.calls = 0
+    graph = notice_extraction.build_notice_extraction_graph(saver)
+    result = run_checkpointed(graph, _build_notice_state(EMAILS[0], "Water damage"), RESUME_THREAD)
+    calls = {name: fake.calls for name, fake in fakes.items() if fake.calls}
+    print(f"  restarted worker finished it (escalation={result['requires_escalation']}) with calls: {calls}")
+    print(f"  in-flight threads after finishing: {saver.threads()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notices", type=int, default=200)
+    parser.add_argument("--killed-worker", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    if args.killed_worker:
+        return run_until_killed(args.killed_worker)
+    fakes = install_fake_notice_chains()
+    graph_utils.SIMULATED_DELAY_SCALE = 0.0
+    path = os.path.join(tempfile.mkdtemp(prefix="checkpoint-bench-"), "checkpoints.sqlite")
+    saver = SQLiteCheckpointSaver(path)
+    graph = notice_extraction.build_notice_extraction_graph(saver)
+
+    time_runs(graph, 5, persist=True)  # warm up imports and SQLite
+    for thread_id in saver.threads():
+        saver.delete_thread(thread_id)
+    baseline = time_runs(graph, args.notices, persist=False)
+    persisted = time_runs(graph, args.notices, persist=True)
+    with saver._lock:
+        checkpoints, checkpoint_bytes = saver._conn.execute(
+            "SELECT COUNT(*), SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints"
+        ).fetchone()
+        blob_bytes = saver._conn.execute("SELECT SUM(LENGTH(blob)) FROM blobs").fetchone()[0]
+    steps = checkpoints / args.notices
+
+    print(f"notices={args.notices} steps/notice={steps:.0f} (fake chains, no simulated delays)")
+    print(f"no checkpoints : {baseline / args.notices * 1000:6.2f}ms per notice")
+    print(f"SQLite         : {persisted / args.notices * 1000:6.2f}ms per notice")
+    print(
+        f"overhead       : {(persisted - baseline) / checkpoints * 1000:6.3f}ms per step, "
+        f"{(checkpoint_bytes + blob_bytes) / checkpoints:.0f} bytes per step"
+    )
+    print("resume after a killed worker:")
+    demo_resume(os.path.join(os.path.dirname(path), "resume.sqlite"), fakes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Prompt size and per-turn latency of the email agent's model calls on the
+example emails, with the full message history versus the compacted context.
+
+The fake agent model counts the prompt tokens it is sent (tiktoken's
+o200k_base when available, otherwise ~4 chars per token) and takes
+--latency plus --per-1k-tokens seconds per thousand prompt tokens.
+
+Run from the project root:
+    python benchmarks/context_compaction.py --latency 0.3 --per-1k-tokens 0.2
+"""
+import argparse
+import json
+import logging
+import statistics
+import textwrap
+import time
+from typing import Any, List, Optional
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import FakeAgentModel, install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import FakeAgentModel, install_fake_notice_chains, install_temp_outbox
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from graphs import email_agent
+from graphs.example_emails import EMAILS
+from utils import graph_utils
+
+
+def _token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return "o200k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        return "~4 chars/token", lambda text: max(1, len(text) // 4)
+
+
+TOKENIZER, count_tokens = _token_counter()
+
+
+def prompt_tokens(messages: List[BaseMessage]) -> int:
+    """Tokens in the messages' content and tool-call arguments."""
+    text = []
+    for message in messages:
+        text.append(message.content if isinstance(message.content, str) else json.dumps(message.content))
+        if isinstance(message, AIMessage):
+            text.extend(json.dumps(call["args"]) for call in message.tool_calls)
+    return sum(count_tokens(t) for t in text)
+
+
+class MeteredAgentModel(FakeAgentModel):
+    """FakeAgentModel whose latency grows with the prompt it is sent."""
+
+    def __init__(self, latency: float, per_1k_tokens: float):
+        super().__init__(latency)
+        self.per_1k_tokens = per_1k_tokens
+        self.turns: List[tuple[int, float]] = []
+
+    def invoke(self, input: List[BaseMessage], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        start = time.perf_counter()
+        tokens = prompt_tokens(input)
+        time.sleep(self.per_1k_tokens * tokens / 1000)
+        response = super().invoke(input, config, **kwargs)
+        self.turns.append((tokens, time.perf_counter() - start))
+        return response
+
+
+def _legacy_summary(results) -> str:
+    """The notice tool's summary as it was before compaction: indented JSON."""
+    lines = []
+    extracted = results.get("notice_email_extract")
+    lines.append("Notice data extracted successfully." if extracted else "Error: Failed to extract notice data from the email.")
+    if extracted:
+        lines.append(extracted.model_dump_json(indent=2))
+    if results.get("follow_ups"):
+        lines.extend(["\nFollow-up questions answered:", json.dumps(results["follow_ups"], indent=2)])
+    lines.append("\nNotice required escalation." if results.get("requires_escalation") else "\nNotice did not require escalation.")
+    return "\n".join(lines)
+
+
+def use_legacy_tool_output(legacy: bool) -> None:
+    """Switch the tools between the original indented output and the compact one."""
+    if not hasattr(use_legacy_tool_output, "originals"):
+        use_legacy_tool_output.originals = (email_agent._summarize_notice_results, email_agent.determine_email_action.func)
+    summarize, guidelines = use_legacy_tool_output.originals
+    email_agent._summarize_notice_results = _legacy_summary if legacy else summarize
+    email_agent.determine_email_action.func = (
+        (lambda email: "\n" + textwrap.indent(guidelines(email), "    ") + "\n    ") if legacy else guidelines
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake agent model latency per call (s)")
+    parser.add_argument("--per-1k-tokens", type=float, default=0.2, help="Extra latency per 1k prompt tokens (s)")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    install_fake_notice_chains()
+    install_temp_outbox()
+    graph_utils.SIMULATED_DELAY_SCALE = 0.0
+    model = MeteredAgentModel(args.latency, args.per_1k_tokens)
+    email_agent.EMAIL_AGENT_MODEL = model
+    graph = email_agent.get_email_agent_graph()
+
+    print(f"emails={len(EMAILS)} tokenizer={TOKENIZER} latency={args.latency}s + {args.per_1k_tokens}s/1k tokens")
+    for label, compact in (("full history", False), ("compacted   ", True)):
+        use_legacy_tool_output(not compact)
+        model.turns = []
+        for email in EMAILS:
+            graph.invoke(
+                {"messages": [HumanMessage(content=email)]},
+                config={"recursion_limit": 10, "configurable": {"fast_path": False, "compact_context": compact}},
+            )
+        tokens = [t for t, _ in model.turns]
+        print(
+            f"{label}: {len(model.turns)} agent turns, {sum(tokens)} prompt tokens "
+            f"(mean {statistics.mean(tokens):.0f}, max {max(tokens)}), "
+            f"mean {statistics.mean(s for _, s in model.turns) * 1000:.0f}ms per turn"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Time to result for urgent notices in a batch run of process_inbox.py:
+arrival order (FIFO) versus urgency order (utils/urgency.py).
+
+The inbox holds --emails emails, one in --urgent-every of them a notice
+whose compliance deadline is two days away; the rest are routine mail and
+notices due months out. Every email is available up front, as in a batch
+run or a service that has fallen behind, so an email's time to result is
+measured from the start of the run. The fake agent model takes --latency
+per turn.
+
+Run from the project root:
+    python benchmarks/deadline_priority.py --emails 400 --urgent-every 40 --concurrency 8 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+
+from graphs.example_emails import EMAILS
+from process_inbox import process_inbox
+from utils.graph_utils import configure_simulation
+from utils.logging_config import configure_logging
+
+
+def _date(day: date) -> str:
+    return f"{day:%B} {day.day}, {day.year}"
+
+
+def inbox(count: int, urgent_every: int) -> tuple[List[tuple[str, str]], set]:
+    """(id, email) pairs and the ids of the urgent notices."""
+    today = date.today()
+    urgent_notice = EMAILS[0].replace("November 10, 2024", _date(today + timedelta(days=2)))
+    later_notice = EMAILS[0].replace("November 10, 2024", _date(today + timedelta(days=120)))
+    routine = [EMAILS[1], EMAILS[2], later_notice, EMAILS[3]]
+    emails, urgent = [], set()
+    for i in range(count):
+        if urgent_every and i % urgent_every == urgent_every - 1:
+            body = urgent_notice
+            urgent.add(str(i))
+        else:
+            body = routine[i % len(routine)]
+        # Unique bodies, so nothing is answered from a cache
+        emails.append((str(i), f"{body}\nRef: {i:06d}"))
+    return emails, urgent
+
+
+class _Collect:
+    """Output that notes when each email's result was written."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.done: Dict[str, float] = {}
+
+    def write(self, text: str) -> None:
+        self.done[json.loads(text)["id"]] = time.perf_counter() - self.start
+
+    def flush(self) -> None:
+        pass
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=400)
+    parser.add_argument("--urgent-every", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake model latency per call (s)")
+    parser.add_argument("--aging-seconds", type=float, default=60.0)
+    args = parser.parse_args()
+
+    configure_logging(level="ERROR")
+    install_fake_agent_model(args.latency)
+    install_fake_notice_chains(args.latency)
+    install_temp_outbox()
+    configure_simulation(delay_scale=0.0, seed=0)
+    emails, urgent = inbox(args.emails, args.urgent_every)
+
+    print(f"emails={args.emails} urgent={len(urgent)} concurrency={args.concurrency} latency={args.latency}s")
+    print(f"{'order':<8} {'urgent p50':>11} {'p95':>7} {'max':>7} {'all p50':>8} {'all max':>8} {'emails/s':>9}")
+    for order in ("arrival", "urgency"):
+        output = _Collect()
+        stats = asyncio.run(process_inbox(
+            emails, output, concurrency=args.concurrency, order=order, aging_seconds=args.aging_seconds,
+        ))
+        done = output.done
+        hot = [done[i] for i in urgent]
+        print(
+            f"{order:<8} {statistics.median(hot):10.2f}s {percentile(hot, 0.95):6.2f}s {max(hot):6.2f}s "
+            f"{statistics.median(done.values()):7.2f}s {max(done.values()):7.2f}s {stats['emails_per_s']:9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Escalation delivery time per notice as the number of recipients grows:
+one recipient at a time (max_concurrency=1) versus the concurrent fan-out.
+
+Run from the project root:
+    python benchmarks/escalation_fan_out.py --recipients 1 5 10 20
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import CANNED_NOTICE_EXTRACT
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import CANNED_NOTICE_EXTRACT
+
+from utils import graph_utils
+
+
+def time_delivery(recipients: list[str], max_concurrency: int, use_async: bool) -> float:
+    """Seconds to deliver one notice's escalation emails to every recipient."""
+    start = time.perf_counter()
+    if use_async:
+        results = asyncio.run(
+            graph_utils.asend_escalation_email(CANNED_NOTICE_EXTRACT, recipients, max_concurrency=max_concurrency)
+        )
+    else:
+        results = graph_utils.send_escalation_email(CANNED_NOTICE_EXTRACT, recipients, max_concurrency=max_concurrency)
+    assert [r.recipient for r in results] == recipients
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--delay-scale", type=float, default=1.0, help="Scale for simulated API delays")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    graph_utils.SIMULATED_DELAY_SCALE = args.delay_scale
+
+    print(f"delay_scale={args.delay_scale} cap={graph_utils.ESCALATION_MAX_CONCURRENCY}")
+    for count in args.recipients:
+        recipients = [f"escalation{i}@example.com" for i in range(count)]
+        sequential = time_delivery(recipients, max_concurrency=1, use_async=False)
+        threaded = time_delivery(recipients, graph_utils.ESCALATION_MAX_CONCURRENCY, use_async=False)
+        concurrent = time_delivery(recipients, graph_utils.ESCALATION_MAX_CONCURRENCY, use_async=True)
+        print(
+            f"recipients={count:3d}: one at a time {sequential:.2f}s, "
+            f"thread pool {threaded:.2f}s, asyncio {concurrent:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Model escalation checks and time-to-routing with the cost-ordered
+escalation rules (utils/escalation_rules.py) versus evaluating every rule,
+as check_escalation_status did before (text check and fine check both,
+then OR).
+
+--fine-share of the notices carry a fine over the dollar criteria, which
+the regexes find, so the model's text check is not needed for them. The
+text check's fake latency (--check-latency) is set apart from the
+parser's (--latency): routing waits for the slower branch.
+
+Run from the project root:
+    python benchmarks/escalation_rules.py --notices 20 --fine-share 0.5 --latency 0.5 --check-latency 1.0
+"""
+import argparse
+import statistics
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import FakeStructuredChain, install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import FakeStructuredChain, install_fake_notice_chains, install_temp_outbox
+
+from chains import escalation_check
+from chains.escalation_check import EscalationCheck
+from graphs import notice_extraction
+from graphs.email_agent import _build_notice_state
+from graphs.example_emails import EMAILS
+from utils.escalation_rules import EscalationOutcome, RuleCost, RuleEngine, escalation_rule_engine
+from utils.graph_utils import configure_simulation
+from utils.logging_config import configure_logging
+from utils.metrics import get_metrics
+
+CRITERIA = "Workers explicitly violating safety protocols"
+ROUTING_NODE = "check_escalation_status"
+
+
+class EvaluateEveryRule(RuleEngine):
+    """The behaviour before the rule engine: every rule is evaluated."""
+
+    def evaluate(self, facts, known=None, max_cost=RuleCost.LLM) -> EscalationOutcome:
+        results = self._start(known)
+        for rule in self.rules:
+            if rule.cost <= max_cost and rule.name not in results:
+                results[rule.name] = rule.evaluate(facts)
+        return self._outcome(results, known)
+
+
+def every_rule_engine(keywords=None) -> RuleEngine:
+    return EvaluateEveryRule(escalation_rule_engine(keywords).rules)
+
+
+def time_to_routing(graph, state: dict) -> float:
+    start = time.perf_counter()
+    for update in graph.stream(state, stream_mode="updates"):
+        if ROUTING_NODE in update:
+            return time.perf_counter() - start
+    raise RuntimeError(f"{ROUTING_NODE} never ran")
+
+
+def seconds_saved() -> float:
+    series = get_metrics().snapshot()["histograms"].get("escalation_llm_seconds_saved", [])
+    return sum(s["sum"] for s in series)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notices", type=int, default=20)
+    parser.add_argument("--fine-share", type=float, default=0.5, help="Share of notices whose fine decides")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake parser latency (s)")
+    parser.add_argument("--check-latency", type=float, default=1.0, help="Fake text check latency (s)")
+    args = parser.parse_args()
+
+    configure_logging(level="WARNING")
+    install_fake_notice_chains(args.latency)
+    install_temp_outbox()
+    configure_simulation(delay_scale=0.0, seed=0)
+    graph = notice_extraction.get_notice_extraction_graph()
+
+    # The OSHA notice's fine is $25,000: below 10,000 it decides, below 10,000,000 it doesn't
+    with_fine = round(args.notices * args.fine_share)
+    states = [
+        {**_build_notice_state(EMAILS[0], CRITERIA), "escalation_dollar_criteria": 10_000.0 if i < with_fine else 1e7}
+        for i in range(args.notices)
+    ]
+
+    print(f"notices={args.notices} deciding fines={with_fine} latency={args.latency}s check_latency={args.check_latency}s")
+    print(f"{'rules':<12} {'model checks':>13} {'routing mean':>13} {'saved/notice':>13}")
+    for name, engine in (("every rule", every_rule_engine), ("cost-ordered", escalation_rule_engine)):
+        notice_extraction.escalation_rule_engine = engine
+        check = FakeStructuredChain(EscalationCheck(needs_escalation=False), args.check_latency)
+        escalation_check.ESCALATION_CHECK_CHAIN = check
+        get_metrics().reset()
+        routing = [time_to_routing(graph, state) for state in states]
+        print(
+            f"{name:<12} {check.calls:>13} {statistics.mean(routing):12.2f}s "
+            f"{seconds_saved() / args.notices:12.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import asyncio
+import os
+import random
+import re
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Iterator, List, Optional, Union
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+# The fakes never reach the provider, but ChatOpenAI still wants a key if a
+# real chain gets built.
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake-llm-placeholder")
+# Keep benchmark runs' graph checkpoints out of the project directory
+os.environ.setdefault(
+    "CHECKPOINT_PATH", os.path.join(tempfile.mkdtemp(prefix="checkpoints-bench-"), "checkpoints.sqlite")
+)
+
+# Use try-except for robust imports relative to project structure
+try:
+    from chains.binary_questions import BatchBinaryAnswers, BinaryAnswer, QuestionAnswer
+    from chains.escalation_check import EscalationCheck
+    from chains.notice_extraction import NoticeEmailExtract
+    from utils.outbox import Outbox, OutboxWorkerPool, set_outbox
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from chains.binary_questions import BatchBinaryAnswers, BinaryAnswer, QuestionAnswer
+    from chains.escalation_check import EscalationCheck
+    from chains.notice_extraction import NoticeEmailExtract
+    from utils.outbox import Outbox, OutboxWorkerPool, set_outbox
+
+
+class Latency:
+    """Seeded latency distribution for the fakes, parsed from a spec string:
+
+        "0.5" or "fixed:0.5"      always 0.5s
+        "uniform:0.2,0.8"        uniform between 0.2s and 0.8s
+        "normal:0.5,0.1"         mean 0.5s, standard deviation 0.1s
+        "lognormal:0.5,0.4"      median 0.5s, sigma 0.4 (long right tail, like real APIs)
+
+    Samples are clamped at 0. The same seed gives the same sequence of samples.
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0, seed: Optional[int] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r}; expected one of {self.KINDS}")
+        self.kind, self.a, self.b = kind, a, b
+        self.random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "Latency":
+        kind, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        values = [float(p) for p in params.split(",") if p]
+        return cls(kind, *values, seed=seed)
+
+    def sample(self) -> float:
+        if self.kind == "uniform":
+            return self.random.uniform(self.a, self.b)
+        if self.kind == "normal":
+            return max(0.0, self.random.gauss(self.a, self.b))
+        if self.kind == "lognormal":
+            return self.a * self.random.lognormvariate(0.0, self.b) if self.a > 0 else 0.0
+        return self.a
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{self.a:g}" + (f",{self.b:g}" if self.kind != "fixed" else "")
+
+
+LatencySpec = Union[float, Latency]
+
+
+def sample_latency(latency: LatencySpec) -> float:
+    return latency.sample() if isinstance(latency, Latency) else latency
+
+
+class FakeStructuredChain(Runnable):
+    """Stand-in for a structured-output chain that returns a canned result
+    after a simulated latency, without calling any model provider.
+
+    `output` may be a callable, in which case it is called with the chain
+    input to build the result. `latency` is seconds or a Latency distribution.
+    """
+
+    def __init__(self, output: Any, latency: LatencySpec = 0.0):
+        self.output = output
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        self.calls += 1
+        time.sleep(sample_latency(self.latency))
+        return self._output_for(input)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        self.calls += 1
+        await asyncio.sleep(sample_latency(self.latency))
+        return self._output_for(input)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        self.calls += 1
+        partials = self._partials(self._output_for(input))
+        step = sample_latency(self.latency) / len(partials)
+        for partial in partials:
+            time.sleep(step)
+            yield partial
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        self.calls += 1
+        partials = self._partials(self._output_for(input))
+        step = sample_latency(self.latency) / len(partials)
+        for partial in partials:
+            await asyncio.sleep(step)
+            yield partial
+
+    def _output_for(self, input: Any) -> Any:
+        return self.output(input) if callable(self.output) else self.output
+
+    @staticmethod
+    def _partials(output: Any) -> List[Any]:
+        """A model output as it streams in: one more field each step, in
+        schema order, spread evenly over the latency."""
+        if not isinstance(output, BaseModel):
+            return [output]
+        names = list(type(output).model_fields)
+        return [
+            type(output).model_construct(_fields_set=set(names[:i]), **{n: getattr(output, n) for n in names[:i]})
+            for i in range(1, len(names) + 1)
+        ]
+
+
+CANNED_NOTICE_EXTRACT = NoticeEmailExtract(
+    date_of_notice_str="2024-10-15",
+    entity_name="Occupational Safety and Health Administration (OSHA)",
+    entity_phone="(555) 123-4567",
+    entity_email="compliance.osha@osha.gov",
+    project_id=111232345,
+    site_location="123 Main Street, Dallas, TX",
+    violation_type="Safety protocol violations",
+    required_changes="Install guardrails and fall arrest systems",
+    compliance_deadline_str="2024-11-10",
+    max_potential_fine=25000.0,
+)
+
+
+def answer_all_false(input: dict) -> BatchBinaryAnswers:
+    """Batch answer (False) for every numbered question in the input."""
+    count = len(input["questions"].splitlines())
+    return BatchBinaryAnswers(
+        answers=[QuestionAnswer(question_id=i, is_true=False) for i in range(1, count + 1)]
+    )
+
+
+def install_fake_notice_chains(latency: LatencySpec = 0.0) -> dict[str, FakeStructuredChain]:
+    """Swap the chains used by graphs.notice_extraction for fakes.
+
+    The fakes replace the lazily built chains in the chains/ modules, which
+    the graph's nodes fetch through their get_* accessors. Returns the
+    installed fakes by name so callers can inspect call counts.
+    """
+    from chains import binary_questions, escalation_check, notice_extraction
+
+    fakes = {
+        "PRE_EXTRACTING_NOTICE_PARSER": FakeStructuredChain(CANNED_NOTICE_EXTRACT, latency),
+        "NOTICE_PARSER_CHAIN": FakeStructuredChain(CANNED_NOTICE_EXTRACT, latency),
+        "ESCALATION_CHECK_CHAIN": FakeStructuredChain(
+            EscalationCheck(needs_escalation=True), latency
+        ),
+        "BINARY_QUESTION_CHAIN": FakeStructuredChain(BinaryAnswer(is_true=False), latency),
+        "BATCH_BINARY_QUESTION_CHAIN": FakeStructuredChain(answer_all_false, latency),
+    }
+    modules = {
+        "PRE_EXTRACTING_NOTICE_PARSER": notice_extraction,
+        "NOTICE_PARSER_CHAIN": notice_extraction,
+        "ESCALATION_CHECK_CHAIN": escalation_check,
+        "BINARY_QUESTION_CHAIN": binary_questions,
+        "BATCH_BINARY_QUESTION_CHAIN": binary_questions,
+    }
+    for name, fake in fakes.items():
+        setattr(modules[name], name, fake)
+    return fakes
+
+
+def install_fake_notice_parser_model(
+    latency: LatencySpec = 0.0, extract: NoticeEmailExtract = CANNED_NOTICE_EXTRACT
+) -> dict[tuple[str, ...], FakeStructuredChain]:
+    """Run the real PreExtractingNoticeParser (regexes included), with only
+    the model behind it faked: each partial parser chain answers the fields
+    it is asked for from `extract`, streaming them in the order asked.
+
+    Returns the fake chains by requested fields, filled in as they are built.
+    """
+    from chains import notice_extraction
+
+    fakes: dict[tuple[str, ...], FakeStructuredChain] = {}
+
+    def fake_partial_chain(fields: tuple[str, ...]) -> FakeStructuredChain:
+        if fields not in fakes:
+            output = notice_extraction.partial_notice_model(fields)(**{f: getattr(extract, f) for f in fields})
+            fakes[fields] = FakeStructuredChain(output, latency)
+        return fakes[fields]
+
+    notice_extraction.PRE_EXTRACTING_NOTICE_PARSER = notice_extraction.PreExtractingNoticeParser()
+    notice_extraction.partial_notice_parser_chain = fake_partial_chain
+    return fakes
+
+
+class FakeAgentModel(Runnable):
+    """Scripted stand-in for EMAIL_AGENT_MODEL that follows the same turns the
+    real model takes: notices go straight to extract_notice_data, anything
+    else goes through determine_email_action, then forward_email and
+    send_wrong_email_notification_to_sender, then a final answer.
+    """
+
+    def __init__(self, latency: LatencySpec = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        email = messages[0].content
+        tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+        if not tool_messages:
+            if re.search(r"violation", email, re.IGNORECASE):
+                return self._call("extract_notice_data", email=email)
+            return self._call("determine_email_action", email=email)
+        if tool_messages[-1].name == "determine_email_action":
+            department = "billing@company.com" if re.search(r"invoice", email, re.IGNORECASE) else "support@company.com"
+            sender = re.search(r"From:\s*(\S+@\S+)", email)
+            return AIMessage(content="", tool_calls=[
+                {"name": "forward_email", "args": {"email_message": email, "send_to_email": department}, "id": "fake_forward"},
+                {"name": "send_wrong_email_notification_to_sender", "args": {
+                    "sender_email": sender.group(1) if sender else "unknown@example.com",
+                    "correct_department": department,
+                }, "id": "fake_notify"},
+            ])
+        return AIMessage(content="The email has been processed.")
+
+    @staticmethod
+    def _call(name: str, **args: Any) -> AIMessage:
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"fake_{name}"}])
+
+    def invoke(self, input: List[BaseMessage], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        self.calls += 1
+        time.sleep(sample_latency(self.latency))
+        return self._respond(input)
+
+    async def ainvoke(self, input: List[BaseMessage], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        self.calls += 1
+        await asyncio.sleep(sample_latency(self.latency))
+        return self._respond(input)
+
+
+class FakeProviderError(Exception):
+    """Shaped like the openai client's APIStatusError: a status_code and the
+    response headers (retry-after-ms on a 429)."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after-ms": str(int(retry_after * 1000))} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class FlakyChatModel(BaseChatModel):
+    """Chat model that raises `errors` on its first calls, one per call, and
+    answers `content` after that. For exercising RateLimitedChatModel."""
+
+    errors: List[Exception] = []
+    content: str = "ok"
+    model_name: str = "fake-model"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-flaky"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.content))])
+
+
+def install_fake_agent_model(latency: LatencySpec = 0.0) -> FakeAgentModel:
+    """Swap EMAIL_AGENT_MODEL in graphs.email_agent for a FakeAgentModel."""
+    from graphs import email_agent
+
+    fake = FakeAgentModel(latency)
+    email_agent.EMAIL_AGENT_MODEL = fake
+    return fake
+
+
+def install_temp_outbox(workers: int = 4) -> OutboxWorkerPool:
+    """Point the email tools at a throwaway outbox so benchmark runs neither
+    write .outbox.sqlite in the project nor dedupe against earlier runs."""
+    path = os.path.join(tempfile.mkdtemp(prefix="outbox-bench-"), "outbox.sqlite")
+    pool = OutboxWorkerPool(Outbox(path), workers=workers)
+    set_outbox(pool.outbox, pool)
+    return pool
@@ -0,0 +1,62 @@
+"""Agent model calls and latency per email with and without the deterministic
+fast-path classifier in front of email_agent_graph.
+
+Run from the project root:
+    python benchmarks/fast_path.py --latency 0.5
+"""
+import argparse
+import logging
+import statistics
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+
+from langchain_core.messages import HumanMessage
+
+from graphs.email_agent import email_agent_graph, is_fast_path_message
+from graphs.example_emails import EMAILS
+from utils import graph_utils
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency per call (s)")
+    parser.add_argument("--delay-scale", type=float, default=0.0, help="Scale for simulated API delays")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    install_fake_notice_chains(latency=args.latency)
+    agent_model = install_fake_agent_model(latency=args.latency)
+    install_temp_outbox()
+    graph_utils.SIMULATED_DELAY_SCALE = args.delay_scale
+
+    print(f"emails={len(EMAILS)} fake_latency={args.latency}s delay_scale={args.delay_scale}")
+    for label, fast_path in (("agent only", False), ("fast path ", True)):
+        latencies, bypassed = [], 0
+        agent_model.calls = 0
+        for email in EMAILS:
+            start = time.perf_counter()
+            final_state = email_agent_graph.invoke(
+                {"messages": [HumanMessage(content=email)]},
+                config={"recursion_limit": 10, "configurable": {"fast_path": fast_path}},
+            )
+            latencies.append(time.perf_counter() - start)
+            bypassed += any(is_fast_path_message(m) for m in final_state["messages"])
+        print(
+            f"{label}: {agent_model.calls} agent model calls, "
+            f"{bypassed / len(EMAILS):.0%} bypassed the LLM, "
+            f"mean {statistics.mean(latencies):.2f}s per email"
+        )
+
+
+if __name__ == "__main__":
+    main()
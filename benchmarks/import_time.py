@@ -0,0 +1,76 @@
+"""Cold-start cost of `import graphs.email_agent` in a fresh interpreter,
+and the one-off cost of building the graphs and model clients on first use.
+
+Run from the project root:
+    python benchmarks/import_time.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in a fresh interpreter per sample, so nothing is cached in-process
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import graphs.email_agent as email_agent
+imported = time.perf_counter()
+email_agent.get_email_agent_graph()
+email_agent.get_email_agent_model()
+from graphs.notice_extraction import get_notice_extraction_graph
+get_notice_extraction_graph()
+built = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_use_s": built - imported}))
+"""
+
+
+def sample(env: dict) -> dict:
+    """Time one cold import plus first use in a new interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=PROJECT_ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, top: int) -> list[tuple[int, str]]:
+    """The top-level imports of graphs.email_agent with the largest cumulative time (us)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import graphs.email_agent"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Direct children of the probe only (one level of indentation)
+        if cumulative.strip().isdigit() and name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    # A placeholder key lets the first-use step build the clients offline
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-import-time-placeholder")}
+    sample(env)  # warm the OS file cache and .pyc files
+    samples = [sample(env) for _ in range(args.runs)]
+    for key, label in (("import_s", "import graphs.email_agent"), ("first_use_s", "first use (graphs + clients)")):
+        values = [s[key] for s in samples]
+        print(f"{label:<30} median {statistics.median(values):.3f}s  min {min(values):.3f}s  max {max(values):.3f}s")
+    print("slowest imports (cumulative):")
+    for micros, name in slowest_imports(env, args.top):
+        print(f"  {micros / 1e6:7.3f}s  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Per-notice logging overhead, isolated from the rest of the graph.
+
+The records notice_extraction_graph emits for each example email are
+captured once (logger, level, message and the original arguments, lazy
+ones included), then replayed from several threads at once under each
+setup:
+
+    eager, INFO off        messages formatted up front (the old f-strings),
+                           then dropped by the level check
+    lazy, INFO off         %-style arguments, dropped before formatting
+    sync INFO              formatted and written by the calling thread
+    queued INFO            enqueued; the listener thread formats and writes
+    queued, routing 1/100  as above, keeping 1 in 100 routing decisions
+
+Run from the project root:
+    python benchmarks/logging_overhead.py --notices 2000 --threads 8
+    python benchmarks/logging_overhead.py --log-file /tmp/bench.log
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_notice_chains, install_temp_outbox
+
+from graphs.email_agent import _build_notice_state
+from graphs.example_emails import EMAILS
+from graphs.notice_extraction import get_notice_extraction_graph
+from utils.graph_utils import configure_simulation
+from utils.logging_config import ROUTING_LOGGER, configure_logging, flush_logging
+
+CRITERIA = "Workers explicitly violating safety protocols"
+
+Record = Tuple[logging.Logger, int, str, tuple]
+
+MODES = {
+    "eager, INFO off": dict(level="WARNING", queued=False, sample={}),
+    "lazy, INFO off": dict(level="WARNING", queued=False, sample={}),
+    "sync INFO": dict(level="INFO", queued=False, sample={}),
+    "queued INFO": dict(level="INFO", queued=True, sample={}),
+    "queued, routing 1/100": dict(level="INFO", queued=True, sample={ROUTING_LOGGER.name: 100}),
+}
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: List[Record] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.name.startswith("LangGraphApp"):
+            self.records.append((logging.getLogger(record.name), record.levelno, record.msg, record.args))
+
+
+def capture_notices() -> List[List[Record]]:
+    """The records one run of the notice graph emits, per example email."""
+    install_fake_notice_chains()
+    install_temp_outbox()
+    configure_simulation(delay_scale=0.0, seed=0)
+    graph = get_notice_extraction_graph()
+    root = logging.getLogger()
+    per_notice = []
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        configure_logging(level="INFO", queued=False, stream=devnull)
+        for email in EMAILS:
+            capture = _Capture()
+            root.addHandler(capture)
+            try:
+                graph.invoke(_build_notice_state(email, CRITERIA))
+            finally:
+                root.removeHandler(capture)
+            per_notice.append(capture.records)
+    return per_notice
+
+
+def replay(notices: List[List[Record]], eager: bool) -> None:
+    for records in notices:
+        for logger, level, msg, args in records:
+            if eager:
+                logger.log(level, msg % args if args else msg)
+            else:
+                logger.log(level, msg, *args)
+
+
+def time_mode(captured: List[List[Record]], count: int, threads: int, eager: bool) -> float:
+    """Seconds of logging per notice with `threads` notices in flight."""
+    notices = [captured[i % len(captured)] for i in range(count)]
+    chunks = [notices[i::threads] for i in range(threads)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda chunk: replay(chunk, eager), chunks))
+    return (time.perf_counter() - start) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notices", type=int, default=2000, help="Notices per mode and round")
+    parser.add_argument("--threads", type=int, default=8, help="Notices in flight")
+    parser.add_argument("--rounds", type=int, default=5, help="Alternating rounds per mode")
+    parser.add_argument("--log-file", default=os.devnull, help="Where records are written (default: discarded)")
+    args = parser.parse_args()
+
+    captured = capture_notices()
+    records = sum(len(r) for r in captured) / len(captured)
+    routing = sum(1 for r in captured for logger, *_ in r if logger is ROUTING_LOGGER) / len(captured)
+
+    totals = dict.fromkeys(MODES, 0.0)
+    with open(args.log_file, "w", encoding="utf-8") as sink:
+        # Alternate so drift affects every mode equally
+        for _ in range(args.rounds):
+            for mode, options in MODES.items():
+                configure_logging(stream=sink, json_format=False, **options)
+                totals[mode] += time_mode(captured, args.notices, args.threads, mode.startswith("eager"))
+                flush_logging()
+    configure_logging()
+
+    print(
+        f"notices={args.notices} threads={args.threads} rounds={args.rounds} "
+        f"({records:.1f} records per notice, {routing:.1f} of them routing decisions)"
+    )
+    for mode, total in totals.items():
+        print(f"{mode:<22}: {total / args.rounds * 1e6:8.1f}us per notice")
+
+
+if __name__ == "__main__":
+    main()
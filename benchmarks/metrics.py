@@ -0,0 +1,88 @@
+"""Per-email overhead of the metrics callback handler on email_agent_graph
+(including the nested notice graph), and the JSON / Prometheus output it
+produces.
+
+Run from the project root:
+    python benchmarks/metrics.py --rounds 50
+"""
+import argparse
+import logging
+import os
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+
+from langchain_core.messages import HumanMessage
+
+from graphs import email_agent, notice_extraction
+from graphs.example_emails import EMAILS
+from utils import graph_utils
+from utils.metrics import get_metrics
+
+
+def build_graphs(enabled: bool):
+    """Fresh agent and notice graphs, instrumented or not."""
+    os.environ["METRICS_ENABLED"] = "1" if enabled else "0"
+    notice_extraction.NOTICE_EXTRACTION_GRAPH = notice_extraction.build_notice_extraction_graph()
+    return email_agent.build_email_agent_graph()
+
+
+def time_rounds(graph, rounds: int) -> float:
+    """Seconds per email over `rounds` passes through the example emails."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for email in EMAILS:
+            graph.invoke(
+                {"messages": [HumanMessage(content=email)]},
+                config={"recursion_limit": 10, "configurable": {"fast_path": False}},
+            )
+    return (time.perf_counter() - start) / (rounds * len(EMAILS))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50, help="Passes through the example emails")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    install_fake_notice_chains()
+    install_fake_agent_model()
+    install_temp_outbox()
+    graph_utils.SIMULATED_DELAY_SCALE = 0.0
+
+    plain, instrumented = build_graphs(False), build_graphs(True)
+    time_rounds(plain, 2)  # warm up
+    time_rounds(instrumented, 2)
+    get_metrics().reset()
+    # Alternate so drift affects both equally
+    plain_s = instrumented_s = 0.0
+    for _ in range(args.rounds):
+        plain_s += time_rounds(plain, 1)
+        instrumented_s += time_rounds(instrumented, 1)
+    plain_s, instrumented_s = plain_s / args.rounds, instrumented_s / args.rounds
+
+    snapshot = get_metrics().snapshot()
+    series = sum(len(s) for kind in snapshot.values() for s in kind.values())
+    print(f"emails={len(EMAILS)} rounds={args.rounds} (fake models, no simulated delays)")
+    print(f"no metrics : {plain_s * 1000:6.2f}ms per email")
+    print(f"metrics    : {instrumented_s * 1000:6.2f}ms per email")
+    print(f"overhead   : {(instrumented_s - plain_s) * 1000:6.3f}ms per email, {series} series recorded")
+    print("\nslowest nodes (mean):")
+    nodes = snapshot["histograms"]["node_duration_seconds"]
+    for entry in sorted(nodes, key=lambda e: -e["sum"] / e["count"])[:5]:
+        node = f"{entry['labels']['graph']}.{entry['labels']['node']}"
+        print(f"  {node:<50} {entry['sum'] / entry['count'] * 1000:6.2f}ms x{entry['count']}")
+    print("\nPrometheus excerpt:")
+    print("\n".join(line for line in get_metrics().to_prometheus().splitlines() if "graph_cycles" in line and "le=" not in line))
+
+
+if __name__ == "__main__":
+    main()
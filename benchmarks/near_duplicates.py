@@ -0,0 +1,148 @@
+"""Near-duplicate notice detection and reuse (utils/near_duplicates.py).
+
+Three parts:
+- detection: fingerprint distance of resent variants of a notice (new date
+  line, forwarding headers, reflowed text, quoting) and of unrelated emails;
+- lookup: FileNearDuplicateIndex with --indexed random fingerprints, written
+  to a temporary file: time to open it, and per-lookup latency;
+- reuse: extract_notice_data on --notices resent variants of the example
+  notice with fake chains (--latency per call), without and with an index.
+
+Run from the project root:
+    python benchmarks/near_duplicates.py --indexed 1000000 --notices 20 --latency 0.5
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_notice_chains, install_temp_outbox
+
+from graphs.email_agent import DEFAULT_ESCALATION_CRITERIA, _extract_notice_data
+from graphs.example_emails import EMAILS
+from utils.graph_utils import configure_simulation
+from utils.logging_config import configure_logging
+from utils.near_duplicates import (
+    FileNearDuplicateIndex,
+    NearDuplicateIndex,
+    hamming_distance,
+    set_near_duplicate_index,
+    simhash,
+)
+
+NOTICE = EMAILS[0]
+
+
+def variants(email: str, i: int) -> dict[str, str]:
+    """Ways the same notice comes back: resent, forwarded, reflowed, quoted."""
+    return {
+        "whitespace": "\n\n".join(" ".join(line.split()) for line in email.splitlines()),
+        "forwarded": f"---------- Forwarded message ----------\nFrom: ops@company.com\nDate: Mon, {i % 28 + 1} Jul 2024\n\n{email}",
+        "quoted": "\n".join(f"> {line}" for line in email.splitlines()),
+        "new date line": f"Date: {i % 28 + 1} August 2024\n{email}",
+        "changed fine": email.replace("$25,000", "$250,000"),
+    }
+
+
+def detection(max_distance: int) -> None:
+    base = simhash(NOTICE)
+    print(f"\ndetection (max distance {max_distance} bits)")
+    print(f"{'email':<16} {'distance':>9} {'near-duplicate':>15}")
+    rows = list(variants(NOTICE, 0).items()) + [(f"other email {i}", e) for i, e in enumerate(EMAILS[1:], 1)]
+    for name, email in rows:
+        distance = hamming_distance(base, simhash(email))
+        print(f"{name:<16} {distance:>9} {str(distance <= max_distance):>15}")
+
+
+def lookup(indexed: int, queries: int, max_distance: int) -> None:
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "near_duplicates.bin")
+        # Written in bulk; FileNearDuplicateIndex.add would do one write per email
+        with open(path, "wb") as f:
+            for i in range(indexed):
+                payload = b'{"message_id":"%08d"}' % i
+                f.write(FileNearDuplicateIndex._HEADER.pack(rng.getrandbits(64), len(payload)) + payload)
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        index = FileNearDuplicateIndex(path, max_distance=max_distance)
+        opened = time.perf_counter() - start
+
+        fingerprints = [simhash(f"{NOTICE}\nReference: {i}") for i in range(queries)]
+        start = time.perf_counter()
+        for fingerprint in fingerprints:
+            index.find(fingerprint)
+        miss = (time.perf_counter() - start) / queries
+        # Near-duplicates of indexed fingerprints: one bit flipped
+        rng = random.Random(0)
+        indexed_fingerprints = [rng.getrandbits(64) for _ in range(queries)]
+        near = [f ^ (1 << rng.randrange(64)) for f in indexed_fingerprints]
+        start = time.perf_counter()
+        hits = sum(index.find(f) is not None for f in near)
+        hit = (time.perf_counter() - start) / queries
+        index.close()
+
+    hashing = []
+    for i in range(queries):
+        start = time.perf_counter()
+        simhash(f"{NOTICE}\nReference: {i}")
+        hashing.append(time.perf_counter() - start)
+
+    print(f"\nlookup ({indexed} indexed emails, {size / 2**20:.1f} MiB file)")
+    print(f"open (scan and bucket): {opened:.2f}s")
+    print(f"simhash of a notice:    {statistics.median(hashing) * 1e6:.0f}us")
+    print(f"lookup, no match:       {miss * 1e6:.0f}us")
+    print(f"lookup, match:          {hit * 1e6:.0f}us ({hits}/{queries} found)")
+
+
+def reuse(notices: int, latency: float) -> None:
+    fakes = install_fake_notice_chains(latency)
+    install_temp_outbox()
+    configure_simulation(delay_scale=0.0, seed=0)
+    emails = [email for i in range(notices) for email in variants(NOTICE, i).values()][:notices]
+
+    print(f"\nreuse ({notices} resent notices, latency={latency}s, fake chains)")
+    print(f"{'index':<8} {'model calls':>12} {'reused':>7} {'mean':>8}")
+    for name, index in (("none", None), ("memory", NearDuplicateIndex())):
+        set_near_duplicate_index(index)
+        for fake in fakes.values():
+            fake.calls = 0
+        times, reused = [], 0
+        for email in emails:
+            start = time.perf_counter()
+            _, artifact = _extract_notice_data(email, DEFAULT_ESCALATION_CRITERIA)
+            times.append(time.perf_counter() - start)
+            reused += bool(artifact and artifact.get("near_duplicate_of"))
+        calls = sum(fake.calls for fake in fakes.values())
+        print(f"{name:<8} {calls:>12} {reused:>7} {statistics.mean(times):7.2f}s")
+    set_near_duplicate_index(None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--indexed", type=int, default=1_000_000, help="Emails in the lookup benchmark's index")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--max-distance", type=int, default=3)
+    parser.add_argument("--notices", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake chain latency (s)")
+    args = parser.parse_args()
+
+    configure_logging(level="ERROR")
+    detection(args.max_distance)
+    lookup(args.indexed, args.queries, args.max_distance)
+    reuse(args.notices, args.latency)
+
+
+if __name__ == "__main__":
+    main()
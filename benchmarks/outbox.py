@@ -0,0 +1,125 @@
+"""Agent turn latency with inline email delivery versus the durable outbox,
+plus per-destination batching and recovery of queued sends after a restart.
+
+Run from the project root:
+    python benchmarks/outbox.py --latency 0.2 --jobs 60
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_fake_agent_model, install_temp_outbox
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_fake_agent_model, install_temp_outbox
+
+from langchain_core.messages import HumanMessage
+
+from graphs import email_agent
+from graphs.example_emails import EMAILS
+from utils import outbox as outbox_module
+from utils.outbox import Outbox, OutboxJob, OutboxWorkerPool, simulated_smtp_send
+
+
+def _deliver_inline(kind: str, destination: str, payload: dict, send_id=None) -> int:
+    """The pre-outbox behaviour: the tool blocks until the send completes."""
+    simulated_smtp_send(destination, [OutboxJob(id=0, idempotency_key="", kind=kind, destination=destination, payload=payload, attempts=0)])
+    return 0
+
+
+def measure_turn_latency(repeats: int) -> None:
+    """Mean agent run time for the non-notice emails, whose tools send email."""
+    emails = [EMAILS[1], EMAILS[2]]
+    for label, enqueue in (("inline delivery", _deliver_inline), ("outbox        ", outbox_module.enqueue_email)):
+        email_agent.enqueue_email = enqueue
+        pool = install_temp_outbox()
+        latencies = []
+        for i in range(repeats):
+            for email in emails:
+                start = time.perf_counter()
+                email_agent.email_agent_graph.invoke(
+                    {"messages": [HumanMessage(content=f"{email}\n(run {i})")]},
+                    config={"recursion_limit": 10, "configurable": {"fast_path": False}},
+                )
+                latencies.append(time.perf_counter() - start)
+        drain_start = time.perf_counter()
+        pool.drain()
+        pool.stop()
+        print(
+            f"  {label}: mean {statistics.mean(latencies):.2f}s per email"
+            f" (background delivery finished {time.perf_counter() - drain_start:.2f}s after the last run)"
+        )
+
+
+def measure_batching(jobs: int) -> None:
+    """Sender calls needed for jobs spread over a few destinations."""
+    calls = []
+
+    def counting_sender(destination, batch):
+        calls.append(len(batch))
+        simulated_smtp_send(destination, batch)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="outbox-bench-"), "outbox.sqlite")
+    outbox = Outbox(path)
+    destinations = ["billing@company.com", "support@company.com", "cdetuma@company.com"]
+    for i in range(jobs):
+        outbox.enqueue("forward_email", destinations[i % len(destinations)], {"email_message": f"message {i}"})
+    start = time.perf_counter()
+    pool = OutboxWorkerPool(outbox, sender=counting_sender, workers=4).start()
+    pool.drain()
+    pool.stop()
+    print(
+        f"  {jobs} jobs to {len(destinations)} destinations: {len(calls)} sender calls "
+        f"(batch sizes {sorted(calls, reverse=True)}), {time.perf_counter() - start:.2f}s"
+    )
+
+
+def measure_restart(jobs: int) -> None:
+    """Queue jobs, 'crash' with some in progress, reopen and drain."""
+    path = os.path.join(tempfile.mkdtemp(prefix="outbox-bench-"), "outbox.sqlite")
+    outbox = Outbox(path)
+    for i in range(jobs):
+        outbox.enqueue("forward_email", "support@company.com", {"email_message": f"message {i}"})
+    outbox.claim_batch(batch_size=jobs // 3)  # claimed but never delivered
+    before = outbox.counts()
+    del outbox  # process dies here
+
+    # A restarted process takes over the dead one's claims once their lease expires
+    reopened = Outbox(path, lease_seconds=0.0)
+    recovered = reopened.counts()
+    pool = OutboxWorkerPool(reopened).start()
+    pool.drain()
+    pool.stop()
+    print(f"  before crash: {before}")
+    print(f"  after reopen: {recovered} (expired claims are requeued by the next claim)")
+    print(f"  after drain : {reopened.counts()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake agent model latency per call (s)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=60)
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    install_fake_agent_model(latency=args.latency)
+
+    print(f"Agent turn latency (fake_latency={args.latency}s):")
+    measure_turn_latency(args.repeats)
+    print("Per-destination batching:")
+    measure_batching(args.jobs)
+    print("Restart recovery:")
+    measure_restart(args.jobs)
+
+
+if __name__ == "__main__":
+    main()
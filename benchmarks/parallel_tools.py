@@ -0,0 +1,81 @@
+"""Turn latency of the email agent's tool node when the model makes several
+tool calls in one turn: one call at a time versus the parallel tool node.
+
+Run from the project root:
+    python benchmarks/parallel_tools.py --durations 0.5 1.0 1.5 --timeout 5
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.tool_execution import make_parallel_tool_node
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.tool_execution import make_parallel_tool_node
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+
+def make_slow_tool(name: str, duration: float) -> StructuredTool:
+    """A tool that blocks (sync) or sleeps (async) for `duration` seconds,
+    standing in for a blocking API call."""
+    def run(email: str) -> str:
+        time.sleep(duration)
+        return f"{name} done after {duration}s"
+
+    async def arun(email: str) -> str:
+        await asyncio.sleep(duration)
+        return f"{name} done after {duration}s"
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=f"Slow tool {name}")
+
+
+def turn_state(names: list[str]) -> dict:
+    """Agent state whose last message asks for every tool in one turn."""
+    calls = [{"name": name, "args": {"email": "..."}, "id": f"call_{i}"} for i, name in enumerate(names)]
+    return {"messages": [AIMessage(content="", tool_calls=calls)]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[0.5, 1.0, 1.5])
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-tool timeout (s)")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    tools = [make_slow_tool(f"tool_{i}", d) for i, d in enumerate(args.durations)]
+    state = turn_state([t.name for t in tools])
+    node = make_parallel_tool_node(tools, timeout_seconds=args.timeout)
+    print(f"tool durations={args.durations} sum={sum(args.durations):.1f}s slowest={max(args.durations):.1f}s")
+
+    for label, concurrency in (("one at a time", 1), ("parallel     ", len(tools))):
+        config = {"configurable": {"tool_max_concurrency": concurrency}}
+        start = time.perf_counter()
+        result = node.invoke(state, config)
+        sync_s = time.perf_counter() - start
+        start = time.perf_counter()
+        aresult = asyncio.run(node.ainvoke(state, config))
+        async_s = time.perf_counter() - start
+        in_order = [m.tool_call_id for m in result["messages"]] == [m.tool_call_id for m in aresult["messages"]] == [
+            c["id"] for c in state["messages"][-1].tool_calls
+        ]
+        print(f"{label}: invoke {sync_s:.2f}s, ainvoke {async_s:.2f}s, results in call order: {in_order}")
+
+    # A turn with a tool that overruns its timeout still returns after the timeout
+    timeout = min(args.durations) * 1.5
+    start = time.perf_counter()
+    result = node.invoke(state, {"configurable": {"tool_timeout_seconds": timeout}})
+    statuses = [m.status for m in result["messages"]]
+    print(f"timeout={timeout}s: turn took {time.perf_counter() - start:.2f}s, statuses {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Accuracy and latency of the regex pre-extraction for NoticeEmailExtract
+fields, on the example notices plus a synthetic set with known answers.
+
+Accuracy is checked against hand-labeled values; latency compares the plain
+NOTICE_PARSER_CHAIN with PreExtractingNoticeParser using fake models.
+
+Run from the project root:
+    python benchmarks/pre_extraction.py --synthetic 500 --latency 0.5
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import CANNED_NOTICE_EXTRACT, FakeStructuredChain
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import CANNED_NOTICE_EXTRACT, FakeStructuredChain
+
+from pydantic import create_model
+
+from chains import notice_extraction
+from chains.notice_extraction import NoticeEmailExtract, PreExtractingNoticeParser
+from graphs.example_emails import EMAILS
+from utils.notice_pre_extraction import PRE_EXTRACTED_FIELDS, pre_extract_notice_fields
+
+# Hand-labeled values for the regulatory notices in example_emails.EMAILS
+LABELED_EMAILS = [
+    (EMAILS[0], {
+        "date_of_notice_str": "2024-10-15",
+        "entity_phone": "(555) 123-4567",
+        "entity_email": "compliance.osha@osha.gov",
+        "project_id": 111232345,
+        "compliance_deadline_str": "2024-11-10",
+        "max_potential_fine": 25000.0,
+    }),
+    (EMAILS[3], {
+        "date_of_notice_str": "2025-01-10",
+        "entity_phone": "(555) 456-7890",
+        "entity_email": "inspections@lacity.gov",
+        "project_id": 345678123,
+        "compliance_deadline_str": "2025-02-05",
+        "max_potential_fine": None,
+    }),
+]
+
+_REGULATORS = [
+    ("Occupational Safety and Health Administration (OSHA)", "osha.gov"),
+    ("Environmental Protection Agency", "epa.gov"),
+    ("City of Austin Code Enforcement", "austintexas.gov"),
+    ("Department of Buildings", "buildings.nyc.gov"),
+    ("County Fire Marshal", "firemarshal.org"),
+]
+_VIOLATIONS = [
+    "Lack of fall protection on scaffolding",
+    "Improper storage of hazardous materials",
+    "Blocked emergency exits",
+    "Unpermitted structural modifications",
+]
+_DATE_STYLES = ["%B %d, %Y", "%b %d, %Y", "%m/%d/%Y", "%Y-%m-%d"]
+
+
+def _fmt_date(rng: random.Random, year: int, month: int, day: int) -> Tuple[str, str]:
+    """A date rendered in a random style, plus its YYYY-mm-dd label."""
+    value = date(year, month, day)
+    return value.strftime(rng.choice(_DATE_STYLES)), value.strftime("%Y-%m-%d")
+
+
+def synthetic_notice(rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    """Generate a notice and the values the extractor should find in it."""
+    entity, domain = rng.choice(_REGULATORS)
+    notice_text, notice_label = _fmt_date(rng, 2025, rng.randint(1, 6), rng.randint(1, 28))
+    deadline_text, deadline_label = _fmt_date(rng, 2025, rng.randint(7, 12), rng.randint(1, 28))
+    area, exchange, line = rng.randint(200, 999), rng.randint(200, 999), rng.randint(0, 9999)
+    phone = rng.choice([f"({area}) {exchange}-{line:04d}", f"{area}-{exchange}-{line:04d}", f"{area}.{exchange}.{line:04d}"])
+    email = f"{rng.choice(['compliance', 'inspections', 'notices'])}@{domain}"
+    project_id = rng.randint(100000, 999999999)
+    fine = rng.choice([None, 5000.0, 12500.0, 25000.0, 100000.0])
+    fine_text = (
+        f"Failure to comply may result in fines of up to ${fine:,.0f} per violation."
+        if fine is not None
+        else "Failure to comply may result in a stop-work order."
+    )
+    # Some notices list a second number, which the extractor should leave to the model
+    fax = f" (fax {area}-{exchange}-{(line + 1) % 10000:04d})" if rng.random() < 0.2 else ""
+    message = f"""
+    Date: {notice_text}
+    From: {entity}
+    To: Acme Builders, project {project_id} - Riverside Lofts
+    During a recent inspection we identified: {rng.choice(_VIOLATIONS)}.
+    Deadline for Compliance: All violations must be corrected by
+    {deadline_text}. {fine_text}
+    Contact: please call {phone}{fax} or email {email}.
+    """
+    labels = {
+        "date_of_notice_str": notice_label,
+        "entity_phone": phone,
+        "entity_email": email,
+        "project_id": project_id,
+        "compliance_deadline_str": deadline_label,
+        "max_potential_fine": fine,
+    }
+    return message, labels
+
+
+def measure_accuracy(labeled: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Per field: how often it was filled (coverage) and how often a filled value was right."""
+    filled = {field: 0 for field in PRE_EXTRACTED_FIELDS}
+    correct = {field: 0 for field in PRE_EXTRACTED_FIELDS}
+    start = time.perf_counter()
+    for message, labels in labeled:
+        extracted = pre_extract_notice_fields(message)
+        for field in PRE_EXTRACTED_FIELDS:
+            if field in extracted:
+                filled[field] += 1
+                correct[field] += extracted[field] == labels[field]
+    per_email_ms = (time.perf_counter() - start) / len(labeled) * 1000
+    for field in PRE_EXTRACTED_FIELDS:
+        precision = correct[field] / filled[field] if filled[field] else 0.0
+        print(f"  {field:<24} coverage {filled[field] / len(labeled):6.1%}  accuracy {precision:6.1%}")
+    print(f"  regex extraction: {per_email_ms:.3f} ms per email")
+
+
+def measure_latency(messages: List[str], latency: float) -> None:
+    """Wall time per notice for the full LLM chain vs the pre-extracting parser."""
+    full_chain = FakeStructuredChain(CANNED_NOTICE_EXTRACT, latency)
+    partial_chains: Dict[Tuple[str, ...], FakeStructuredChain] = {}
+
+    def fake_partial_chain(fields: Tuple[str, ...]) -> FakeStructuredChain:
+        if fields not in partial_chains:
+            # Canned answers for just the requested fields, like the real partial schema
+            partial_model = create_model("NoticeEmailExtractFields", **{name: (Any, None) for name in fields})
+            canned = partial_model(**{name: getattr(CANNED_NOTICE_EXTRACT, name) for name in fields})
+            partial_chains[fields] = FakeStructuredChain(canned, latency)
+        return partial_chains[fields]
+
+    notice_extraction.NOTICE_PARSER_CHAIN = full_chain
+    notice_extraction.partial_notice_parser_chain = fake_partial_chain
+    runs = [
+        ("full LLM chain", full_chain),
+        ("pre-extraction", PreExtractingNoticeParser()),
+    ]
+    for label, parser in runs:
+        latencies = []
+        for message in messages:
+            start = time.perf_counter()
+            result = parser.invoke({"message": message})
+            latencies.append(time.perf_counter() - start)
+            assert isinstance(result, NoticeEmailExtract)
+        model_calls = full_chain.calls + sum(chain.calls for chain in partial_chains.values())
+        asked = sorted({len(fields) for fields in partial_chains})
+        print(
+            f"  {label:<40} {model_calls:3d} model calls, mean {statistics.mean(latencies):.3f}s per notice"
+            + (f", partial schema sizes {asked}" if asked else "")
+        )
+        full_chain.calls = 0
+        partial_chains.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", type=int, default=500, help="Number of synthetic notices")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency per call (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    synthetic = [synthetic_notice(rng) for _ in range(args.synthetic)]
+
+    print(f"Accuracy on example_emails.EMAILS ({len(LABELED_EMAILS)} notices):")
+    measure_accuracy(LABELED_EMAILS)
+    print(f"Accuracy on synthetic notices ({len(synthetic)}):")
+    measure_accuracy(synthetic)
+    print(f"Latency with fake_latency={args.latency}s (example notices):")
+    measure_latency([message for message, _ in LABELED_EMAILS], args.latency)
+    print(f"Latency with fake_latency={args.latency}s (first 20 synthetic notices):")
+    measure_latency([message for message, _ in synthetic[:20]], args.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Throughput and fairness under provider rate limits, with and without the
+model scheduler (utils/model_scheduler.py), against a local OpenAI-compatible
+stand-in that enforces requests and tokens per window and answers 429 with
+a retry-after-ms header beyond them.
+
+--agent-workers threads keep sending agent turns (email_agent model) while
+--subgraph-workers threads send the notice graph's chain calls, for
+--duration seconds. The stand-in also slows down as calls pile up beyond
+--capacity in flight, like an overloaded endpoint. Without the scheduler the
+openai client retries 429s itself (max_retries=2) and then fails the call.
+
+Run from the project root:
+    python benchmarks/rate_limits.py --duration 10 --rpw 40 --tpw 40000 --window 1.0
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.shared_client import CALLS, StandInServer, _Handler, install_models, prime_openai_response_model
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.shared_client import CALLS, StandInServer, _Handler, install_models, prime_openai_response_model
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+
+from utils.llm_cache import NullCache, set_cache_backend
+from utils.model_clients import get_chat_model
+from utils.model_scheduler import ModelScheduler, set_model_scheduler
+
+
+class LimitedServer(StandInServer):
+    """StandInServer with per-window request and token limits."""
+
+    def __init__(self, response_seconds: float, requests_per_window: int, tokens_per_window: int,
+                 window: float, capacity: int):
+        super().__init__(0.0, response_seconds)
+        self.RequestHandlerClass = _LimitedHandler
+        self.requests_per_window = requests_per_window
+        self.tokens_per_window = tokens_per_window
+        self.window = window
+        self.capacity = capacity
+        self.in_flight = 0
+        self.rejected = 0
+        self._sent: deque = deque()  # (time, tokens) of accepted requests
+
+    def admit(self, tokens: int) -> float:
+        """0 if the request fits the window's limits, else seconds until it would."""
+        with self._lock:
+            now = time.monotonic()
+            while self._sent and self._sent[0][0] <= now - self.window:
+                self._sent.popleft()
+            used = sum(t for _, t in self._sent)
+            if len(self._sent) < self.requests_per_window and used + tokens <= self.tokens_per_window:
+                self._sent.append((now, tokens))
+                self.in_flight += 1
+                return 0.0
+            self.rejected += 1
+            return max(self._sent[0][0] + self.window - now, 0.01) if self._sent else self.window
+
+    def done(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def reset_counts(self) -> None:
+        super().reset_counts()
+        with self._lock:
+            self.rejected = 0
+            self._sent.clear()
+
+
+class _LimitedHandler(_Handler):
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        wait = self.server.admit(len(body) // 4 + 50)
+        if wait:
+            data = json.dumps({"error": {"message": "Rate limit reached", "code": "rate_limit_exceeded"}}).encode()
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("retry-after-ms", str(int(wait * 1000)))
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        try:
+            # Calls beyond capacity queue up on the endpoint
+            overload = max(self.server.in_flight - self.server.capacity, 0) / self.server.capacity
+            time.sleep(self.server.response_seconds * (1 + overload))
+            self._answer(json.loads(body))
+        finally:
+            self.server.done()
+
+
+@tool
+def extract_notice_data(email: str) -> str:
+    """Extract structured fields from a regulatory notice email."""
+    return ""
+
+
+def run(duration: float, agent_workers: int, subgraph_workers: int) -> Dict[str, Dict[str, Any]]:
+    install_models(shared=True)
+    agent = get_chat_model("email_agent").bind_tools([extract_notice_data])
+    results: Dict[str, Dict[str, List]] = {
+        "agent": {"ok": [], "failed": []},
+        "subgraph": {"ok": [], "failed": []},
+    }
+    stop = time.monotonic() + duration
+
+    def worker(kind: str, index: int) -> None:
+        i = index
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                if kind == "agent":
+                    agent.invoke([HumanMessage(content=f"Email {i}: please route this message.")])
+                else:
+                    get_chain, inputs = CALLS[i % len(CALLS)]
+                    get_chain().invoke(inputs)
+                results[kind]["ok"].append(time.perf_counter() - start)
+            except Exception:
+                results[kind]["failed"].append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=("agent", i)) for i in range(agent_workers)]
+    threads += [threading.Thread(target=worker, args=("subgraph", i)) for i in range(subgraph_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--agent-workers", type=int, default=24)
+    parser.add_argument("--subgraph-workers", type=int, default=4)
+    parser.add_argument("--rpw", type=int, default=40, help="Requests allowed per window")
+    parser.add_argument("--tpw", type=int, default=40000, help="Tokens allowed per window")
+    parser.add_argument("--window", type=float, default=1.0, help="Rate limit window (s)")
+    parser.add_argument("--capacity", type=int, default=8, help="Calls in flight before the endpoint slows down")
+    parser.add_argument("--response", type=float, default=0.1, help="Seconds to answer a request")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.ERROR)
+    logging.getLogger("openai").setLevel(logging.ERROR)
+    server = LimitedServer(args.response, args.rpw, args.tpw, args.window, args.capacity)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stand-in")
+    set_cache_backend(NullCache())
+    prime_openai_response_model()
+
+    per_minute = 60 / args.window
+    print(
+        f"limits {args.rpw} requests / {args.tpw} tokens per {args.window}s, {args.agent_workers} agent + "
+        f"{args.subgraph_workers} sub-graph workers for {args.duration}s, response={args.response}s"
+    )
+    print(f"{'scheduler':<10} {'class':<9} {'ok/s':>6} {'failed':>7} {'p50':>7} {'p95':>7} {'429s':>6}")
+    for label, scheduler in (
+        ("off", None),
+        ("on", ModelScheduler(default_rpm=args.rpw * per_minute, default_tpm=args.tpw * per_minute)),
+    ):
+        set_model_scheduler(scheduler)
+        server.reset_counts()
+        results = run(args.duration, args.agent_workers, args.subgraph_workers)
+        for kind, outcome in results.items():
+            ok = sorted(outcome["ok"])
+            p50 = statistics.median(ok) if ok else float("nan")
+            p95 = ok[int(len(ok) * 0.95)] if ok else float("nan")
+            print(
+                f"{label:<10} {kind:<9} {len(ok) / args.duration:6.1f} {len(outcome['failed']):7d} "
+                f"{p50:6.2f}s {p95:6.2f}s {server.rejected if kind == 'agent' else '':>6}"
+            )
+    set_model_scheduler(None)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
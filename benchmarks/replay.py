@@ -0,0 +1,101 @@
+"""Record the example emails' model calls to a cassette once, then replay
+them offline to measure the graphs' own overhead per email, free of network
+noise, e.g. before and after a change.
+
+    # Against the real API (needs OPENAI_API_KEY), or --stand-in for the local server
+    python benchmarks/replay.py record cassettes/examples.jsonl.gz
+    # Offline; --replay-latency also sleeps each call's recorded latency
+    python benchmarks/replay.py replay cassettes/examples.jsonl.gz --rounds 20
+
+Model calls are answered from the cassette byte-for-byte, so the time left
+is the graphs' own: state handling, checkpointing, callbacks, tools and the
+simulated APIs (off unless --delay-scale is set). Any prompt that differs
+from the recording fails the run.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import install_temp_outbox
+except ImportError:
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import install_temp_outbox
+
+from langchain_core.messages import HumanMessage
+
+from graphs.email_agent import build_agent_input, get_email_agent_graph
+from graphs.example_emails import EMAILS
+from utils.cassettes import RECORD, REPLAY, Cassette, set_cassette
+from utils.graph_utils import configure_simulation
+from utils.llm_cache import NullCache, set_cache_backend
+
+CRITERIA = "Workers explicitly violating safety protocols"
+
+
+def run_examples(graph, fast_path: bool, delay_scale: float, seed: int) -> float:
+    """Seconds per email for one pass through the example emails."""
+    # Same seed, same follow-up questions, so the prompts match the recording
+    configure_simulation(delay_scale=delay_scale, seed=seed)
+    start = time.perf_counter()
+    for email in EMAILS:
+        graph.invoke(
+            {"messages": [HumanMessage(content=build_agent_input(email, CRITERIA))]},
+            config={"recursion_limit": 12, "configurable": {"fast_path": fast_path}},
+        )
+    return (time.perf_counter() - start) / len(EMAILS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=[RECORD, REPLAY])
+    parser.add_argument("cassette", help="Cassette file (gzipped JSONL)")
+    parser.add_argument("--rounds", type=int, default=10, help="Replay passes through the example emails")
+    parser.add_argument("--replay-latency", action="store_true", help="Sleep each call's recorded latency")
+    parser.add_argument("--stand-in", action="store_true", help="Record against a local stand-in API server")
+    parser.add_argument("--delay-scale", type=float, default=0.0, help="Scale for simulated API delays")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every email through the agent model")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    if args.mode == RECORD:
+        from benchmarks.shared_client import StandInServer, prime_openai_response_model
+        prime_openai_response_model()
+    if args.mode == RECORD and args.stand_in:
+        server = StandInServer(handshake_seconds=0.0, response_seconds=0.05)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+    cassette = Cassette(args.cassette, args.mode, replay_latency=args.replay_latency)
+    set_cassette(cassette)
+    # Every call goes to the model (or cassette), none to the response cache
+    set_cache_backend(NullCache())
+    install_temp_outbox()
+    graph = get_email_agent_graph()
+
+    if args.mode == RECORD:
+        seconds = run_examples(graph, not args.no_fast_path, args.delay_scale, args.seed)
+        cassette.close()
+        size = os.path.getsize(args.cassette)
+        print(f"recorded {cassette.calls} model calls for {len(EMAILS)} emails to {args.cassette} ({size} bytes)")
+        print(f"recording run: {seconds * 1000:.1f}ms per email")
+        return
+
+    per_email = [run_examples(graph, not args.no_fast_path, args.delay_scale, args.seed) for _ in range(args.rounds)]
+    cassette.assert_no_mismatches()
+    print(f"replayed {len(cassette)} recorded calls, {cassette.calls} model calls over {args.rounds} rounds")
+    print(
+        f"{'with' if args.replay_latency else 'without'} recorded latency: "
+        f"median {statistics.median(per_email) * 1000:.2f}ms per email, min {min(per_email) * 1000:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
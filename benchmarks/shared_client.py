@@ -0,0 +1,213 @@
+"""Connections opened and per-call latency of the chain model clients against a
+local OpenAI-compatible stand-in server: one client (and connection pool) per
+chain versus the shared, pre-warmed pool from utils/model_clients.py.
+
+The stand-in server charges a fixed delay for every new connection, standing
+in for the TCP + TLS handshake to the real API.
+
+Run from the project root:
+    python benchmarks/shared_client.py --concurrency 8 --rounds 6 --handshake 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils import model_clients
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils import model_clients
+
+from chains import binary_questions, escalation_check, notice_extraction
+from utils.llm_cache import NullCache, set_cache_backend
+
+
+def _placeholder(schema: Dict[str, Any]) -> Any:
+    """A valid value for a JSON schema property: null where allowed, else a zero value."""
+    if any(option.get("type") == "null" for option in schema.get("anyOf", [])):
+        return None
+    return {"boolean": False, "integer": 0, "number": 0.0, "array": [], "object": {}}.get(schema.get("type"), "")
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Minimal OpenAI-compatible API: answers a chat completion with a tool
+    call filled with placeholders from the first requested function schema,
+    or with a final text answer once the last message is a tool result."""
+
+    daemon_threads = True
+
+    def __init__(self, handshake_seconds: float, response_seconds: float):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.handshake_seconds = handshake_seconds
+        self.response_seconds = response_seconds
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.connections = self.requests = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self) -> None:
+        # Runs once per connection, not per request
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_seconds)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, body: Dict[str, Any]) -> None:
+        with self.server._lock:
+            self.server.requests += 1
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self._reply({"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.server.response_seconds)
+        self._answer(request)
+
+    def _answer(self, request: Dict[str, Any]) -> None:
+        if request["messages"][-1]["role"] == "tool":
+            return self._reply(self._completion(request, "stop", {"role": "assistant", "content": "Done."}))
+        function = request["tools"][0]["function"]
+        arguments = {
+            name: _placeholder(schema) for name, schema in function["parameters"].get("properties", {}).items()
+        }
+        self._reply(self._completion(request, "tool_calls", {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": "call_standin",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+            }],
+        }))
+
+    @staticmethod
+    def _completion(request: Dict[str, Any], finish_reason: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [{"index": 0, "finish_reason": finish_reason, "message": message}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+
+def prime_openai_response_model() -> None:
+    """openai builds the response model's serializer on first use, and
+    threads racing to do so can get an empty dump; build it up front."""
+    from openai.types.chat import ChatCompletion
+    ChatCompletion.model_construct(choices=[]).model_dump()
+
+
+CALLS = [
+    (escalation_check.get_escalation_check_chain,
+     {"escalation_criteria": "Water damage", "message": "Cracks in the foundation"}),
+    (binary_questions.get_binary_question_chain,
+     {"context": "The notice is from Texas.", "question": "Is the notice from Texas?"}),
+    (notice_extraction.get_notice_parser_chain,
+     {"message": "Please fix the guardrails on project 111232345 by 2024-12-01."}),
+]
+
+
+def install_models(shared: bool) -> None:
+    """Rebuild each chain on per-chain clients or on the shared pool."""
+    from langchain_openai import ChatOpenAI
+
+    model_clients.HTTP_CLIENT = None
+    for module, model_name, chain_name in (
+        (escalation_check, "escalation_check_model", "ESCALATION_CHECK_CHAIN"),
+        (binary_questions, "binary_question_model", "BINARY_QUESTION_CHAIN"),
+        (notice_extraction, "notice_parser_model", "NOTICE_PARSER_CHAIN"),
+    ):
+        # None makes the chain module build its model through get_chat_model
+        setattr(module, model_name, None if shared else ChatOpenAI(model="gpt-4o-mini", temperature=0))
+        setattr(module, chain_name, None)
+
+
+def run(server: StandInServer, shared: bool, concurrency: int, rounds: int) -> Dict[str, float]:
+    install_models(shared)
+    server.reset_counts()
+    if shared:
+        model_clients.prewarm_connections(concurrency)
+    latencies = []
+
+    def call(get_chain, inputs: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        get_chain().invoke(inputs)
+        latencies.append(time.perf_counter() - start)
+
+    # Like the graph's stages, each round sends every in-flight email through one chain
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for round in range(rounds):
+            get_chain, inputs = CALLS[round % len(CALLS)]
+            list(executor.map(lambda _: call(get_chain, inputs), range(concurrency)))
+    return {
+        "connections": server.connections,
+        "requests": server.requests,
+        "mean_s": sum(latencies) / len(latencies),
+        "first_round_mean_s": sum(latencies[:concurrency]) / concurrency,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="Model calls in flight")
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--handshake", type=float, default=0.1, help="Seconds to open a connection")
+    parser.add_argument("--response", type=float, default=0.05, help="Seconds to answer a request")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    server = StandInServer(args.handshake, args.response)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stand-in")
+    set_cache_backend(NullCache())
+    prime_openai_response_model()
+
+    print(
+        f"{args.rounds} rounds of {args.concurrency} concurrent calls, cycling through {len(CALLS)} chains, "
+        f"handshake={args.handshake}s response={args.response}s"
+    )
+    for label, shared in (("per-chain clients ", False), ("shared + prewarmed", True)):
+        stats = run(server, shared, args.concurrency, args.rounds)
+        print(
+            f"{label}: {stats['connections']:3d} connections for {stats['requests']:3d} requests, "
+            f"mean {stats['mean_s'] * 1000:6.1f}ms/call, first round {stats['first_round_mean_s'] * 1000:6.1f}ms/call"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Time to the escalation decision for notices whose fine alone requires
+escalation: the blocking parse (check_escalation_status after the whole
+extract and the text check) versus streaming extraction
+(state["stream_extraction"]), which escalates as soon as the fine settles.
+
+Two notices: the OSHA example, whose fine the regexes find, and a variant
+phrased so that only the model finds it. The parser's model is faked with
+field-by-field streaming over --latency; the text check (also --latency)
+says no, so only the fine decides.
+
+Run from the project root:
+    python benchmarks/streaming_extraction.py --latency 1.0 --runs 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import (
+        FakeStructuredChain,
+        Latency,
+        install_fake_notice_chains,
+        install_fake_notice_parser_model,
+        install_temp_outbox,
+    )
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import (
+        FakeStructuredChain,
+        Latency,
+        install_fake_notice_chains,
+        install_fake_notice_parser_model,
+        install_temp_outbox,
+    )
+
+from chains import escalation_check
+from chains.escalation_check import EscalationCheck
+from graphs.email_agent import _build_notice_state
+from graphs.example_emails import EMAILS
+from graphs.notice_extraction import get_notice_extraction_graph
+from utils.graph_utils import configure_simulation
+from utils.logging_config import configure_logging
+
+CRITERIA = "Workers explicitly violating safety protocols"
+DOLLAR_CRITERIA = 10_000.0
+
+NOTICES = {
+    "fine found by regex": EMAILS[0],
+    # No fine wording within reach of the amount, so the model is asked for it
+    "fine found by model": EMAILS[0].replace(
+        "Failure to comply may result in fines\n    of up to\n    $25,000 per violation.",
+        "Failure to comply may result in fines\n    at the rate set out in the enforcement schedule attached to this notice.\n"
+        "    For the violations cited at this site that rate is $25,000 per violation.",
+    ),
+}
+
+
+def notice_state(notice: str, streaming: bool) -> dict:
+    state = _build_notice_state(notice, CRITERIA)
+    return {**state, "escalation_dollar_criteria": DOLLAR_CRITERIA, "stream_extraction": streaming}
+
+
+def time_run(graph, state: dict) -> tuple[float, float]:
+    """Seconds to the escalation decision and to the end of the run."""
+    start = time.perf_counter()
+    decided = None
+    for event in graph.stream(state, stream_mode="custom"):
+        if decided is None and "escalation_decision" in event:
+            decided = time.perf_counter() - start
+    return decided, time.perf_counter() - start
+
+
+async def atime_run(graph, state: dict) -> tuple[float, float]:
+    """Async version of time_run."""
+    start = time.perf_counter()
+    decided = None
+    async for event in graph.astream(state, stream_mode="custom"):
+        if decided is None and "escalation_decision" in event:
+            decided = time.perf_counter() - start
+    return decided, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", default="1.0", help="Fake model latency, e.g. 1.0 or uniform:0.5,1.5")
+    parser.add_argument("--delay-scale", type=float, default=0.2, help="Scale for simulated API delays")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per notice and mode")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Drive the graph with astream")
+    args = parser.parse_args()
+
+    configure_logging(level="WARNING")
+    latency = Latency.parse(args.latency, seed=0)
+    install_fake_notice_chains(latency)
+    install_fake_notice_parser_model(latency)
+    escalation_check.ESCALATION_CHECK_CHAIN = FakeStructuredChain(EscalationCheck(needs_escalation=False), latency)
+    install_temp_outbox()
+    configure_simulation(delay_scale=args.delay_scale, seed=0)
+    graph = get_notice_extraction_graph()
+
+    print(f"latency={latency} delay_scale={args.delay_scale} runs={args.runs} "
+          f"dollar criteria=${DOLLAR_CRITERIA:,.0f} ({'astream' if args.use_async else 'stream'})")
+    print(f"{'notice':<22} {'mode':<10} {'decision':>9} {'total':>8}")
+    for name, notice in NOTICES.items():
+        for streaming in (False, True):
+            state = notice_state(notice, streaming)
+            if args.use_async:
+                runs = [asyncio.run(atime_run(graph, state)) for _ in range(args.runs)]
+            else:
+                runs = [time_run(graph, state) for _ in range(args.runs)]
+            decision = statistics.median(r[0] for r in runs)
+            total = statistics.median(r[1] for r in runs)
+            print(f"{name:<22} {'streaming' if streaming else 'blocking':<10} {decision:8.2f}s {total:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Throughput, latency percentiles and peak memory of both graphs over N
+emails at several concurrency levels, fully offline.
+
+Every chain and EMAIL_AGENT_MODEL are swapped for the deterministic fakes in
+benchmarks/fake_llm.py, whose latency is drawn from --latency (see Latency
+for the spec format). The simulated ticket and email APIs in
+utils/graph_utils.py are scaled by --delay-scale. Both are reseeded with
+--seed before every run, so each one sees the same sequence of delays and
+follow-up questions.
+
+Run from the project root:
+    python benchmarks/suite.py --emails 200 --concurrency 1 8 32 --latency lognormal:0.3,0.5 --delay-scale 0.1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+# Use try-except for robust imports relative to project structure
+try:
+    from benchmarks.fake_llm import Latency, install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from benchmarks.fake_llm import Latency, install_fake_agent_model, install_fake_notice_chains, install_temp_outbox
+
+from langchain_core.messages import HumanMessage
+
+from graphs.email_agent import _build_notice_state, build_agent_input, get_email_agent_graph
+from graphs.example_emails import EMAILS
+from graphs.notice_extraction import get_notice_extraction_graph
+from utils.graph_utils import configure_simulation
+
+CRITERIA = "Workers explicitly violating safety protocols"
+
+
+def graph_inputs(graph_name: str, count: int, fast_path: bool) -> tuple[Any, List[Any], Dict[str, Any]]:
+    """The compiled graph, `count` inputs cycling through the example emails,
+    and the run config."""
+    emails = [EMAILS[i % len(EMAILS)] for i in range(count)]
+    if graph_name == "notice_extraction":
+        return get_notice_extraction_graph(), [_build_notice_state(e, CRITERIA) for e in emails], {}
+    return (
+        get_email_agent_graph(),
+        [{"messages": [HumanMessage(content=build_agent_input(e, CRITERIA))]} for e in emails],
+        {"recursion_limit": 10, "configurable": {"fast_path": fast_path}},
+    )
+
+
+async def run_level(graph, inputs: List[Any], config: Dict[str, Any], concurrency: int) -> Dict[str, Any]:
+    """Run every input with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def run_one(input: Any) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await graph.ainvoke(input, config)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(input) for input in inputs))
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "emails": len(inputs),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(inputs) / elapsed if elapsed else 0.0,
+        "p50_s": percentiles[49],
+        "p95_s": percentiles[94],
+        "p99_s": percentiles[98],
+    }
+
+
+def run_benchmark(graph_name: str, concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    latency = Latency.parse(args.latency, seed=args.seed)
+    install_fake_notice_chains(latency)
+    install_fake_agent_model(latency)
+    configure_simulation(delay_scale=args.delay_scale, seed=args.seed)
+    graph, inputs, config = graph_inputs(graph_name, args.emails, not args.no_fast_path)
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    stats = asyncio.run(run_level(graph, inputs, config, concurrency))
+    if tracemalloc.is_tracing():
+        stats["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    return {"graph": graph_name, "concurrency": concurrency, **stats}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200, help="Emails per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Emails in flight")
+    parser.add_argument("--graphs", nargs="+", choices=["notice_extraction", "email_agent"],
+                        default=["notice_extraction", "email_agent"])
+    parser.add_argument("--latency", default="lognormal:0.3,0.5", help="Fake model latency, e.g. 0.3 or uniform:0.1,0.5")
+    parser.add_argument("--delay-scale", type=float, default=0.1, help="Scale for simulated API delays")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every email through the agent model")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc, which slows CPU-bound runs")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("LangGraphApp").setLevel(logging.WARNING)
+    install_temp_outbox()
+    if not args.no_memory:
+        tracemalloc.start()
+
+    print(
+        f"emails={args.emails} latency={Latency.parse(args.latency)} "
+        f"delay_scale={args.delay_scale} seed={args.seed} fast_path={not args.no_fast_path}"
+    )
+    print(f"{'graph':<18} {'conc':>4} {'emails/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'peak MB':>8} {'errors':>6}")
+    results = []
+    for graph_name in args.graphs:
+        for concurrency in args.concurrency:
+            r = run_benchmark(graph_name, concurrency, args)
+            results.append(r)
+            peak = f"{r['peak_memory_mb']:8.1f}" if "peak_memory_mb" in r else f"{'-':>8}"
+            print(
+                f"{graph_name:<18} {concurrency:>4} {r['throughput_per_s']:9.2f} "
+                f"{r['p50_s'] * 1000:6.0f}ms {r['p95_s'] * 1000:6.0f}ms {r['p99_s'] * 1000:6.0f}ms "
+                f"{peak} {r['errors']:>6}"
+            )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,22 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
-# Load environment variables (ensure .env file is present)
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.model_clients import get_chat_model
+    from utils.llm_cache import CachedChain, chain_settings
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.model_clients import get_chat_model
+    from utils.llm_cache import CachedChain, chain_settings
+
 
 class BinaryAnswer(BaseModel):
     is_true: bool = Field(
@@ -32,13 +42,85 @@ binary_question_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-binary_question_model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# The model client and chains are built on first use (see utils/lazy.py), so
+# importing this module stays cheap for short-lived processes.
+
+def _build_binary_question_model():
+    return get_chat_model("binary_question")
+
+def get_binary_question_model():
+    return lazy_global(globals(), "binary_question_model", _build_binary_question_model)
+
+def _build_binary_question_chain() -> CachedChain:
+    model = get_binary_question_model()
+    # Responses are cached (see utils/llm_cache.py) so resent notices skip the model
+    return CachedChain(
+        binary_question_prompt | model.with_structured_output(BinaryAnswer),
+        output_model=BinaryAnswer,
+        name="binary_question",
+        settings=chain_settings(binary_question_prompt, model),
+    )
 
-BINARY_QUESTION_CHAIN = (
-    binary_question_prompt
-    | binary_question_model.with_structured_output(BinaryAnswer)
+def get_binary_question_chain() -> CachedChain:
+    return lazy_global(globals(), "BINARY_QUESTION_CHAIN", _build_binary_question_chain)
+
+class QuestionAnswer(BaseModel):
+    question_id: int = Field(
+        description="""The number of the question being answered."""
+    )
+    is_true: bool = Field(
+        description="""Whether the answer to the question is yes or no.
+        True if yes otherwise False."""
+    )
+
+class BatchBinaryAnswers(BaseModel):
+    answers: list[QuestionAnswer] = Field(
+        description="""One answer for every numbered question."""
+    )
+
+batch_binary_question_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """
+            Answer each numbered question based on the provided context as
+            True for "yes" and False for "no". No other answers are allowed.
+            Return one answer per question, identified by its number.
+
+            Context:
+            {context}
+
+            Questions:
+            {questions}
+            """,
+        )
+    ]
 )
 
+def _build_batch_binary_question_chain() -> CachedChain:
+    model = get_binary_question_model()
+    # Answers several yes/no questions over the same context in a single call
+    return CachedChain(
+        batch_binary_question_prompt | model.with_structured_output(BatchBinaryAnswers),
+        output_model=BatchBinaryAnswers,
+        name="batch_binary_question",
+        settings=chain_settings(batch_binary_question_prompt, model),
+    )
+
+def get_batch_binary_question_chain() -> CachedChain:
+    return lazy_global(globals(), "BATCH_BINARY_QUESTION_CHAIN", _build_batch_binary_question_chain)
+
+# The chains and binary_question_model stay importable by name
+__getattr__ = lazy_module_getattr(__name__, {
+    "BINARY_QUESTION_CHAIN": get_binary_question_chain,
+    "BATCH_BINARY_QUESTION_CHAIN": get_batch_binary_question_chain,
+    "binary_question_model": get_binary_question_model,
+})
+
+def format_numbered_questions(questions: list[str]) -> str:
+    """Format questions for BATCH_BINARY_QUESTION_CHAIN, numbered from 1."""
+    return "\n".join(f"{i}. {question}" for i, question in enumerate(questions, 1))
+
 # Example usage for testing
 if __name__ == "__main__":
     print("Testing BINARY_QUESTION_CHAIN...")
@@ -55,20 +137,28 @@ if __name__ == "__main__":
     question_hvac = "Did this notice involve an issue with FakeAirCo's HVAC system?"
     question_compliance = "Is the compliance deadline November 10, 2024?"
 
-    result_texas = BINARY_QUESTION_CHAIN.invoke({
+    result_texas = get_binary_question_chain().invoke({
         "question": question_texas,
         "context": context_0
         })
     print(f"Q: '{question_texas}' -> A: {result_texas.is_true}")
 
-    result_hvac = BINARY_QUESTION_CHAIN.invoke({
+    result_hvac = get_binary_question_chain().invoke({
         "question": question_hvac,
         "context": context_0
         })
     print(f"Q: '{question_hvac}' -> A: {result_hvac.is_true}")
 
-    result_compliance = BINARY_QUESTION_CHAIN.invoke({
+    result_compliance = get_binary_question_chain().invoke({
         "question": question_compliance,
         "context": context_0
         })
-    print(f"Q: '{question_compliance}' -> A: {result_compliance.is_true}") 
\ No newline at end of file
+    print(f"Q: '{question_compliance}' -> A: {result_compliance.is_true}")
+
+    questions = [question_texas, question_hvac, question_compliance]
+    result_batch = get_batch_binary_question_chain().invoke({
+        "questions": format_numbered_questions(questions),
+        "context": context_0
+        })
+    for answer in result_batch.answers:
+        print(f"Batch Q{answer.question_id}: '{questions[answer.question_id - 1]}' -> A: {answer.is_true}") 
\ No newline at end of file
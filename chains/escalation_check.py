@@ -1,12 +1,22 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
-# Load environment variables (ensure .env file is present)
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.model_clients import get_chat_model
+    from utils.llm_cache import CachedChain, chain_settings
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.model_clients import get_chat_model
+    from utils.llm_cache import CachedChain, chain_settings
+
 
 class EscalationCheck(BaseModel):
     needs_escalation: bool = Field(
@@ -31,12 +41,33 @@ escalation_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-escalation_check_model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# The model client and chain are built on first use (see utils/lazy.py), so
+# importing this module stays cheap for short-lived processes.
 
-ESCALATION_CHECK_CHAIN = (
-    escalation_prompt
-    | escalation_check_model.with_structured_output(EscalationCheck)
-)
+def _build_escalation_check_model():
+    return get_chat_model("escalation_check")
+
+def get_escalation_check_model():
+    return lazy_global(globals(), "escalation_check_model", _build_escalation_check_model)
+
+def _build_escalation_check_chain() -> CachedChain:
+    model = get_escalation_check_model()
+    # Responses are cached (see utils/llm_cache.py) so resent notices skip the model
+    return CachedChain(
+        escalation_prompt | model.with_structured_output(EscalationCheck),
+        output_model=EscalationCheck,
+        name="escalation_check",
+        settings=chain_settings(escalation_prompt, model),
+    )
+
+def get_escalation_check_chain() -> CachedChain:
+    return lazy_global(globals(), "ESCALATION_CHECK_CHAIN", _build_escalation_check_chain)
+
+# ESCALATION_CHECK_CHAIN and escalation_check_model stay importable by name
+__getattr__ = lazy_module_getattr(__name__, {
+    "ESCALATION_CHECK_CHAIN": get_escalation_check_chain,
+    "escalation_check_model": get_escalation_check_model,
+})
 
 
 # Example usage for testing
@@ -47,12 +78,12 @@ if __name__ == "__main__":
     message_water = "Several cracks in the foundation have been identified along with water leaks"
     message_no_water = "The wheel chair ramps are too steep"
 
-    result_water = ESCALATION_CHECK_CHAIN.invoke(
+    result_water = get_escalation_check_chain().invoke(
         {"message": message_water, "escalation_criteria": escalation_criteria_water}
     )
     print(f"Message: '{message_water}' -> Escalates (water): {result_water.needs_escalation}")
 
-    result_no_water = ESCALATION_CHECK_CHAIN.invoke(
+    result_no_water = get_escalation_check_chain().invoke(
         {"message": message_no_water, "escalation_criteria": escalation_criteria_water}
     )
     print(f"Message: '{message_no_water}' -> Escalates (water): {result_no_water.needs_escalation}")
@@ -65,7 +96,7 @@ if __name__ == "__main__":
         exit()
 
     escalation_criteria_safety = "Workers explicitly violating safety protocols"
-    result_safety = ESCALATION_CHECK_CHAIN.invoke(
+    result_safety = get_escalation_check_chain().invoke(
         {"message": EMAILS[0], "escalation_criteria": escalation_criteria_safety}
     )
     print(f"Message: EMAILS[0] -> Escalates (safety): {result_safety.needs_escalation}") 
\ No newline at end of file
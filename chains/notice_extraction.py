@@ -1,16 +1,31 @@
 from datetime import datetime, date
+from functools import lru_cache
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from pydantic import BaseModel, Field, computed_field, EmailStr # Added EmailStr
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel, Field, ValidationError, computed_field, create_model, EmailStr # Added EmailStr
 
-# Load environment variables (ensure .env file is present)
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
-# Optional: Check if the key is loaded
-# if not os.getenv("OPENAI_API_KEY"):
-#     print("Warning: OPENAI_API_KEY not found in .env file.")
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.model_clients import get_chat_model
+    from utils.llm_cache import CachedChain, chain_settings
+    from utils.logging_config import LOGGER
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.model_clients import get_chat_model
+    from utils.llm_cache import CachedChain, chain_settings
+    from utils.logging_config import LOGGER
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+
 
 class NoticeEmailExtract(BaseModel):
     date_of_notice_str: str | None = Field(
@@ -111,13 +126,475 @@ info_parse_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-notice_parser_model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# The model client and chains are built on first use (see utils/lazy.py), so
+# importing this module stays cheap for short-lived processes.
+
+def _build_notice_parser_model():
+    return get_chat_model("notice_parser")
+
+def get_notice_parser_model():
+    return lazy_global(globals(), "notice_parser_model", _build_notice_parser_model)
+
+def _build_notice_parser_chain() -> CachedChain:
+    model = get_notice_parser_model()
+    # Responses are cached (see utils/llm_cache.py) so resent notices skip the model
+    return CachedChain(
+        info_parse_prompt | model.with_structured_output(NoticeEmailExtract),
+        output_model=NoticeEmailExtract,
+        name="notice_parser",
+        settings=chain_settings(info_parse_prompt, model),
+    )
+
+def get_notice_parser_chain() -> CachedChain:
+    return lazy_global(globals(), "NOTICE_PARSER_CHAIN", _build_notice_parser_chain)
+
+
+partial_parse_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """
+            Parse only the following fields from the message:
+
+            {fields}
+
+            If any of the fields aren't present, don't populate them. Try to
+            cast dates into the YYYY-mm-dd format. Don't populate fields if
+            they're not present in the message.
+
+            Here's the notice message:
 
-NOTICE_PARSER_CHAIN = (
-    info_parse_prompt
-    | notice_parser_model.with_structured_output(NoticeEmailExtract)
+            {message}
+            """,
+        )
+    ]
 )
 
+def _describe_fields(fields: Iterable[str]) -> str:
+    """One line per field with its schema description, for partial_parse_prompt."""
+    return "\n".join(
+        f"- {name}: {' '.join(NoticeEmailExtract.model_fields[name].description.split())}"
+        for name in fields
+    )
+
+@lru_cache(maxsize=None)
+def partial_notice_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    """Output schema with only the given fields of NoticeEmailExtract, in the
+    given order (the order the model generates them in)."""
+    return create_model(
+        "NoticeEmailExtractFields",
+        **{name: (NoticeEmailExtract.model_fields[name].annotation, NoticeEmailExtract.model_fields[name]) for name in fields},
+    )
+
+@lru_cache(maxsize=None)
+def partial_notice_parser_chain(fields: tuple[str, ...]) -> CachedChain:
+    """A notice parser chain whose output schema only has the given fields of
+    NoticeEmailExtract, so the model is asked for less."""
+    partial_model = partial_notice_model(fields)
+    model = get_notice_parser_model()
+    return CachedChain(
+        partial_parse_prompt | model.with_structured_output(partial_model),
+        output_model=partial_model,
+        name=f"notice_parser[{','.join(fields)}]",
+        settings=chain_settings(partial_parse_prompt, model),
+    )
+
+
+# Fields the escalation decision needs; when streaming, the model is asked
+# for them first so they settle before the free-text fields
+STREAM_FIRST_FIELDS = ("max_potential_fine",)
+
+
+class _SettledFields:
+    """Tracks the fields of streamed partial outputs. A field's value is
+    settled once a later field has started (a number or string still
+    streaming is a prefix of its final value), or when the stream ends."""
+
+    def __init__(self):
+        self.order: list[str] = []
+        self.values: dict[str, Any] = {}
+
+    def update(self, partial: BaseModel) -> dict[str, Any]:
+        # Schema order, which is the order the model streams them in
+        for name in (name for name in type(partial).model_fields if name in partial.model_fields_set):
+            if name not in self.values:
+                self.order.append(name)
+            self.values[name] = getattr(partial, name)
+        return {name: self.values[name] for name in self.order[:-1]}
+
+
+class PreExtractingNoticeParser(Runnable):
+    """Drop-in for NOTICE_PARSER_CHAIN that fills the machine-parseable fields
+    (phone, email, project id, dates, fine) with regexes first.
+
+    The model is only asked for the fields that are still missing, through a
+    smaller schema; it is always called, since the free-text fields (entity
+    name, site, violation, required changes) are left to it. If the combined
+    values fail validation, it falls back to the full NOTICE_PARSER_CHAIN.
+
+    stream()/astream() yield partially filled extracts as fields settle: the
+    pre-extracted fields right away, then the model's fields as its
+    structured output streams in (STREAM_FIRST_FIELDS first), and last the
+    same result invoke() returns.
+    """
+
+    def _plan(self, message: str) -> tuple[dict[str, Any], tuple[str, ...]]:
+        pre_extracted = pre_extract_notice_fields(message)
+        missing = tuple(name for name in NoticeEmailExtract.model_fields if name not in pre_extracted)
+        return pre_extracted, missing
+
+    @staticmethod
+    def _merge(pre_extracted: dict[str, Any], partial: Optional[BaseModel]) -> NoticeEmailExtract:
+        values = dict(pre_extracted)
+        if partial is not None:
+            values.update({name: getattr(partial, name) for name in type(partial).model_fields})
+        return NoticeEmailExtract.model_validate(values)
+
+    def invoke(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs: Any) -> NoticeEmailExtract:
+        pre_extracted, missing = self._plan(input["message"])
+        partial = partial_notice_parser_chain(missing).invoke(
+            {"message": input["message"], "fields": _describe_fields(missing)}, config
+        )
+        try:
+            return self._merge(pre_extracted, partial)
+        except ValidationError:
+            return get_notice_parser_chain().invoke(input, config)
+
+    async def ainvoke(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs: Any) -> NoticeEmailExtract:
+        pre_extracted, missing = self._plan(input["message"])
+        partial = await partial_notice_parser_chain(missing).ainvoke(
+            {"message": input["message"], "fields": _describe_fields(missing)}, config
+        )
+        try:
+            return self._merge(pre_extracted, partial)
+        except ValidationError:
+            return await get_notice_parser_chain().ainvoke(input, config)
+
+
+    def _stream_plan(self, message: str) -> tuple[dict[str, Any], tuple[str, ...]]:
+        pre_extracted, missing = self._plan(message)
+        first = tuple(name for name in STREAM_FIRST_FIELDS if name in missing)
+        return pre_extracted, first + tuple(name for name in missing if name not in first)
+
+    @staticmethod
+    def _partial_extract(pre_extracted: dict[str, Any], settled: dict[str, Any]) -> Optional[NoticeEmailExtract]:
+        try:
+            return NoticeEmailExtract.model_validate({**pre_extracted, **settled})
+        except ValidationError:
+            return None
+
+    def stream(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[NoticeEmailExtract]:
+        pre_extracted, missing = self._stream_plan(input["message"])
+        first = self._partial_extract(pre_extracted, {})
+        if first is not None:
+            yield first
+        partial = None
+        fields, yielded = _SettledFields(), 0
+        for partial in partial_notice_parser_chain(missing).stream(
+            {"message": input["message"], "fields": _describe_fields(missing)}, config
+        ):
+            settled = fields.update(partial)
+            if len(settled) > yielded:
+                extract = self._partial_extract(pre_extracted, settled)
+                if extract is not None:
+                    yielded = len(settled)
+                    yield extract
+        try:
+            yield self._merge(pre_extracted, partial)
+        except ValidationError:
+            yield get_notice_parser_chain().invoke(input, config)
+
+    async def astream(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[NoticeEmailExtract]:
+        pre_extracted, missing = self._stream_plan(input["message"])
+        first = self._partial_extract(pre_extracted, {})
+        if first is not None:
+            yield first
+        partial = None
+        fields, yielded = _SettledFields(), 0
+        async for partial in partial_notice_parser_chain(missing).astream(
+            {"message": input["message"], "fields": _describe_fields(missing)}, config
+        ):
+            settled = fields.update(partial)
+            if len(settled) > yielded:
+                extract = self._partial_extract(pre_extracted, settled)
+                if extract is not None:
+                    yielded = len(settled)
+                    yield extract
+        try:
+            yield self._merge(pre_extracted, partial)
+        except ValidationError:
+            yield await get_notice_parser_chain().ainvoke(input, config)
+
+
+def get_pre_extracting_notice_parser() -> PreExtractingNoticeParser:
+    """The parser used by NOTICE_EXTRACTION_GRAPH: regexes for structured fields,
+    the model for free text."""
+    return lazy_global(globals(), "PRE_EXTRACTING_NOTICE_PARSER", PreExtractingNoticeParser)
+
+# --- Batch extraction (backfills) ---
+# Packing several notices into one request pays the per-request overhead and
+# the instructions once per batch instead of once per notice. Batches are
+# sized by an estimated token budget. The batch schema accepts any string for
+# every field, so one malformed value doesn't fail the whole batch; each extract
+# is then validated as a NoticeEmailExtract on its own, and notices whose
+# extract is invalid, missing, or disagrees with the notice's own text on the
+# sender's email or fine are parsed one at a time by NOTICE_PARSER_CHAIN.
+
+# Rough token estimate (no tokenizer download needed); budgets are approximate
+CHARS_PER_TOKEN = 4
+# Prompt tokens per batch, including the expected output
+BATCH_MAX_TOKENS = 12_000
+BATCH_MAX_NOTICES = 10
+# Expected output tokens per extract
+EXTRACT_TOKENS = 200
+# Regex-extractable fields a batch extract must agree on with its notice
+_CROSS_CHECKED_FIELDS = ("entity_email", "max_potential_fine")
+
+NoticeBatchItem = create_model(
+    "NoticeBatchItem",
+    notice_id=(int, Field(description="""The number of the notice this extract is for""")),
+    **{name: (Union[field.annotation, str], field) for name, field in NoticeEmailExtract.model_fields.items()},
+)
+
+class NoticeExtractBatch(BaseModel):
+    extracts: list[NoticeBatchItem] = Field(
+        description="""One extract for every numbered notice."""
+    )
+
+batch_parse_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """
+            Parse the date of notice, sending entity name, sending entity
+            phone, sending entity email, project id, site location,
+            violation type, required changes, compliance deadline, and
+            maximum potential fine from each of the numbered notice messages
+            below. If any of the fields aren't present, don't populate them.
+            Try to cast dates into the YYYY-mm-dd format. Don't populate
+            fields if they're not present in the message. Return one extract
+            per notice, identified by its number. Never mix up fields from
+            different notices.
+
+            Here are the notice messages:
+
+            {notices}
+            """,
+        )
+    ]
+)
+
+def _build_batch_notice_parser_chain() -> CachedChain:
+    model = get_notice_parser_model()
+    return CachedChain(
+        batch_parse_prompt | model.with_structured_output(NoticeExtractBatch),
+        output_model=NoticeExtractBatch,
+        name="batch_notice_parser",
+        settings=chain_settings(batch_parse_prompt, model),
+    )
+
+def get_batch_notice_parser_chain() -> CachedChain:
+    return lazy_global(globals(), "BATCH_NOTICE_PARSER_CHAIN", _build_batch_notice_parser_chain)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def format_numbered_notices(messages: List[str]) -> str:
+    """Format notices for BATCH_NOTICE_PARSER_CHAIN, numbered from 1."""
+    return "\n\n".join(f'<notice number="{i}">\n{message}\n</notice>' for i, message in enumerate(messages, 1))
+
+def plan_notice_batches(
+    notices: Iterable[Tuple[str, str]],
+    max_tokens: int = BATCH_MAX_TOKENS,
+    max_notices: int = BATCH_MAX_NOTICES,
+) -> Iterator[List[Tuple[str, str]]]:
+    """Group (id, message) pairs, in order, into batches whose estimated
+    prompt and output tokens stay within `max_tokens`. A notice too long
+    to share a request gets a batch of its own."""
+    overhead = estimate_tokens(batch_parse_prompt.messages[0].prompt.template)
+    batch: List[Tuple[str, str]] = []
+    tokens = overhead
+    for notice_id, message in notices:
+        cost = estimate_tokens(message) + EXTRACT_TOKENS
+        if batch and (tokens + cost > max_tokens or len(batch) >= max_notices):
+            yield batch
+            batch, tokens = [], overhead
+        batch.append((notice_id, message))
+        tokens += cost
+    if batch:
+        yield batch
+
+
+class BatchNoticeParser:
+    """Parses many notices with few model requests, for backfills.
+
+    invoke()/ainvoke() take (id, message) pairs and return the extracts by
+    id (None where even the single-notice call failed). Counts of batch
+    requests and single-notice fallbacks are kept on the instance.
+    """
+
+    def __init__(self, max_tokens: int = BATCH_MAX_TOKENS, max_notices: int = BATCH_MAX_NOTICES):
+        self.max_tokens = max_tokens
+        self.max_notices = max_notices
+        self.batch_calls = 0
+        self.single_calls = 0
+
+    @staticmethod
+    def _collect(batch: List[Tuple[str, str]], result: Optional[NoticeExtractBatch]) -> Dict[str, NoticeEmailExtract]:
+        """Map the batch's valid extracts back onto the notice ids."""
+        extracts: Dict[str, NoticeEmailExtract] = {}
+        for item in result.extracts if result is not None else []:
+            if not 1 <= item.notice_id <= len(batch):
+                continue
+            notice_id = batch[item.notice_id - 1][0]
+            if notice_id in extracts:
+                continue
+            try:
+                extract = NoticeEmailExtract.model_validate(
+                    {name: getattr(item, name) for name in NoticeEmailExtract.model_fields}
+                )
+            except ValidationError as e:
+                LOGGER.warning("Batch extract for notice %s is invalid, parsing it on its own: %s", notice_id, e)
+                continue
+            if BatchNoticeParser._matches_notice(extract, batch[item.notice_id - 1][1]):
+                extracts[notice_id] = extract
+            else:
+                LOGGER.warning("Batch extract for notice %s does not match its text, parsing it on its own", notice_id)
+        return extracts
+
+    @staticmethod
+    def _matches_notice(extract: NoticeEmailExtract, message: str) -> bool:
+        """Cross-check an extract against its notice's regex fields, to catch
+        one notice's values filed under another's number."""
+        if extract.entity_email and extract.entity_email.lower() not in message.lower():
+            return False
+        pre_extracted = pre_extract_notice_fields(message)
+        for name in _CROSS_CHECKED_FIELDS:
+            if name not in pre_extracted:
+                continue
+            expected, actual = pre_extracted[name], getattr(extract, name)
+            if isinstance(expected, str) and isinstance(actual, str):
+                expected, actual = expected.lower(), actual.lower()
+            if expected != actual:
+                return False
+        return True
+
+    def _batch_input(self, batch: List[Tuple[str, str]]) -> Dict[str, str]:
+        self.batch_calls += 1
+        return {"notices": format_numbered_notices([message for _, message in batch])}
+
+    def _parse_one(self, message: str, config: Optional[RunnableConfig]) -> Optional[NoticeEmailExtract]:
+        self.single_calls += 1
+        try:
+            return get_notice_parser_chain().invoke({"message": message}, config)
+        except Exception as e:
+            LOGGER.error(f"Error parsing notice: {e}", exc_info=True)
+            return None
+
+    async def _aparse_one(self, message: str, config: Optional[RunnableConfig]) -> Optional[NoticeEmailExtract]:
+        self.single_calls += 1
+        try:
+            return await get_notice_parser_chain().ainvoke({"message": message}, config)
+        except Exception as e:
+            LOGGER.error(f"Error parsing notice: {e}", exc_info=True)
+            return None
+
+    def parse_batch(
+        self, batch: List[Tuple[str, str]], config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Optional[NoticeEmailExtract]]:
+        """Parse one batch from batches(): a single request, then one call per
+        notice left without a valid extract."""
+        if len(batch) == 1:
+            return {batch[0][0]: self._parse_one(batch[0][1], config)}
+        try:
+            result = get_batch_notice_parser_chain().invoke(self._batch_input(batch), config)
+        except Exception as e:
+            LOGGER.warning("Batch of %d notices failed, parsing them one at a time: %s", len(batch), e)
+            result = None
+        extracts: Dict[str, Optional[NoticeEmailExtract]] = dict(self._collect(batch, result))
+        for notice_id, message in batch:
+            if notice_id not in extracts:
+                extracts[notice_id] = self._parse_one(message, config)
+        return extracts
+
+    async def aparse_batch(
+        self, batch: List[Tuple[str, str]], config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Optional[NoticeEmailExtract]]:
+        """Async version of parse_batch; the fallback calls run concurrently."""
+        if len(batch) == 1:
+            return {batch[0][0]: await self._aparse_one(batch[0][1], config)}
+        try:
+            result = await get_batch_notice_parser_chain().ainvoke(self._batch_input(batch), config)
+        except Exception as e:
+            LOGGER.warning("Batch of %d notices failed, parsing them one at a time: %s", len(batch), e)
+            result = None
+        extracts: Dict[str, Optional[NoticeEmailExtract]] = dict(self._collect(batch, result))
+        missing = [(notice_id, message) for notice_id, message in batch if notice_id not in extracts]
+        singles = await asyncio.gather(*(self._aparse_one(message, config) for _, message in missing))
+        extracts.update((notice_id, extract) for (notice_id, _), extract in zip(missing, singles))
+        return extracts
+
+    def batches(self, notices: Iterable[Tuple[str, str]]) -> Iterator[List[Tuple[str, str]]]:
+        """Lazily group notices into batches (see plan_notice_batches)."""
+        return plan_notice_batches(notices, self.max_tokens, self.max_notices)
+
+    def invoke(self, notices: Iterable[Tuple[str, str]], config: Optional[RunnableConfig] = None) -> Dict[str, Optional[NoticeEmailExtract]]:
+        extracts: Dict[str, Optional[NoticeEmailExtract]] = {}
+        for batch in self.batches(notices):
+            extracts.update(self.parse_batch(batch, config))
+        return extracts
+
+    async def aparse_batches(
+        self,
+        notices: Iterable[Tuple[str, str]],
+        on_batch: Callable[[List[Tuple[str, str]], Dict[str, Optional[NoticeEmailExtract]]], None],
+        config: Optional[RunnableConfig] = None,
+        concurrency: int = 4,
+    ) -> None:
+        """Parse notices with at most `concurrency` batches in flight, calling
+        on_batch(batch, extracts) as each batch finishes.
+
+        Batches are pulled through a bounded queue by a fixed pool of workers,
+        so memory stays constant regardless of input size. If a worker fails,
+        the others and the producer are cancelled and the error is raised.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+        async def produce() -> None:
+            for batch in self.batches(notices):
+                await queue.put(batch)
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def work() -> None:
+            while (batch := await queue.get()) is not None:
+                on_batch(batch, await self.aparse_batch(batch, config))
+
+        tasks = [asyncio.ensure_future(produce()), *(asyncio.ensure_future(work()) for _ in range(concurrency))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def ainvoke(
+        self, notices: Iterable[Tuple[str, str]], config: Optional[RunnableConfig] = None, concurrency: int = 4
+    ) -> Dict[str, Optional[NoticeEmailExtract]]:
+        """Async version of invoke, with up to `concurrency` batches in flight."""
+        extracts: Dict[str, Optional[NoticeEmailExtract]] = {}
+        await self.aparse_batches(notices, lambda _, result: extracts.update(result), config, concurrency)
+        return extracts
+
+
+# The parsers and notice_parser_model stay importable by name
+__getattr__ = lazy_module_getattr(__name__, {
+    "NOTICE_PARSER_CHAIN": get_notice_parser_chain,
+    "BATCH_NOTICE_PARSER_CHAIN": get_batch_notice_parser_chain,
+    "PRE_EXTRACTING_NOTICE_PARSER": get_pre_extracting_notice_parser,
+    "notice_parser_model": get_notice_parser_model,
+})
+
 
 # Example usage for testing
 if __name__ == "__main__":
@@ -129,8 +606,11 @@ if __name__ == "__main__":
         exit()
 
     print("Testing NOTICE_PARSER_CHAIN on EMAILS[0]...")
-    result = NOTICE_PARSER_CHAIN.invoke({"message": EMAILS[0]})
+    result = get_notice_parser_chain().invoke({"message": EMAILS[0]})
     print(result)
     print("\nTesting NOTICE_PARSER_CHAIN on EMAILS[3]...")
-    result_3 = NOTICE_PARSER_CHAIN.invoke({"message": EMAILS[3]})
-    print(result_3) 
\ No newline at end of file
+    result_3 = get_notice_parser_chain().invoke({"message": EMAILS[3]})
+    print(result_3)
+    print("\nTesting PRE_EXTRACTING_NOTICE_PARSER on EMAILS[0]...")
+    result_pre = get_pre_extracting_notice_parser().invoke({"message": EMAILS[0]})
+    print(result_pre) 
\ No newline at end of file
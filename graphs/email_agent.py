@@ -1,21 +1,45 @@
-import time
-import json # For printing extracted data nicely
-from typing import Annotated, TypedDict, List, Optional # Import List and Optional
+from typing import Annotated, Any, Dict, TypedDict, List, Optional, Tuple # Import List and Optional
 import operator # For MessagesState if using the custom approach
+import textwrap
 
-from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage # Added ToolMessage
-from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage # Added ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import StructuredTool, tool
 from langgraph.graph import END, StateGraph # Removed START as set_entry_point is used
+from langgraph.checkpoint.base import BaseCheckpointSaver
 # Use the prebuilt MessagesState for simplicity
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
 
 # Use try-except for robust imports relative to project structure
 try:
     # Note: Adjusted import path assuming email_agent.py is in the same 'graphs' dir
-    from .notice_extraction import NOTICE_EXTRACTION_GRAPH, GraphState as NoticeGraphState # Import the graph and its state
-    from utils.logging_config import LOGGER
+    from .notice_extraction import get_notice_extraction_graph, GraphState as NoticeGraphState # Import the graph accessor and its state
+    from chains.notice_extraction import NoticeEmailExtract
+    from utils.context_compaction import (
+        STALE_TOOL_OUTPUT_MAX_CHARS,
+        TOOL_OUTPUT_MAX_CHARS,
+        compact_json,
+        compact_messages,
+        message_chars,
+    )
+    from utils.email_classifier import (
+        CUSTOMER_SUPPORT,
+        INVOICE,
+        REGULATORY_NOTICE,
+        EmailClassification,
+        classify_email,
+    )
+    from utils.blob_store import add_messages_by_reference, load_text, resolve_messages, store_text
+    from utils.checkpointing import arun_checkpointed, get_checkpointer, message_id, run_checkpointed
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.llm_cache import construct_model, dump_model
+    from utils.metrics import instrument_graph
+    from utils.model_clients import get_chat_model
+    from utils.near_duplicates import NearDuplicate, body_digest, find_near_duplicate, index_email
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+    from utils.logging_config import LOGGER, ROUTING_LOGGER, lazy
+    from utils.outbox import enqueue_email, tool_send_id
+    from utils.tool_execution import make_parallel_tool_node, tool_cancelled
 except ImportError:
     print("Attempting import relative to project root for graphs/email_agent.py...")
     import sys
@@ -23,75 +47,260 @@ except ImportError:
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
-    # Import graph and its state type alias for clarity
-    from graphs.notice_extraction import NOTICE_EXTRACTION_GRAPH
+    # Import graph accessor and its state type alias for clarity
+    from graphs.notice_extraction import get_notice_extraction_graph
     from graphs.notice_extraction import GraphState as NoticeGraphState
-    from utils.logging_config import LOGGER
+    from chains.notice_extraction import NoticeEmailExtract
+    from utils.context_compaction import (
+        STALE_TOOL_OUTPUT_MAX_CHARS,
+        TOOL_OUTPUT_MAX_CHARS,
+        compact_json,
+        compact_messages,
+        message_chars,
+    )
+    from utils.email_classifier import (
+        CUSTOMER_SUPPORT,
+        INVOICE,
+        REGULATORY_NOTICE,
+        EmailClassification,
+        classify_email,
+    )
+    from utils.blob_store import add_messages_by_reference, load_text, resolve_messages, store_text
+    from utils.checkpointing import arun_checkpointed, get_checkpointer, message_id, run_checkpointed
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.llm_cache import construct_model, dump_model
+    from utils.metrics import instrument_graph
+    from utils.model_clients import get_chat_model
+    from utils.near_duplicates import NearDuplicate, body_digest, find_near_duplicate, index_email
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+    from utils.logging_config import LOGGER, ROUTING_LOGGER, lazy
+    from utils.outbox import enqueue_email, tool_send_id
+    from utils.tool_execution import make_parallel_tool_node, tool_cancelled
 
 
-# Load environment variables (ensure .env is present)
-from dotenv import load_dotenv
-load_dotenv()
-
 # --- Agent State ---
-# Using the prebuilt MessagesState is often simpler
-# class AgentState(TypedDict):
-#    messages: Annotated[list[BaseMessage], add_messages]
-
-# Using MessagesState prebuilt class
-from langgraph.graph import MessagesState
+# MessagesState, except that with a blob store configured (BLOB_STORE, see
+# utils/blob_store.py) the email text in new messages is stored by reference
+class AgentState(TypedDict):
+    messages: Annotated[list[BaseMessage], add_messages_by_reference]
 
 # --- Tools ---
 
-@tool
-def forward_email(email_message: str, send_to_email: str) -> str:
+# Routing addresses, shared by determine_email_action's guidelines and the fast path
+BILLING_ADDRESS = "billing@company.com"
+SUPPORT_ADDRESS = "support@company.com"
+SUPPORT_FORWARD_ADDRESSES = "support@company.com, cdetuma@company.com, ctu@abc.com"
+
+# forward_email and send_wrong_email_notification_to_sender only queue their
+# sends in the durable outbox (utils/outbox.py) and return right away; the
+# outbox's worker pool delivers them in the background, so delivery time is
+# not part of the agent's turn. A send is keyed on the graph task and the
+# model's tool call id, so a tool step replayed on resume is delivered once
+# while separate calls with the same content are all sent. extract_notice_data is built with both a sync
+# and an async implementation, so the tool node runs it without blocking the event
+# loop when the agent graph is driven with ainvoke.
+
+def _parse_recipients(send_to_email: str) -> List[str]:
+    """Split a comma-separated address string into recipients."""
+    return [email.strip() for email in send_to_email.split(',') if email.strip()]
+
+def _forward_email(email_message: str, send_to_email: str, config: RunnableConfig) -> str:
     """
     Forward an email_message to the address or comma-separated addresses of send_to_email.
     Returns a success or error message.
     Note: This tool only forwards the email to internal departments - it does not reply to the sender.
     """
-    LOGGER.info(f"--- TOOL: Forwarding Email ---")
-    LOGGER.info(f"Attempting to forward to: {send_to_email}")
+    LOGGER.info("--- TOOL: Forwarding Email ---")
+    LOGGER.info("Attempting to forward to: %s", send_to_email)
     # Simulate potential multiple recipients if comma-separated
-    recipients = [email.strip() for email in send_to_email.split(',') if email.strip()]
+    recipients = _parse_recipients(send_to_email)
     if not recipients:
         LOGGER.warning("No valid recipient email provided.")
         return "Error: No valid recipient email provided."
     try:
+        # Resolved before queueing: the outbox must outlive the blob store's references
+        email_message = load_text(email_message)
+        job_ids = []
         for recipient in recipients:
-             LOGGER.info(f"---> Simulating forward to: {recipient}")
-             time.sleep(0.5 + random.random() * 0.5) # Simulate network delay per recipient
-        LOGGER.info("Email forwarded successfully!")
-        return f"Successfully forwarded email to {', '.join(recipients)}."
+            if tool_cancelled(config):
+                return f"Error: Timed out; forward queued only for {', '.join(recipients[:len(job_ids)]) or 'no one'}."
+            job_ids.append(
+                enqueue_email("forward_email", recipient, {"email_message": email_message}, tool_send_id(config))
+            )
+        LOGGER.info("Email forward queued in outbox (jobs %s)", job_ids)
+        return f"Successfully queued email forward to {', '.join(recipients)} for delivery."
     except Exception as e:
         LOGGER.error(f"Failed to forward email: {e}", exc_info=True)
         return f"Error: Failed to forward email. Details: {e}"
 
+forward_email = StructuredTool.from_function(func=_forward_email, name="forward_email")
 
-@tool
-def send_wrong_email_notification_to_sender(
-    sender_email: str, correct_department: str
+
+def _send_wrong_email_notification_to_sender(
+    sender_email: str, correct_department: str, config: RunnableConfig
 ) -> str:
     """
     Send an email back to the sender_email informing them that they have the wrong address.
     Inform them the email should be sent to the correct_department address instead.
     """
-    LOGGER.info(f"--- TOOL: Sending Wrong Email Notification ---")
-    LOGGER.info(f"Attempting to send notification to: {sender_email} about dept: {correct_department}")
+    LOGGER.info("--- TOOL: Sending Wrong Email Notification ---")
+    LOGGER.info("Attempting to send notification to: %s about dept: %s", sender_email, correct_department)
     try:
-        # Simulate sending email
-        time.sleep(1 + random.random())
-        LOGGER.info(f"Wrong email notification sent successfully to {sender_email}!")
-        return f"Successfully sent wrong email notification to {sender_email}, advising them to use {correct_department}."
+        job_id = enqueue_email(
+            "wrong_email_notification", sender_email, {"correct_department": correct_department},
+            tool_send_id(config),
+        )
+        LOGGER.info("Wrong email notification to %s queued in outbox (job %s)", sender_email, job_id)
+        return f"Successfully queued wrong email notification to {sender_email}, advising them to use {correct_department}."
     except Exception as e:
         LOGGER.error(f"Failed to send notification: {e}", exc_info=True)
         return f"Error: Failed to send notification. Details: {e}"
 
-@tool
-def extract_notice_data(
+send_wrong_email_notification_to_sender = StructuredTool.from_function(
+    func=_send_wrong_email_notification_to_sender,
+    name="send_wrong_email_notification_to_sender",
+)
+
+
+def _build_notice_state(email: str, escalation_criteria: str) -> NoticeGraphState:
+    """Prepare the initial state for the notice extraction graph."""
+    # Ensure all keys required by NoticeGraphState are present
+    return {
+        "notice_message": store_text(email),
+        "notice_email_extract": None,
+        "escalation_text_criteria": escalation_criteria,
+        "escalation_dollar_criteria": 50000.0, # Example threshold, could be configurable
+        "text_escalation_check": None, # Will be set by the graph
+        "requires_escalation": False, # Will be set by the graph
+        "escalation_emails": ["legal-team@example.com", "compliance-dept@example.com"], # Example emails
+        "escalation_results": None, # Per-recipient delivery results, set by the graph
+        "follow_ups": None,
+        "current_follow_up": None,
+        "batch_follow_ups": True, # Answer all follow-ups in one call
+        "stream_extraction": False, # Blocking parse; True escalates on the fine while parsing
+        "escalation_keywords": None, # Regexes that escalate before the model's text check
+    }
+
+def _summarize_notice_results(results: NoticeGraphState) -> str:
+    """Format the notice extraction graph's final state for the agent."""
+    extracted_data = results.get("notice_email_extract")
+    final_follow_ups = results.get("follow_ups")
+
+    # Prepare response string
+    response_lines = []
+    if extracted_data:
+         response_lines.append("Notice data extracted successfully.")
+         # Compact JSON (no indentation or empty fields) keeps the agent's prompt small
+         response_lines.append(extracted_data.model_dump_json(exclude_none=True))
+    else:
+         response_lines.append("Error: Failed to extract notice data from the email.")
+
+    if final_follow_ups:
+        response_lines.append("\nFollow-up questions answered:")
+        response_lines.append(compact_json(final_follow_ups))
+
+    if results.get("requires_escalation"):
+         response_lines.append("\nNotice required escalation.")
+         failed = [r.recipient for r in results.get("escalation_results") or [] if r.status != "sent"]
+         if failed:
+             response_lines.append(f"Escalation email could not be delivered to: {', '.join(failed)}")
+    else:
+         response_lines.append("\nNotice did not require escalation.")
+
+    return "\n".join(response_lines)
+
+def _notice_results_artifact(results: NoticeGraphState) -> Dict[str, Any]:
+    """Structured notice results attached to the ToolMessage as its artifact.
+
+    The agent model only sees the summary string; callers that need the
+    extracted data (e.g. process_inbox.py) read it from ToolMessage.artifact.
+    """
+    return {
+        "notice_email_extract": results.get("notice_email_extract"),
+        "requires_escalation": results.get("requires_escalation", False),
+        "follow_ups": results.get("follow_ups"),
+        "escalation_results": results.get("escalation_results"),
+    }
+
+DEFAULT_ESCALATION_CRITERIA = "Escalate if mentions safety violations, structural issues, or fines over $50,000" # Example default
+
+def notice_thread_id(email: str) -> str:
+    """Checkpoint thread of the notice extraction graph for an email."""
+    return f"notice-{message_id(email)}"
+
+# Near-duplicate reuse (utils/near_duplicates.py): with NEAR_DUP_INDEX set,
+# every processed notice is indexed with its results. A resent notice (new
+# date line, forwarding headers, reflowed text) reuses the closest earlier
+# notice's extract instead of running the notice extraction graph again. The
+# index only proposes the candidate: its results are reused when the two
+# bodies differ in nothing but header, date and whitespace lines (same
+# body_digest), the escalation criteria are the same and the regexes find the
+# same fine. The fields the regexes read from the headers (e.g. the notice
+# date) are diffed and taken from the new email.
+
+def _near_duplicate_payload(email: str, escalation_criteria: str, results: NoticeGraphState) -> Dict[str, Any]:
+    return {
+        "message_id": message_id(email),
+        "body": body_digest(email),
+        "escalation_criteria": escalation_criteria,
+        "fields": pre_extract_notice_fields(email),
+        "notice_email_extract": dump_model(results["notice_email_extract"]),
+        "requires_escalation": results.get("requires_escalation", False),
+        "follow_ups": results.get("follow_ups"),
+    }
+
+def _index_notice(email: str, escalation_criteria: str, results: NoticeGraphState) -> None:
+    if results.get("notice_email_extract") is None:
+        return
+    try:
+        index_email(email, _near_duplicate_payload(email, escalation_criteria, results))
+    except Exception as e:
+        LOGGER.warning(f"Could not index notice for near-duplicate reuse: {e}")
+
+def _reuse_near_duplicate(
+    email: str, escalation_criteria: str
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Summary and artifact for `email` from an earlier near-duplicate notice's
+    results, or None if there is none or its results don't carry over."""
+    match: Optional[NearDuplicate] = find_near_duplicate(email)
+    if match is None:
+        return None
+    prior = match.payload
+    if prior.get("escalation_criteria") != escalation_criteria or not prior.get("notice_email_extract"):
+        return None
+    if prior.get("body") != body_digest(email):
+        LOGGER.info(
+            "Near-duplicate of %s differs beyond header/date/whitespace lines -> running extraction",
+            prior["message_id"],
+        )
+        return None
+    fields = pre_extract_notice_fields(email)
+    if fields.get("max_potential_fine") != prior["fields"].get("max_potential_fine"):
+        LOGGER.info("Near-duplicate of %s has a different fine -> running extraction", prior["message_id"])
+        return None
+    changed = {name: value for name, value in fields.items() if prior["fields"].get(name) != value}
+    extract = construct_model(NoticeEmailExtract, {**prior["notice_email_extract"], **changed})
+    LOGGER.info(
+        "Near-duplicate of %s (similarity %.2f), reusing its results; changed fields: %s",
+        prior["message_id"], match.similarity, ", ".join(changed) or "none",
+    )
+    results = {
+        "notice_email_extract": extract,
+        "requires_escalation": prior["requires_escalation"],
+        "follow_ups": prior["follow_ups"],
+        # Escalation emails, if any, went out with the earlier notice
+        "escalation_results": None,
+    }
+    summary = (
+        f"Near-duplicate of a notice processed earlier (similarity {match.similarity:.2f}); reused its results. "
+        f"Changed fields: {', '.join(changed) or 'none'}.\n{_summarize_notice_results(results)}"
+    )
+    return summary, {**_notice_results_artifact(results), "near_duplicate_of": prior["message_id"]}
+
+def _extract_notice_data(
     email: str,
-    escalation_criteria: str = "Escalate if mentions safety violations, structural issues, or fines over $50,000" # Example default
-) -> str:
+    escalation_criteria: str = DEFAULT_ESCALATION_CRITERIA,
+) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Extract structured fields from a regulatory notice email using a specialized graph.
     Use ONLY when the email clearly comes from a regulatory body, government agency,
@@ -100,54 +309,61 @@ def extract_notice_data(
     After calling this tool, the process is complete for this email. Do not call other tools after this one.
     Returns a summary of the extracted data or an error message.
     """
-    LOGGER.info(f"--- TOOL: Extracting Notice Data ---")
-    LOGGER.info(f"Using escalation criteria: {escalation_criteria}")
+    LOGGER.info("--- TOOL: Extracting Notice Data ---")
+    LOGGER.info("Using escalation criteria: %s", escalation_criteria)
     try:
-        # Prepare the initial state for the notice extraction graph
-        # Ensure all keys required by NoticeGraphState are present
-        initial_state: NoticeGraphState = {
-            "notice_message": email,
-            "notice_email_extract": None,
-            "escalation_text_criteria": escalation_criteria,
-            "escalation_dollar_criteria": 50000.0, # Example threshold, could be configurable
-            "requires_escalation": False, # Will be set by the graph
-            "escalation_emails": ["legal-team@example.com", "compliance-dept@example.com"], # Example emails
-            "follow_ups": None,
-            "current_follow_up": None,
-        }
-
-        # Invoke the notice extraction graph
-        # Use stream to observe sub-graph execution if needed, invoke for final result
+        # The agent state may hold the email by reference (utils/blob_store.py)
+        email = load_text(email)
+        reused = _reuse_near_duplicate(email, escalation_criteria)
+        if reused is not None:
+            return reused
+        initial_state = _build_notice_state(email, escalation_criteria)
+
+        # Invoke the notice extraction graph, checkpointed per email so a
+        # restarted worker resumes it from the last completed node
         LOGGER.info("Invoking NOTICE_EXTRACTION_GRAPH...")
-        results = NOTICE_EXTRACTION_GRAPH.invoke(initial_state)
+        results = run_checkpointed(get_notice_extraction_graph(), initial_state, notice_thread_id(email))
         LOGGER.info("NOTICE_EXTRACTION_GRAPH finished.")
+        _index_notice(email, escalation_criteria, results)
 
-        extracted_data = results.get("notice_email_extract")
-        final_follow_ups = results.get("follow_ups")
+        return _summarize_notice_results(results), _notice_results_artifact(results)
 
-        # Prepare response string
-        response_lines = []
-        if extracted_data:
-             response_lines.append("Notice data extracted successfully.")
-             # Convert Pydantic model to string for agent response
-             response_lines.append(extracted_data.model_dump_json(indent=2))
-        else:
-             response_lines.append("Error: Failed to extract notice data from the email.")
+    except Exception as e:
+        LOGGER.error(f"Error calling notice extraction graph: {e}", exc_info=True)
+        return f"Error: An exception occurred during notice extraction: {e}", None
 
-        if final_follow_ups:
-            response_lines.append("\nFollow-up questions answered:")
-            response_lines.append(json.dumps(final_follow_ups, indent=2))
+async def _aextract_notice_data(
+    email: str,
+    escalation_criteria: str = DEFAULT_ESCALATION_CRITERIA,
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Async version of _extract_notice_data."""
+    LOGGER.info("--- TOOL: Extracting Notice Data ---")
+    LOGGER.info("Using escalation criteria: %s", escalation_criteria)
+    try:
+        # The agent state may hold the email by reference (utils/blob_store.py)
+        email = load_text(email)
+        reused = _reuse_near_duplicate(email, escalation_criteria)
+        if reused is not None:
+            return reused
+        initial_state = _build_notice_state(email, escalation_criteria)
 
-        if results.get("requires_escalation"):
-             response_lines.append("\nNotice required escalation.")
-        else:
-             response_lines.append("\nNotice did not require escalation.")
+        LOGGER.info("Invoking NOTICE_EXTRACTION_GRAPH...")
+        results = await arun_checkpointed(get_notice_extraction_graph(), initial_state, notice_thread_id(email))
+        LOGGER.info("NOTICE_EXTRACTION_GRAPH finished.")
+        _index_notice(email, escalation_criteria, results)
 
-        return "\n".join(response_lines)
+        return _summarize_notice_results(results), _notice_results_artifact(results)
 
     except Exception as e:
         LOGGER.error(f"Error calling notice extraction graph: {e}", exc_info=True)
-        return f"Error: An exception occurred during notice extraction: {e}"
+        return f"Error: An exception occurred during notice extraction: {e}", None
+
+extract_notice_data = StructuredTool.from_function(
+    func=_extract_notice_data,
+    coroutine=_aextract_notice_data,
+    name="extract_notice_data",
+    response_format="content_and_artifact",
+)
 
 
 @tool
@@ -158,23 +374,23 @@ def determine_email_action(email: str) -> str:
     Provides routing GUIDELINES based on common scenarios. The agent should then call the
     appropriate tools (forward_email, send_wrong_email_notification_to_sender) based on these guidelines.
     """
-    LOGGER.info(f"--- TOOL: Determining Email Action (Fallback) ---")
+    LOGGER.info("--- TOOL: Determining Email Action (Fallback) ---")
     # In a real scenario, this might involve another LLM call or complex rules.
-    # For this tutorial, it returns static guidelines.
-    return """
+    # For this tutorial, it returns static guidelines (dedented, to keep the agent's prompt small).
+    return textwrap.dedent(f"""
     Routing Guidelines Provided:
     1. Invoice/Billing: If the email appears to be an invoice, billing statement, or payment query:
-       - Use 'forward_email' tool to send it ONLY to billing@company.com.
-       - Use 'send_wrong_email_notification_to_sender' tool, informing the sender the correct department is billing@company.com.
+       - Use 'forward_email' tool to send it ONLY to {BILLING_ADDRESS}.
+       - Use 'send_wrong_email_notification_to_sender' tool, informing the sender the correct department is {BILLING_ADDRESS}.
     2. Customer Support: If the email appears to be from a customer reporting an issue, asking for help, or requesting maintenance/refunds:
-       - Use 'forward_email' tool to send it to ALL of these addresses: support@company.com, cdetuma@company.com, ctu@abc.com.
-       - Use 'send_wrong_email_notification_to_sender' tool, informing the sender the correct department is support@company.com.
+       - Use 'forward_email' tool to send it to ALL of these addresses: {SUPPORT_FORWARD_ADDRESSES}.
+       - Use 'send_wrong_email_notification_to_sender' tool, informing the sender the correct department is {SUPPORT_ADDRESS}.
     3. Regulatory Notice: If the email looks like a regulatory notice (from OSHA, Building Dept, etc.) but wasn't caught earlier:
        - Use the 'extract_notice_data' tool.
     4. Other: For emails that don't fit above, attempt to infer the correct department from context (e.g., job application -> humanresources@company.com).
        - If unsure, use 'send_wrong_email_notification_to_sender' suggesting a likely department (e.g., support@company.com or general-info@company.com).
     Provide a brief final response indicating the action taken based *after* calling the necessary tools.
-    """
+    """).strip()
 
 # --- Agent Setup ---
 
@@ -185,28 +401,189 @@ tools = [
     extract_notice_data,
 ]
 
-# ToolNode executes tools based on the agent's output
-tool_node = ToolNode(tools)
+# Runs all tool calls of an agent turn concurrently, each with a timeout
+# (the notice graph gets longer, since it may cycle through follow-ups)
+tool_node = make_parallel_tool_node(tools, tool_timeouts={"extract_notice_data": 180.0})
+
+# Agent LLM (bind tools), built on first use (see utils/lazy.py)
+def _build_email_agent_model():
+    return get_chat_model("email_agent").bind_tools(tools)
+
+def get_email_agent_model():
+    return lazy_global(globals(), "EMAIL_AGENT_MODEL", _build_email_agent_model)
 
-# Agent LLM (bind tools)
-EMAIL_AGENT_MODEL = ChatOpenAI(model="gpt-4o-mini", temperature=0).bind_tools(tools)
+# --- Input Helpers ---
+
+def build_agent_input(email: str, escalation_criteria: str | None = None) -> str:
+    """Wrap a raw email into the agent's input message, optionally stating the
+    escalation criteria to use for regulatory notices."""
+    if not escalation_criteria:
+        return email
+    return f"""
+Please process the following email.
+The escalation criteria for regulatory notices is: {escalation_criteria}
+
+--- Email Start ---
+{email}
+--- Email End ---
+"""
+
+_CRITERIA_PREFIX = "The escalation criteria for regulatory notices is:"
+
+def parse_agent_input(content: str) -> Tuple[str, Optional[str]]:
+    """Inverse of build_agent_input: return (email, escalation_criteria or None)."""
+    if "--- Email Start ---" not in content:
+        return content, None
+    header, _, rest = content.partition("--- Email Start ---")
+    email = rest.rpartition("--- Email End ---")[0] or rest
+    escalation_criteria = None
+    for line in header.splitlines():
+        if line.strip().startswith(_CRITERIA_PREFIX):
+            escalation_criteria = line.strip()[len(_CRITERIA_PREFIX):].strip() or None
+    return email.strip("\n"), escalation_criteria
 
 # --- Node Functions ---
 
-def call_agent_model_node(state: MessagesState) -> dict[str, List[BaseMessage]]:
+def _agent_prompt(messages: List[BaseMessage], config: RunnableConfig) -> List[BaseMessage]:
+    """The history sent to the agent model, compacted unless disabled with
+    config={"configurable": {"compact_context": False}}. Email text stored by
+    reference is resolved first, so the model always sees the full text."""
+    messages = resolve_messages(messages)
+    configurable = config.get("configurable", {})
+    if not configurable.get("compact_context", True):
+        return messages
+    compacted = compact_messages(
+        messages,
+        tool_output_max_chars=configurable.get("tool_output_max_chars", TOOL_OUTPUT_MAX_CHARS),
+        stale_tool_output_max_chars=configurable.get("stale_tool_output_max_chars", STALE_TOOL_OUTPUT_MAX_CHARS),
+    )
+    LOGGER.info("Agent prompt compacted from %s to %s chars", lazy(message_chars, messages), lazy(message_chars, compacted))
+    return compacted
+
+def call_agent_model_node(state: AgentState, config: RunnableConfig) -> dict[str, List[BaseMessage]]:
     """Node that calls the main LLM agent model."""
     LOGGER.info("--- NODE: Calling Agent Model ---")
-    messages = state["messages"]
-    # Invoke the LLM with the current conversation history
+    # Invoke the LLM with the (compacted) conversation history; the full
+    # history, including untrimmed tool outputs, stays in the graph state
     # The response will be an AIMessage, potentially with tool_calls
-    response = EMAIL_AGENT_MODEL.invoke(messages)
-    LOGGER.info(f"Agent model response received. Tool calls: {bool(response.tool_calls)}")
-    # Return value adheres to MessagesState structure
+    response = get_email_agent_model().invoke(_agent_prompt(state["messages"], config))
+    LOGGER.info("Agent model response received. Tool calls: %s", bool(response.tool_calls))
+    # Return value adheres to AgentState structure
     return {"messages": [response]}
 
+async def acall_agent_model_node(state: AgentState, config: RunnableConfig) -> dict[str, List[BaseMessage]]:
+    """Async version of call_agent_model_node."""
+    LOGGER.info("--- NODE: Calling Agent Model ---")
+    response = await get_email_agent_model().ainvoke(_agent_prompt(state["messages"], config))
+    LOGGER.info("Agent model response received. Tool calls: %s", bool(response.tool_calls))
+    return {"messages": [response]}
+
+# --- Fast Path ---
+# A deterministic classifier handles high-confidence invoices, support requests
+# and regulatory notices by emitting the tool calls determine_email_action's
+# guidelines prescribe, skipping every EMAIL_AGENT_MODEL call. Anything else
+# falls through to the agent. Disable per run with
+# config={"configurable": {"fast_path": False}}.
+
+FAST_PATH_NAME = "fast_path_classifier"
+
+def _fast_path_tool_calls(
+    classification: EmailClassification, email: str, escalation_criteria: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Tool calls the routing guidelines prescribe for a classified email."""
+    if classification.category == REGULATORY_NOTICE:
+        calls = [("extract_notice_data", {
+            "email": email,
+            "escalation_criteria": escalation_criteria or DEFAULT_ESCALATION_CRITERIA,
+        })]
+    elif classification.category == INVOICE:
+        calls = [
+            ("forward_email", {"email_message": email, "send_to_email": BILLING_ADDRESS}),
+            ("send_wrong_email_notification_to_sender", {
+                "sender_email": classification.sender_email,
+                "correct_department": BILLING_ADDRESS,
+            }),
+        ]
+    elif classification.category == CUSTOMER_SUPPORT:
+        calls = [
+            ("forward_email", {"email_message": email, "send_to_email": SUPPORT_FORWARD_ADDRESSES}),
+            ("send_wrong_email_notification_to_sender", {
+                "sender_email": classification.sender_email,
+                "correct_department": SUPPORT_ADDRESS,
+            }),
+        ]
+    else:
+        calls = []
+    return [
+        {"name": name, "args": args, "id": f"fast_path_{i}", "type": "tool_call"}
+        for i, (name, args) in enumerate(calls)
+    ]
+
+def classify_email_node(state: AgentState, config: RunnableConfig) -> dict[str, List[BaseMessage]]:
+    """Node that tries to route the email with rules before involving the agent model."""
+    LOGGER.info("--- NODE: Classifying Email (Fast Path) ---")
+    messages = state["messages"]
+    if not config.get("configurable", {}).get("fast_path", True) or len(messages) != 1:
+        return {"messages": []}
+
+    email, escalation_criteria = parse_agent_input(load_text(messages[0].content))
+    classification = classify_email(email)
+    tool_calls = _fast_path_tool_calls(classification, email, escalation_criteria)
+    if not tool_calls:
+        LOGGER.info("Fast path unsure (scores: %s) -> deferring to agent", classification.scores)
+        return {"messages": []}
+
+    LOGGER.info("Fast path classified email as %s (%s)", classification.category, ', '.join(classification.reasons))
+    return {"messages": [AIMessage(
+        content="",
+        name=FAST_PATH_NAME,
+        tool_calls=tool_calls,
+        response_metadata={"fast_path_category": classification.category},
+    )]}
+
+def finish_fast_path_node(state: AgentState) -> dict[str, List[BaseMessage]]:
+    """Write the final response for a fast-path email from its tool results."""
+    LOGGER.info("--- NODE: Finishing Fast Path ---")
+    messages = state["messages"]
+    request = next(m for m in reversed(messages) if isinstance(m, AIMessage) and m.tool_calls)
+    results = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and message.content:
+            lines = [line for line in message.content.splitlines() if line.strip()]
+            # First line is the outcome; notice summaries end with the escalation result
+            results.append(lines[0] if len(lines) == 1 else f"{lines[0]} {lines[-1]}")
+    category = request.response_metadata.get("fast_path_category")
+    content = f"Email handled as {category} by the fast-path classifier. Actions taken:\n" + "\n".join(
+        f"- {result}" for result in results
+    )
+    return {"messages": [AIMessage(content=content, name=FAST_PATH_NAME)]}
+
+def is_fast_path_message(message: BaseMessage) -> bool:
+    """Whether a message was produced by the fast path rather than the agent model."""
+    return isinstance(message, AIMessage) and message.name == FAST_PATH_NAME
+
 # --- Edge Functions ---
 
-def route_agent_graph_edge(state: MessagesState) -> str:
+def route_classification_edge(state: AgentState) -> str:
+    """Run the fast path's tool calls, or hand the email to the agent."""
+    LOGGER.info("--- EDGE: Routing Classification ---")
+    if is_fast_path_message(state["messages"][-1]):
+        ROUTING_LOGGER.info("Decision: Fast path handled the email -> Route to call_tools")
+        return "call_tools"
+    ROUTING_LOGGER.info("Decision: Fast path unsure -> Route to agent")
+    return "agent"
+
+def route_tools_edge(state: AgentState) -> str:
+    """After tools run, finish fast-path emails directly; otherwise return to the agent."""
+    LOGGER.info("--- EDGE: Routing Tool Results ---")
+    request = next(m for m in reversed(state["messages"]) if isinstance(m, AIMessage))
+    if is_fast_path_message(request):
+        ROUTING_LOGGER.info("Decision: Fast-path tools done -> Route to finish_fast_path")
+        return "finish_fast_path"
+    ROUTING_LOGGER.info("Decision: Return tool results -> Route to agent")
+    return "agent"
+
+def route_agent_graph_edge(state: AgentState) -> str:
     """Determines whether to continue calling tools or end the graph."""
     LOGGER.info("--- EDGE: Routing Agent Action ---")
     # Get the last message added to the state
@@ -214,47 +591,85 @@ def route_agent_graph_edge(state: MessagesState) -> str:
     # Check if the last message contains tool calls requested by the LLM
     if last_message.tool_calls:
         # If there are tool calls, route to the tool node
-        LOGGER.info(f"Decision: Agent requested {len(last_message.tool_calls)} tool call(s) -> Route to call_tools")
+        ROUTING_LOGGER.info("Decision: Agent requested %s tool call(s) -> Route to call_tools", len(last_message.tool_calls))
         return "call_tools" # Name of the tool node
     # If no tool calls, the agent has finished (provided a final response)
-    LOGGER.info("Decision: Agent finished (no tool calls) -> Route to END")
+    ROUTING_LOGGER.info("Decision: Agent finished (no tool calls) -> Route to END")
     return END
 
 # --- Build the Graph ---
 
-LOGGER.info("Building Email Agent Graph...")
-workflow = StateGraph(MessagesState) # Use the prebuilt MessagesState
-
-# Add the agent node
-workflow.add_node("agent", call_agent_model_node)
-# Add the tool execution node
-workflow.add_node("call_tools", tool_node)
-
-# Set the entry point: the agent node
-workflow.set_entry_point("agent")
-
-# Add the conditional edge: after the agent runs, decide to call tools or end
-workflow.add_conditional_edges(
-    "agent", # Starting node is the agent
-    route_agent_graph_edge, # Function to determine the route
-    {
-        "call_tools": "call_tools", # Route to tool node if tool calls exist
-        END: END # Route to END if no tool calls
-    }
-)
-
-# Add the edge to loop back from the tool node to the agent node
-# After tools run, their output (ToolMessage) is added to state,
-# and we go back to the agent to process the tool results.
-workflow.add_edge("call_tools", "agent")
+def build_email_agent_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """Assemble and compile the email agent graph.
 
-# Compile the graph
-email_agent_graph = workflow.compile()
-LOGGER.info("Email Agent Graph compiled successfully.")
+    With a checkpointer (default: get_checkpointer(), see utils/checkpointing.py),
+    runs given a thread_id in their config save their state after every node
+    and resume from the last completed node when invoked again.
+    """
+    LOGGER.info("Building Email Agent Graph...")
+    workflow = StateGraph(AgentState)
+
+    # Add the agent node (sync + async, so the graph supports invoke and ainvoke)
+    workflow.add_node(
+        "agent", RunnableLambda(call_agent_model_node, afunc=acall_agent_model_node)
+    )
+    # Add the tool execution node
+    workflow.add_node("call_tools", tool_node)
+    # Add the deterministic fast path in front of the agent
+    workflow.add_node("classify_email", classify_email_node)
+    workflow.add_node("finish_fast_path", finish_fast_path_node)
+
+    # Set the entry point: the fast-path classifier, which defers to the agent when unsure
+    workflow.set_entry_point("classify_email")
+    workflow.add_conditional_edges(
+        "classify_email",
+        route_classification_edge,
+        {"call_tools": "call_tools", "agent": "agent"},
+    )
+
+    # Add the conditional edge: after the agent runs, decide to call tools or end
+    workflow.add_conditional_edges(
+        "agent", # Starting node is the agent
+        route_agent_graph_edge, # Function to determine the route
+        {
+            "call_tools": "call_tools", # Route to tool node if tool calls exist
+            END: END # Route to END if no tool calls
+        }
+    )
+
+    # Add the edge to loop back from the tool node to the agent node
+    # After tools run, their output (ToolMessage) is added to state,
+    # and we go back to the agent to process the tool results
+    # (fast-path tool calls finish without the agent).
+    workflow.add_conditional_edges(
+        "call_tools",
+        route_tools_edge,
+        {"agent": "agent", "finish_fast_path": "finish_fast_path"},
+    )
+    workflow.add_edge("finish_fast_path", END)
+
+    # Compile the graph
+    # Runs without a thread_id are not persisted (the thread_id=None default)
+    graph = workflow.compile(checkpointer=checkpointer or get_checkpointer(), name="email_agent").with_config(
+        configurable={"thread_id": None}
+    )
+    # Node, model and tool timings go to the metrics registry (utils/metrics.py)
+    graph = instrument_graph(graph, cycle_nodes=("agent",))
+    LOGGER.info("Email Agent Graph compiled successfully.")
+    return graph
+
+def get_email_agent_graph():
+    """The compiled email agent graph, built on first use."""
+    return lazy_global(globals(), "email_agent_graph", build_email_agent_graph)
+
+# email_agent_graph and EMAIL_AGENT_MODEL stay importable by name
+__getattr__ = lazy_module_getattr(__name__, {
+    "email_agent_graph": get_email_agent_graph,
+    "EMAIL_AGENT_MODEL": get_email_agent_model,
+})
 
 # --- Testing --- (Optional: Keep for standalone testing)
 if __name__ == "__main__":
-    import random # Ensure random is imported if not already
     try:
         from example_emails import EMAILS
     except ImportError:
@@ -277,22 +692,15 @@ if __name__ == "__main__":
         # Add escalation criteria specifically for notice tests if needed
         if "Regulatory Notice" in name:
              escalation_criteria = "Escalate if mentions safety violations, structural issues, electrical problems, fire risks, or fines over $10,000."
-             input_content = f"""
-Please process the following email.
-The escalation criteria for regulatory notices is: {escalation_criteria}
-
---- Email Start ---
-{email_content}
---- Email End ---
-"""
+             input_content = build_agent_input(email_content, escalation_criteria)
         else:
             input_content = email_content
 
-        initial_state = MessagesState(messages=[HumanMessage(content=input_content)])
+        initial_state = AgentState(messages=[HumanMessage(content=input_content)])
         final_state_agent = None
 
         # Use stream to observe the flow
-        for step in email_agent_graph.stream(initial_state, stream_mode="values", config={"recursion_limit": 10}): # Add recursion limit
+        for step in get_email_agent_graph().stream(initial_state, stream_mode="values", config={"recursion_limit": 10}): # Add recursion limit
             last_msg = step["messages"][-1]
             node_ran = list(step.keys())[0]
             print(f"\n -> Output from Node: {node_ran} | Message Type: {type(last_msg).__name__}")
@@ -1,15 +1,33 @@
-from typing import TypedDict, Dict, List, Optional # Use concrete types
+from typing import Any, TypedDict, Dict, List, Optional # Use concrete types
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from pydantic import EmailStr # Ensure EmailStr is imported if used in GraphState
 import datetime # Added for default_serializer
 import json # Added for default_serializer
 
 # Use try-except for robust imports relative to project structure
 try:
-    from chains.binary_questions import BINARY_QUESTION_CHAIN
-    from chains.escalation_check import ESCALATION_CHECK_CHAIN
-    from chains.notice_extraction import NOTICE_PARSER_CHAIN, NoticeEmailExtract
-    from utils.graph_utils import create_legal_ticket, send_escalation_email
-    from utils.logging_config import LOGGER
+    from chains.binary_questions import (
+        format_numbered_questions,
+        get_batch_binary_question_chain,
+        get_binary_question_chain,
+    )
+    from chains.notice_extraction import NoticeEmailExtract, get_pre_extracting_notice_parser
+    from utils.graph_utils import (
+        EscalationDeliveryResult,
+        acreate_legal_ticket,
+        asend_escalation_email,
+        create_legal_ticket,
+        known_follow_up_questions,
+        send_escalation_email,
+    )
+    from utils.blob_store import load_text
+    from utils.escalation_rules import EscalationFacts, RuleCost, TextCriteriaRule, escalation_rule_engine
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+    from utils.checkpointing import get_checkpointer
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.metrics import instrument_graph
+    from utils.logging_config import LOGGER, ROUTING_LOGGER, lazy
 except ImportError:
     print("Attempting import relative to project root for graphs/notice_extraction.py...")
     import sys
@@ -17,93 +35,252 @@ except ImportError:
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
-    from chains.binary_questions import BINARY_QUESTION_CHAIN
-    from chains.escalation_check import ESCALATION_CHECK_CHAIN
-    from chains.notice_extraction import NOTICE_PARSER_CHAIN, NoticeEmailExtract
-    from utils.graph_utils import create_legal_ticket, send_escalation_email
-    from utils.logging_config import LOGGER
-
+    from chains.binary_questions import (
+        format_numbered_questions,
+        get_batch_binary_question_chain,
+        get_binary_question_chain,
+    )
+    from chains.notice_extraction import NoticeEmailExtract, get_pre_extracting_notice_parser
+    from utils.graph_utils import (
+        EscalationDeliveryResult,
+        acreate_legal_ticket,
+        asend_escalation_email,
+        create_legal_ticket,
+        known_follow_up_questions,
+        send_escalation_email,
+    )
+    from utils.blob_store import load_text
+    from utils.escalation_rules import EscalationFacts, RuleCost, TextCriteriaRule, escalation_rule_engine
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+    from utils.checkpointing import get_checkpointer
+    from utils.lazy import lazy_global, lazy_module_getattr
+    from utils.metrics import instrument_graph
+    from utils.logging_config import LOGGER, ROUTING_LOGGER, lazy
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, START, StateGraph
-
-# Load environment variables (should be done in chains, but ensure chains do it)
-from dotenv import load_dotenv
-load_dotenv()
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 # Define the state dictionary for the graph
 class GraphState(TypedDict):
-    notice_message: str
+    notice_message: str # The notice text, or a reference to it (see utils/blob_store.py)
     notice_email_extract: Optional[NoticeEmailExtract]
     escalation_text_criteria: str
     escalation_dollar_criteria: float
+    text_escalation_check: Optional[bool]
     requires_escalation: bool
     escalation_emails: Optional[List[EmailStr]]
+    escalation_results: Optional[List[EscalationDeliveryResult]]
     follow_ups: Optional[Dict[str, bool]]
     current_follow_up: Optional[str]
+    batch_follow_ups: Optional[bool]
+    stream_extraction: Optional[bool] # Stream the parse and escalate as soon as the fine settles
+    escalation_keywords: Optional[List[str]] # Regexes that escalate without asking the model
 
 # --- Node Functions ---
 
+# Streaming extraction (state["stream_extraction"]): the parser yields
+# partially filled extracts as fields settle (see PreExtractingNoticeParser),
+# each one also sent to stream_mode="custom" consumers. Once the fine alone
+# exceeds the dollar criteria the notice must be escalated whatever else it
+# says, so the escalation emails go out right away, with the fields known at
+# that point, while the rest of the notice is still being parsed.
+
+def _escalation_decision(requires_escalation: bool, reason: Optional[str]) -> Dict[str, Any]:
+    """Custom stream event announcing the escalation decision."""
+    return {"escalation_decision": {"requires_escalation": requires_escalation, "reason": reason}}
+
+def _fine_exceeds_criteria(state: GraphState, notice_extract: NoticeEmailExtract) -> bool:
+    fine = notice_extract.max_potential_fine
+    return fine is not None and fine >= state["escalation_dollar_criteria"]
+
+def _stream_parse_notice_message(state: GraphState) -> Dict[str, Any]:
+    writer = get_stream_writer()
+    update: Dict[str, Any] = {"notice_email_extract": None}
+    escalation = None
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        try:
+            for notice_email_extract in get_pre_extracting_notice_parser().stream(
+                {"message": load_text(state["notice_message"])}
+            ):
+                writer({"notice_email_extract": notice_email_extract})
+                if escalation is None and _fine_exceeds_criteria(state, notice_email_extract):
+                    LOGGER.info("Fine exceeds the escalation criteria -> sending escalation emails while parsing")
+                    writer(_escalation_decision(True, "max_potential_fine"))
+                    escalation = executor.submit(
+                        send_escalation_email, notice_email_extract, state.get("escalation_emails")
+                    )
+            update["notice_email_extract"] = notice_email_extract
+            LOGGER.info("Parsing successful. Extracted: %s", lazy(notice_email_extract.model_dump_json, indent=2))
+        except Exception as e:
+            LOGGER.error(f"Error parsing notice message: {e}", exc_info=True)
+        if escalation is not None:
+            update["escalation_results"] = escalation.result()
+    return update
+
+async def _astream_parse_notice_message(state: GraphState) -> Dict[str, Any]:
+    writer = get_stream_writer()
+    update: Dict[str, Any] = {"notice_email_extract": None}
+    escalation = None
+    try:
+        async for notice_email_extract in get_pre_extracting_notice_parser().astream(
+            {"message": load_text(state["notice_message"])}
+        ):
+            writer({"notice_email_extract": notice_email_extract})
+            if escalation is None and _fine_exceeds_criteria(state, notice_email_extract):
+                LOGGER.info("Fine exceeds the escalation criteria -> sending escalation emails while parsing")
+                writer(_escalation_decision(True, "max_potential_fine"))
+                escalation = asyncio.create_task(
+                    asend_escalation_email(notice_email_extract, state.get("escalation_emails"))
+                )
+        update["notice_email_extract"] = notice_email_extract
+        LOGGER.info("Parsing successful. Extracted: %s", lazy(notice_email_extract.model_dump_json, indent=2))
+    except Exception as e:
+        LOGGER.error(f"Error parsing notice message: {e}", exc_info=True)
+    if escalation is not None:
+        update["escalation_results"] = await escalation
+    return update
+
 def parse_notice_message_node(state: GraphState) -> Dict[str, Optional[NoticeEmailExtract]]:
-    """Use the notice parser chain to extract fields from the notice."""
+    """Use the notice parser to extract fields from the notice (regexes for
+    structured fields, NOTICE_PARSER_CHAIN's model for the rest)."""
+    LOGGER.info("--- NODE: Parsing Notice Message ---")
+    if state.get("stream_extraction"):
+        return _stream_parse_notice_message(state)
+    try:
+        notice_email_extract = get_pre_extracting_notice_parser().invoke(
+            {"message": load_text(state["notice_message"])}
+        )
+        LOGGER.info("Parsing successful. Extracted: %s", lazy(notice_email_extract.model_dump_json, indent=2))
+        return {"notice_email_extract": notice_email_extract}
+    except Exception as e:
+        LOGGER.error(f"Error parsing notice message: {e}", exc_info=True)
+        return {"notice_email_extract": None}
+
+async def aparse_notice_message_node(state: GraphState) -> Dict[str, Optional[NoticeEmailExtract]]:
+    """Async version of parse_notice_message_node."""
     LOGGER.info("--- NODE: Parsing Notice Message ---")
+    if state.get("stream_extraction"):
+        return await _astream_parse_notice_message(state)
     try:
-        notice_email_extract = NOTICE_PARSER_CHAIN.invoke(
-            {"message": state["notice_message"]}
+        notice_email_extract = await get_pre_extracting_notice_parser().ainvoke(
+            {"message": load_text(state["notice_message"])}
         )
-        LOGGER.info(f"Parsing successful. Extracted: {notice_email_extract.model_dump_json(indent=2)}")
+        LOGGER.info("Parsing successful. Extracted: %s", lazy(notice_email_extract.model_dump_json, indent=2))
         return {"notice_email_extract": notice_email_extract}
     except Exception as e:
         LOGGER.error(f"Error parsing notice message: {e}", exc_info=True)
         return {"notice_email_extract": None}
 
+# Escalation is decided by a rule engine (utils/escalation_rules.py): the fine
+# against the dollar criteria, escalation keywords, then the model's check of
+# the text criteria, cheapest first and stopping at the first rule that
+# escalates. check_text_escalation runs in parallel with parsing, on the
+# fields the regexes find; when those already decide, the model is not asked.
+
+def _escalation_facts(state: GraphState, message: str, fields: Dict[str, Any]) -> EscalationFacts:
+    return EscalationFacts(
+        message=message,
+        text_criteria=state["escalation_text_criteria"],
+        dollar_criteria=state["escalation_dollar_criteria"],
+        fields=fields,
+    )
+
+def _log_text_check(outcome) -> Dict[str, Optional[bool]]:
+    text_check = outcome.results.get(TextCriteriaRule.name)
+    if TextCriteriaRule.name in outcome.skipped:
+        LOGGER.info(
+            "Escalation decided by %s before parsing -> text check skipped (~%.2fs saved)",
+            outcome.reason, outcome.seconds_saved,
+        )
+    else:
+        LOGGER.info("Text escalation check result: %s", text_check)
+    return {"text_escalation_check": text_check}
+
+def check_text_escalation_node(state: GraphState) -> Dict[str, Optional[bool]]:
+    """Evaluate the escalation rules on the raw notice message and the fields
+    the regexes find in it; the text check only runs if those don't decide.
+
+    Only needs the message and criteria, so it runs in parallel with
+    parse_notice_message_node.
+    """
+    LOGGER.info("--- NODE: Checking Text Escalation Criteria ---")
+    message = load_text(state["notice_message"])
+    outcome = escalation_rule_engine(state.get("escalation_keywords")).evaluate(
+        _escalation_facts(state, message, pre_extract_notice_fields(message))
+    )
+    return _log_text_check(outcome)
+
+async def acheck_text_escalation_node(state: GraphState) -> Dict[str, Optional[bool]]:
+    """Async version of check_text_escalation_node."""
+    LOGGER.info("--- NODE: Checking Text Escalation Criteria ---")
+    message = load_text(state["notice_message"])
+    outcome = await escalation_rule_engine(state.get("escalation_keywords")).aevaluate(
+        _escalation_facts(state, message, pre_extract_notice_fields(message))
+    )
+    return _log_text_check(outcome)
+
 def check_escalation_status_node(state: GraphState) -> Dict[str, bool]:
-    """Determine whether a notice needs escalation based on text and fine amount."""
+    """Determine whether a notice needs escalation based on text and fine amount.
+
+    Joins the parse and text-check branches: re-evaluates the cheap
+    escalation rules on the parsed notice, reusing the text check's result.
+    The model is never asked here. check_text_escalation settles the text
+    rule unless another rule escalated first, and that rule sees the same
+    fields again, since the parser keeps the regex-extracted ones.
+    """
     LOGGER.info("--- NODE: Checking Escalation Status ---")
+    writer = get_stream_writer()
+    if state.get("escalation_results") is not None:
+        LOGGER.info("Escalation already sent while parsing (fine over the criteria)")
+        return {"requires_escalation": True}
     notice_extract = state.get("notice_email_extract")
     if not notice_extract:
         LOGGER.warning("Cannot check escalation: notice_email_extract is missing. Defaulting to False.")
+        writer(_escalation_decision(False, None))
         return {"requires_escalation": False}
 
-    needs_escalation = False
-    try:
-        # Check text criteria
-        text_check = ESCALATION_CHECK_CHAIN.invoke(
-            {
-                "escalation_criteria": state["escalation_text_criteria"],
-                "message": state["notice_message"],
-            }
-        ).needs_escalation
-        LOGGER.info(f"Text escalation check result: {text_check}")
-
-        # Check dollar criteria (only if max_potential_fine exists)
-        fine_check = False
-        if notice_extract.max_potential_fine is not None:
-            fine_check = notice_extract.max_potential_fine >= state["escalation_dollar_criteria"]
-            LOGGER.info(f"Fine escalation check result (> {state['escalation_dollar_criteria']}): {fine_check}")
-        else:
-            LOGGER.info("No maximum potential fine found in notice for escalation check.")
-
-        needs_escalation = text_check or fine_check
-
-    except Exception as e:
-        LOGGER.error(f"Error checking escalation status: {e}", exc_info=True)
-        needs_escalation = False
+    outcome = escalation_rule_engine(state.get("escalation_keywords")).evaluate(
+        _escalation_facts(state, load_text(state["notice_message"]), notice_extract.model_dump()),
+        known={TextCriteriaRule.name: state.get("text_escalation_check")},
+        max_cost=RuleCost.PATTERN,
+    )
+    needs_escalation = bool(outcome.requires_escalation)
 
-    LOGGER.info(f"Final Escalation Required: {needs_escalation}")
+    LOGGER.info("Escalation rule results: %s", outcome.results)
+    LOGGER.info("Final Escalation Required: %s", needs_escalation)
+    writer(_escalation_decision(needs_escalation, outcome.reason))
     return {"requires_escalation": needs_escalation}
 
-def send_escalation_email_node(state: GraphState) -> Dict:
-    """Sends an escalation email if required data is present."""
+def send_escalation_email_node(state: GraphState) -> Dict[str, List[EscalationDeliveryResult]]:
+    """Sends escalation emails to all recipients concurrently if required data is present."""
     LOGGER.info("--- NODE: Sending Escalation Email ---")
     notice_extract = state.get("notice_email_extract")
     escalation_emails = state.get("escalation_emails")
 
     if notice_extract and escalation_emails:
-        send_escalation_email(
+        results = send_escalation_email(
             notice_email_extract=notice_extract,
             escalation_emails=escalation_emails,
         )
-    else:
-        LOGGER.warning("Cannot send escalation email: missing notice_email_extract or escalation_emails in state.")
+        return {"escalation_results": results}
+    LOGGER.warning("Cannot send escalation email: missing notice_email_extract or escalation_emails in state.")
+    return {}
+
+async def asend_escalation_email_node(state: GraphState) -> Dict[str, List[EscalationDeliveryResult]]:
+    """Async version of send_escalation_email_node."""
+    LOGGER.info("--- NODE: Sending Escalation Email ---")
+    notice_extract = state.get("notice_email_extract")
+    escalation_emails = state.get("escalation_emails")
+
+    if notice_extract and escalation_emails:
+        results = await asend_escalation_email(
+            notice_email_extract=notice_extract,
+            escalation_emails=escalation_emails,
+        )
+        return {"escalation_results": results}
+    LOGGER.warning("Cannot send escalation email: missing notice_email_extract or escalation_emails in state.")
     return {}
 
 def create_legal_ticket_node(state: GraphState) -> Dict[str, Optional[str]]:
@@ -124,25 +301,43 @@ def create_legal_ticket_node(state: GraphState) -> Dict[str, Optional[str]]:
         LOGGER.error(f"Error creating legal ticket: {e}", exc_info=True)
         return {"current_follow_up": None}
 
+async def acreate_legal_ticket_node(state: GraphState) -> Dict[str, Optional[str]]:
+    """Async version of create_legal_ticket_node."""
+    LOGGER.info("--- NODE: Creating Legal Ticket ---")
+    notice_extract = state.get("notice_email_extract")
+    if not notice_extract:
+        LOGGER.warning("Cannot create legal ticket: missing notice_email_extract in state.")
+        return {"current_follow_up": None}
+
+    try:
+        follow_up = await acreate_legal_ticket(
+            current_follow_ups=state.get("follow_ups"),
+            notice_email_extract=notice_extract,
+        )
+        return {"current_follow_up": follow_up}
+    except Exception as e:
+        LOGGER.error(f"Error creating legal ticket: {e}", exc_info=True)
+        return {"current_follow_up": None}
+
 def answer_follow_up_question_node(state: GraphState) -> Dict[str, Optional[Dict[str, bool]]]:
-    """Answers follow-up questions about the notice using BINARY_QUESTION_CHAIN."""
+    """Answers follow-up questions about the notice using get_binary_question_chain()."""
     LOGGER.info("--- NODE: Answering Follow-up Question ---")
     current_follow_up = state.get("current_follow_up")
-    notice_message = state.get("notice_message")
+    notice_message = load_text(state.get("notice_message"))
     current_answers = state.get("follow_ups") or {}
 
     updated_answers = current_answers.copy()
 
     if current_follow_up and notice_message:
-        LOGGER.info(f"Answering follow-up: '{current_follow_up}'")
+        LOGGER.info("Answering follow-up: '%s'", current_follow_up)
         try:
-            answer_obj = BINARY_QUESTION_CHAIN.invoke({
+            answer_obj = get_binary_question_chain().invoke({
                 "question": current_follow_up,
                 "context": notice_message
                 })
             answer = answer_obj.is_true
             updated_answers[current_follow_up] = answer
-            LOGGER.info(f"---> Answered '{current_follow_up}': {answer}")
+            LOGGER.info("---> Answered '%s': %s", current_follow_up, answer)
         except Exception as e:
              LOGGER.error(f"Error answering follow-up '{current_follow_up}': {e}", exc_info=True)
              updated_answers[current_follow_up] = None
@@ -153,73 +348,234 @@ def answer_follow_up_question_node(state: GraphState) -> Dict[str, Optional[Dict
 
     return {"follow_ups": updated_answers, "current_follow_up": None}
 
+async def aanswer_follow_up_question_node(state: GraphState) -> Dict[str, Optional[Dict[str, bool]]]:
+    """Async version of answer_follow_up_question_node."""
+    LOGGER.info("--- NODE: Answering Follow-up Question ---")
+    current_follow_up = state.get("current_follow_up")
+    notice_message = load_text(state.get("notice_message"))
+    current_answers = state.get("follow_ups") or {}
+
+    updated_answers = current_answers.copy()
+
+    if current_follow_up and notice_message:
+        LOGGER.info("Answering follow-up: '%s'", current_follow_up)
+        try:
+            answer_obj = await get_binary_question_chain().ainvoke({
+                "question": current_follow_up,
+                "context": notice_message
+                })
+            answer = answer_obj.is_true
+            updated_answers[current_follow_up] = answer
+            LOGGER.info("---> Answered '%s': %s", current_follow_up, answer)
+        except Exception as e:
+             LOGGER.error(f"Error answering follow-up '{current_follow_up}': {e}", exc_info=True)
+             updated_answers[current_follow_up] = None
+             LOGGER.warning(f"Could not answer follow-up '{current_follow_up}'. Storing None.")
+
+    else:
+        LOGGER.warning("Cannot answer follow-up: missing current_follow_up or notice_message in state.")
+
+    return {"follow_ups": updated_answers, "current_follow_up": None}
+
+def _pending_follow_up_questions(state: GraphState) -> List[str]:
+    """Known follow-up questions that have not been answered yet."""
+    answered = state.get("follow_ups") or {}
+    return [q for q in known_follow_up_questions() if q not in answered]
+
+def _apply_batch_answers(
+    questions: List[str], result, current_answers: Dict[str, bool]
+) -> Dict[str, bool]:
+    """Map numbered batch answers back onto their questions.
+
+    Questions the model skipped stay unanswered, so create_legal_ticket can
+    still ask them through the one-question-per-cycle path.
+    """
+    updated_answers = current_answers.copy()
+    for answer in result.answers:
+        if 1 <= answer.question_id <= len(questions):
+            question = questions[answer.question_id - 1]
+            updated_answers[question] = answer.is_true
+            LOGGER.info("---> Answered '%s': %s", question, answer.is_true)
+    return updated_answers
+
+def answer_all_follow_up_questions_node(state: GraphState) -> Dict[str, Optional[Dict[str, bool]]]:
+    """Answers every known follow-up question up front in a single
+    BATCH_BINARY_QUESTION_CHAIN call, so the ticket is created in one go."""
+    LOGGER.info("--- NODE: Answering All Follow-up Questions ---")
+    current_answers = state.get("follow_ups") or {}
+    questions = _pending_follow_up_questions(state)
+    if not questions:
+        return {"follow_ups": current_answers}
+
+    try:
+        result = get_batch_binary_question_chain().invoke({
+            "questions": format_numbered_questions(questions),
+            "context": load_text(state["notice_message"]),
+            })
+        return {"follow_ups": _apply_batch_answers(questions, result, current_answers)}
+    except Exception as e:
+        LOGGER.error(f"Error answering follow-ups in batch: {e}", exc_info=True)
+        return {"follow_ups": current_answers}
+
+async def aanswer_all_follow_up_questions_node(state: GraphState) -> Dict[str, Optional[Dict[str, bool]]]:
+    """Async version of answer_all_follow_up_questions_node."""
+    LOGGER.info("--- NODE: Answering All Follow-up Questions ---")
+    current_answers = state.get("follow_ups") or {}
+    questions = _pending_follow_up_questions(state)
+    if not questions:
+        return {"follow_ups": current_answers}
+
+    try:
+        result = await get_batch_binary_question_chain().ainvoke({
+            "questions": format_numbered_questions(questions),
+            "context": load_text(state["notice_message"]),
+            })
+        return {"follow_ups": _apply_batch_answers(questions, result, current_answers)}
+    except Exception as e:
+        LOGGER.error(f"Error answering follow-ups in batch: {e}", exc_info=True)
+        return {"follow_ups": current_answers}
+
 # --- Edge Functions ---
 
+def _ticket_entry_node(state: GraphState) -> str:
+    """In batch mode, follow-ups are answered before the ticket is created."""
+    if state.get("batch_follow_ups"):
+        return "answer_all_follow_up_questions"
+    return "create_legal_ticket"
+
 def route_escalation_status_edge(state: GraphState) -> str:
     """Determine whether to send an escalation email or create a legal ticket."""
     LOGGER.info("--- EDGE: Routing Escalation Status ---")
     if state.get("requires_escalation", False):
-        LOGGER.info("Decision: Escalation needed -> Route to send_escalation_email")
-        return "send_escalation_email"
+        if state.get("escalation_results") is None:
+            ROUTING_LOGGER.info("Decision: Escalation needed -> Route to send_escalation_email")
+            return "send_escalation_email"
+        next_node = _ticket_entry_node(state)
+        ROUTING_LOGGER.info("Decision: Escalation already sent while parsing -> Route to %s", next_node)
+        return next_node
     else:
-        LOGGER.info("Decision: No escalation needed -> Route to create_legal_ticket")
-        return "create_legal_ticket"
+        next_node = _ticket_entry_node(state)
+        ROUTING_LOGGER.info("Decision: No escalation needed -> Route to %s", next_node)
+        return next_node
+
+def route_ticket_entry_edge(state: GraphState) -> str:
+    """After escalation, go to ticket creation (answering follow-ups first in batch mode)."""
+    LOGGER.info("--- EDGE: Routing To Ticket Creation ---")
+    next_node = _ticket_entry_node(state)
+    ROUTING_LOGGER.info("Decision: Route to %s", next_node)
+    return next_node
 
 def route_follow_up_edge(state: GraphState) -> str:
     """Determine whether a follow-up question is required from create_legal_ticket."""
     LOGGER.info("--- EDGE: Routing Follow-up Status ---")
     if state.get("current_follow_up"):
-        LOGGER.info(f"Decision: Follow-up '{state['current_follow_up']}' received -> Route to answer_follow_up_question")
+        ROUTING_LOGGER.info("Decision: Follow-up '%s' received -> Route to answer_follow_up_question", state['current_follow_up'])
         return "answer_follow_up_question"
     else:
-        LOGGER.info("Decision: No follow-up question -> Route to END")
+        ROUTING_LOGGER.info("Decision: No follow-up question -> Route to END")
         return END
 
 # --- Build the Graph ---
 
-LOGGER.info("Building Notice Extraction Graph...")
-workflow = StateGraph(GraphState)
-
-# Add nodes
-workflow.add_node("parse_notice_message", parse_notice_message_node)
-workflow.add_node("check_escalation_status", check_escalation_status_node)
-workflow.add_node("send_escalation_email", send_escalation_email_node)
-workflow.add_node("create_legal_ticket", create_legal_ticket_node)
-workflow.add_node("answer_follow_up_question", answer_follow_up_question_node)
-
-# Add edges
-workflow.set_entry_point("parse_notice_message")
-workflow.add_edge("parse_notice_message", "check_escalation_status")
-
-# Conditional edge for escalation
-workflow.add_conditional_edges(
-    "check_escalation_status",
-    route_escalation_status_edge,
-    {
-        "send_escalation_email": "send_escalation_email",
-        "create_legal_ticket": "create_legal_ticket",
-    },
-)
-
-# Edge after sending email (if needed)
-workflow.add_edge("send_escalation_email", "create_legal_ticket")
-
-# Conditional edge AFTER creating ticket - determines cycle or end
-workflow.add_conditional_edges(
-    "create_legal_ticket",
-    route_follow_up_edge,
-    {
-        "answer_follow_up_question": "answer_follow_up_question",
-        END: END,
-    },
-)
-
-# Edge AFTER answering follow-up - ALWAYS go back to try creating ticket again
-workflow.add_edge("answer_follow_up_question", "create_legal_ticket")
-
-# Compile the graph
-NOTICE_EXTRACTION_GRAPH = workflow.compile()
-LOGGER.info("Notice Extraction Graph compiled successfully.")
+def build_notice_extraction_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """Assemble and compile the notice extraction graph.
+
+    With a checkpointer (default: get_checkpointer(), see utils/checkpointing.py),
+    runs given a thread_id in their config save their state after every node
+    and resume from the last completed node when invoked again.
+    """
+    LOGGER.info("Building Notice Extraction Graph...")
+    workflow = StateGraph(GraphState)
+
+    # Add nodes
+    # Each node carries a sync and an async implementation, so the compiled graph
+    # can be driven with invoke/stream as well as ainvoke/astream.
+    workflow.add_node(
+        "parse_notice_message",
+        RunnableLambda(parse_notice_message_node, afunc=aparse_notice_message_node),
+    )
+    workflow.add_node(
+        "check_text_escalation",
+        RunnableLambda(check_text_escalation_node, afunc=acheck_text_escalation_node),
+    )
+    workflow.add_node("check_escalation_status", check_escalation_status_node)
+    workflow.add_node(
+        "send_escalation_email",
+        RunnableLambda(send_escalation_email_node, afunc=asend_escalation_email_node),
+    )
+    workflow.add_node(
+        "create_legal_ticket",
+        RunnableLambda(create_legal_ticket_node, afunc=acreate_legal_ticket_node),
+    )
+    workflow.add_node(
+        "answer_follow_up_question",
+        RunnableLambda(answer_follow_up_question_node, afunc=aanswer_follow_up_question_node),
+    )
+    workflow.add_node(
+        "answer_all_follow_up_questions",
+        RunnableLambda(answer_all_follow_up_questions_node, afunc=aanswer_all_follow_up_questions_node),
+    )
+
+    # Add edges
+    # Parsing and the text escalation check are independent LLM calls, so they fan
+    # out in parallel from START and join in check_escalation_status.
+    workflow.add_edge(START, "parse_notice_message")
+    workflow.add_edge(START, "check_text_escalation")
+    workflow.add_edge(["parse_notice_message", "check_text_escalation"], "check_escalation_status")
+
+    # Conditional edge for escalation
+    workflow.add_conditional_edges(
+        "check_escalation_status",
+        route_escalation_status_edge,
+        {
+            "send_escalation_email": "send_escalation_email",
+            "answer_all_follow_up_questions": "answer_all_follow_up_questions",
+            "create_legal_ticket": "create_legal_ticket",
+        },
+    )
+
+    # Edge after sending email (if needed)
+    workflow.add_conditional_edges(
+        "send_escalation_email",
+        route_ticket_entry_edge,
+        {
+            "answer_all_follow_up_questions": "answer_all_follow_up_questions",
+            "create_legal_ticket": "create_legal_ticket",
+        },
+    )
+
+    # Batch mode: all follow-ups answered up front, then the ticket is created once
+    workflow.add_edge("answer_all_follow_up_questions", "create_legal_ticket")
+
+    # Conditional edge AFTER creating ticket - determines cycle or end
+    workflow.add_conditional_edges(
+        "create_legal_ticket",
+        route_follow_up_edge,
+        {
+            "answer_follow_up_question": "answer_follow_up_question",
+            END: END,
+        },
+    )
+
+    # Edge AFTER answering follow-up - ALWAYS go back to try creating ticket again
+    workflow.add_edge("answer_follow_up_question", "create_legal_ticket")
+
+    # Compile the graph
+    # Runs without a thread_id are not persisted (the thread_id=None default)
+    graph = workflow.compile(checkpointer=checkpointer or get_checkpointer(), name="notice_extraction").with_config(
+        configurable={"thread_id": None}
+    )
+    # Node, model and tool timings go to the metrics registry (utils/metrics.py)
+    graph = instrument_graph(graph, cycle_nodes=("answer_follow_up_question", "answer_all_follow_up_questions"))
+    LOGGER.info("Notice Extraction Graph compiled successfully.")
+    return graph
+
+def get_notice_extraction_graph():
+    """The compiled notice extraction graph, built on first use."""
+    return lazy_global(globals(), "NOTICE_EXTRACTION_GRAPH", build_notice_extraction_graph)
+
+# NOTICE_EXTRACTION_GRAPH stays importable by name
+__getattr__ = lazy_module_getattr(__name__, {"NOTICE_EXTRACTION_GRAPH": get_notice_extraction_graph})
 
 
 # --- Testing --- (Optional: Keep for standalone testing)
@@ -237,15 +593,18 @@ if __name__ == "__main__":
         "notice_email_extract": None,
         "escalation_text_criteria": "Workers explicitly violating safety protocols",
         "escalation_dollar_criteria": 20000.0,
+        "text_escalation_check": None,
         "requires_escalation": False,
         "escalation_emails": ["manager1@example.com", "ceo@example.com"],
+        "escalation_results": None,
         "follow_ups": None,
         "current_follow_up": None,
+        "batch_follow_ups": False,
     }
 
     print("\n--- Running Test Case 1 (Should Escalate & Cycle) --- ")
     final_state_1 = None
-    for event in NOTICE_EXTRACTION_GRAPH.stream(test_state_1, stream_mode="values"):
+    for event in get_notice_extraction_graph().stream(test_state_1, stream_mode="values"):
         print("\n--- Graph Step Output --- Key: ", list(event.keys())[0]) # Show node that produced output
         final_state_1 = event
         pass
@@ -260,19 +619,22 @@ if __name__ == "__main__":
 
     print(json.dumps(final_state_1, indent=2, default=default_serializer))
 
-    print("\n--- Running Test Case 2 (Should NOT Escalate) ---")
+    print("\n--- Running Test Case 2 (Should NOT Escalate, Batched Follow-ups) ---")
     test_state_2 = {
         "notice_message": EMAILS[1],
         "notice_email_extract": None,
         "escalation_text_criteria": "Mentions fire or structural damage",
         "escalation_dollar_criteria": 1000000.0,
+        "text_escalation_check": None,
         "requires_escalation": False,
         "escalation_emails": ["manager1@example.com"],
+        "escalation_results": None,
         "follow_ups": None,
         "current_follow_up": None,
+        "batch_follow_ups": True,
     }
     final_state_2 = None
-    for event in NOTICE_EXTRACTION_GRAPH.stream(test_state_2, stream_mode="values"):
+    for event in get_notice_extraction_graph().stream(test_state_2, stream_mode="values"):
         print("\n--- Graph Step Output --- Key: ", list(event.keys())[0]) # Show node that produced output
         final_state_2 = event
         pass
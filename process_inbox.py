@@ -0,0 +1,296 @@
+"""Bulk inbox processing: push emails through email_agent_graph with bounded
+concurrency and stream one JSON result per email as each one finishes.
+
+Input is a JSONL file (one {"id": ..., "email": ...} object or JSON string per
+line), a directory (one email per file, id = file name) or "-" for JSONL on
+stdin. Results are written to --output (default stdout) as JSONL.
+
+By default emails are not taken strictly in arrival order: up to --lookahead
+of them are read ahead and the most urgent (regulatory notices with a close
+deadline or a large fine, see utils/urgency.py) go first. With stdin fed by
+a mail source, this is also how the CLI runs as a long-lived service.
+
+Run from the project root:
+    python process_inbox.py emails.jsonl --output results.jsonl --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from graphs.email_agent import build_agent_input, get_email_agent_graph, is_fast_path_message
+from utils.checkpointing import arun_checkpointed, message_id
+from utils.logging_config import LOGGER
+from utils.metrics import write_metrics
+from utils.model_clients import aprewarm_connections
+from utils.outbox import get_outbox, get_outbox_workers
+from utils.urgency import AGING_SECONDS, UrgencyQueue, estimate_urgency
+
+
+def _iter_jsonl(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (id, email) pairs from JSONL lines, skipping malformed ones."""
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield str(line_no), record
+            else:
+                yield str(record.get("id", line_no)), record["email"]
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            LOGGER.warning(f"Skipping malformed input line {line_no}: {e}")
+
+
+def iter_emails(source: str) -> Iterator[Tuple[str, str]]:
+    """Lazily yield (id, email) pairs from a JSONL file, a directory or stdin."""
+    if source == "-":
+        yield from _iter_jsonl(sys.stdin)
+    elif os.path.isdir(source):
+        # scandir keeps memory constant even for very large directories
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    with open(entry.path, encoding="utf-8", errors="replace") as f:
+                        yield entry.name, f.read()
+    else:
+        with open(source, encoding="utf-8") as f:
+            yield from _iter_jsonl(f)
+
+
+def summarize_agent_run(messages: List[BaseMessage]) -> Dict[str, Any]:
+    """Reduce an agent run's messages to the fields reported per email."""
+    tool_calls = [
+        call["name"]
+        for message in messages
+        if isinstance(message, AIMessage)
+        for call in message.tool_calls
+    ]
+    notice_email_extract = None
+    requires_escalation = None
+    for message in messages:
+        if isinstance(message, ToolMessage) and message.name == "extract_notice_data" and message.artifact:
+            extract = message.artifact.get("notice_email_extract")
+            notice_email_extract = extract.model_dump(mode="json") if extract else None
+            requires_escalation = message.artifact.get("requires_escalation")
+    final_response = messages[-1].content if messages and isinstance(messages[-1], AIMessage) else None
+    return {
+        "fast_path": any(is_fast_path_message(message) for message in messages),
+        "tool_calls": tool_calls,
+        "notice_email_extract": notice_email_extract,
+        "requires_escalation": requires_escalation,
+        "final_response": final_response,
+    }
+
+
+async def process_email(
+    email_id: str,
+    email: str,
+    escalation_criteria: Optional[str],
+    recursion_limit: int,
+) -> Dict[str, Any]:
+    """Run one email through the agent graph and build its result record."""
+    start = time.perf_counter()
+    try:
+        # Checkpointed per email, so emails interrupted by a crash resume where they stopped
+        final_state = await arun_checkpointed(
+            get_email_agent_graph(),
+            {"messages": [HumanMessage(content=build_agent_input(email, escalation_criteria))]},
+            f"email-{message_id(email)}",
+            config={"recursion_limit": recursion_limit},
+        )
+        result = {"status": "ok", **summarize_agent_run(final_state["messages"])}
+    except Exception as e:
+        LOGGER.error(f"Error processing email {email_id}: {e}", exc_info=True)
+        result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    return {"id": email_id, **result, "latency_s": round(time.perf_counter() - start, 3)}
+
+
+async def process_inbox(
+    emails: Iterable[Tuple[str, str]],
+    output: TextIO,
+    concurrency: int = 8,
+    escalation_criteria: Optional[str] = None,
+    recursion_limit: int = 10,
+    prewarm: int = 0,
+    order: str = "urgency",
+    lookahead: int = 1000,
+    aging_seconds: float = AGING_SECONDS,
+) -> Dict[str, Any]:
+    """Process emails with at most `concurrency` in flight, writing each result
+    to `output` as soon as it finishes. Returns throughput statistics.
+
+    Emails are pulled from the iterable by a reader thread, as reading may
+    block, into a bounded queue, so memory stays constant regardless of
+    input size. With order="urgency" the queue holds up to `lookahead`
+    emails and hands out the most urgent first, aged by `aging_seconds` (see
+    utils/urgency.py); with order="arrival" it is a FIFO. With `prewarm`, that many model API connections are opened before
+    the first email.
+    """
+    if prewarm:
+        await aprewarm_connections(prewarm)
+    # The reader thread bounds the queue itself, through `room`
+    if order == "urgency":
+        queue: asyncio.Queue = UrgencyQueue(lambda item: item[2].score, aging_seconds=aging_seconds)
+        room = threading.Semaphore(lookahead)
+    else:
+        queue = asyncio.Queue()
+        room = threading.Semaphore(concurrency * 2)
+    stats = {"processed": 0, "errors": 0, "fast_path": 0}
+    latency_totals = {True: 0.0, False: 0.0}
+
+    loop = asyncio.get_running_loop()
+    stopped = threading.Event()
+
+    def read(done: asyncio.Future) -> None:
+        try:
+            for email_id, email in emails:
+                urgency = estimate_urgency(email) if order == "urgency" else None
+                while not room.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                loop.call_soon_threadsafe(queue.put_nowait, (email_id, email, urgency, time.perf_counter()))
+            for _ in range(concurrency):
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+        except BaseException as e:
+            loop.call_soon_threadsafe(lambda error=e: done.done() or done.set_exception(error))
+        else:
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+    async def produce() -> None:
+        # Reading the source (file, directory, stdin) blocks and scoring is
+        # CPU work, so both run on a reader thread while the workers go on.
+        # A daemon thread: one blocked on stdin must not hold up the exit.
+        done = loop.create_future()
+        threading.Thread(target=read, args=(done,), name="inbox-reader", daemon=True).start()
+        try:
+            await done
+        finally:
+            stopped.set()
+
+    async def work() -> None:
+        while (item := await queue.get()) is not None:
+            room.release()
+            email_id, email, urgency, queued_at = item
+            queued_s = round(time.perf_counter() - queued_at, 3)
+            result = await process_email(email_id, email, escalation_criteria, recursion_limit)
+            result["queued_s"] = queued_s
+            if urgency is not None:
+                result["urgency"] = round(urgency.score, 2)
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            stats["processed"] += 1
+            if result["status"] == "error":
+                stats["errors"] += 1
+                continue
+            stats["fast_path"] += result["fast_path"]
+            latency_totals[result["fast_path"]] += result["latency_s"]
+
+    start = time.perf_counter()
+    await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["emails_per_s"] = round(stats["processed"] / elapsed, 3) if elapsed else 0.0
+    stats.update(_fast_path_stats(stats, latency_totals))
+    return stats
+
+
+def _fast_path_stats(stats: Dict[str, Any], latency_totals: Dict[bool, float]) -> Dict[str, Any]:
+    """Fraction of emails that bypassed the agent model and the latency that saved,
+    estimated from the mean latency of emails that went through the agent."""
+    succeeded = stats["processed"] - stats["errors"]
+    fast, agent = stats["fast_path"], succeeded - stats["fast_path"]
+    mean_fast = latency_totals[True] / fast if fast else 0.0
+    mean_agent = latency_totals[False] / agent if agent else 0.0
+    return {
+        "fast_path_fraction": round(fast / succeeded, 3) if succeeded else 0.0,
+        "mean_latency_fast_path_s": round(mean_fast, 3),
+        "mean_latency_agent_s": round(mean_agent, 3),
+        "estimated_latency_saved_s": round(max(mean_agent - mean_fast, 0.0) * fast, 3) if agent else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process an inbox of emails with the email agent graph.")
+    parser.add_argument("source", help="JSONL file, directory of emails, or '-' for JSONL on stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Max emails in flight")
+    parser.add_argument("--escalation-criteria", default=None, help="Escalation criteria for regulatory notices")
+    parser.add_argument("--recursion-limit", type=int, default=10)
+    parser.add_argument(
+        "--order", choices=("urgency", "arrival"), default="urgency",
+        help="Most urgent notices first (default), or strictly in arrival order",
+    )
+    parser.add_argument("--lookahead", type=int, default=1000, help="Emails read ahead to order by urgency")
+    parser.add_argument(
+        "--aging-seconds", type=float, default=AGING_SECONDS,
+        help="Waiting this long raises an email's urgency by one point",
+    )
+    parser.add_argument(
+        "--outbox-drain-timeout", type=float, default=60.0,
+        help="Seconds to wait for queued email sends before exiting (unsent ones stay in the outbox)",
+    )
+    parser.add_argument(
+        "--no-prewarm", action="store_true",
+        help="Skip opening --concurrency model API connections before the first email",
+    )
+    parser.add_argument(
+        "--metrics", metavar="PATH",
+        help="Write node, model and tool metrics at exit (Prometheus text for *.prom, else JSON)",
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    LOGGER.setLevel(args.log_level.upper())
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = asyncio.run(
+            process_inbox(
+                iter_emails(args.source),
+                output,
+                concurrency=args.concurrency,
+                escalation_criteria=args.escalation_criteria,
+                recursion_limit=args.recursion_limit,
+                prewarm=0 if args.no_prewarm else args.concurrency,
+                order=args.order,
+                lookahead=args.lookahead,
+                aging_seconds=args.aging_seconds,
+            )
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        f"Processed {stats['processed']} emails ({stats['errors']} errors) in "
+        f"{stats['elapsed_s']:.1f}s - {stats['emails_per_s']:.2f} emails/s",
+        file=sys.stderr,
+    )
+    saved = stats["estimated_latency_saved_s"]
+    print(
+        f"Fast path handled {stats['fast_path_fraction']:.1%} without the agent model "
+        f"(mean {stats['mean_latency_fast_path_s']:.2f}s vs {stats['mean_latency_agent_s']:.2f}s"
+        + (f", ~{saved:.1f}s saved)" if saved is not None else ")"),
+        file=sys.stderr,
+    )
+
+    # Tools only queue their sends; give the outbox workers a chance to finish
+    workers = get_outbox_workers()
+    if not workers.drain(timeout=args.outbox_drain_timeout):
+        LOGGER.warning("Outbox not drained; remaining sends will be delivered on the next run.")
+    workers.stop()
+    print(f"Outbox: {get_outbox().counts()}", file=sys.stderr)
+    if args.metrics:
+        write_metrics(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
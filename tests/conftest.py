@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Tests import the project's packages the way the scripts do, from the root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Before anything builds a model or opens a store: keeps keys and checkpoints
+# of test runs out of the project directory
+import benchmarks.fake_llm  # noqa: E402,F401
+
+import pytest  # noqa: E402
+
+from benchmarks.fake_llm import install_fake_notice_chains  # noqa: E402
+from utils.graph_utils import configure_simulation  # noqa: E402
+
+# No simulated API delays in tests
+configure_simulation(delay_scale=0.0, seed=0)
+
+
+@pytest.fixture
+def fake_notice_chains(monkeypatch):
+    """The notice graph's chains swapped for fakes for one test. Yields the
+    fakes by name."""
+    from chains import binary_questions, escalation_check, notice_extraction
+
+    modules = {
+        "PRE_EXTRACTING_NOTICE_PARSER": notice_extraction,
+        "NOTICE_PARSER_CHAIN": notice_extraction,
+        "ESCALATION_CHECK_CHAIN": escalation_check,
+        "BINARY_QUESTION_CHAIN": binary_questions,
+        "BATCH_BINARY_QUESTION_CHAIN": binary_questions,
+    }
+    # Registered first, so the originals (or their absence) come back afterwards
+    for name, module in modules.items():
+        monkeypatch.setattr(module, name, module.__dict__.get(name), raising=False)
+    yield install_fake_notice_chains()
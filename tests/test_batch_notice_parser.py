@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from benchmarks.batch_extraction import answer_batch
+from benchmarks.fake_llm import CANNED_NOTICE_EXTRACT, FakeStructuredChain
+from chains import notice_extraction
+from chains.notice_extraction import BatchNoticeParser, NoticeExtractBatch
+from graphs.example_emails import EMAILS
+
+
+def _install(monkeypatch, batch_output, latency=0.0):
+    single = FakeStructuredChain(CANNED_NOTICE_EXTRACT)
+    batch = FakeStructuredChain(batch_output, latency)
+    monkeypatch.setattr(notice_extraction, "NOTICE_PARSER_CHAIN", single, raising=False)
+    monkeypatch.setattr(notice_extraction, "BATCH_NOTICE_PARSER_CHAIN", batch, raising=False)
+    return single, batch
+
+
+def _notices(count: int) -> list:
+    return [(str(i), f"{EMAILS[(0, 3)[i % 2]]}\nReference: BF-{i:06d}") for i in range(count)]
+
+
+def test_batch_extracts_matching_their_notices_are_kept(monkeypatch):
+    single, batch = _install(monkeypatch, answer_batch)
+    extracts = BatchNoticeParser(max_notices=4).invoke(_notices(4))
+    assert batch.calls == 1 and single.calls == 0
+    assert extracts["1"].entity_email == "inspections@lacity.gov"
+
+
+def test_swapped_batch_extracts_fall_back_to_single_parses(monkeypatch):
+    def swapped(input: dict) -> NoticeExtractBatch:
+        # The model files each notice's extract under its neighbour's number
+        result = answer_batch(input)
+        ids = [item.notice_id for item in result.extracts]
+        for item, notice_id in zip(result.extracts, reversed(ids)):
+            item.notice_id = notice_id
+        return result
+
+    single, _ = _install(monkeypatch, swapped)
+    parser = BatchNoticeParser(max_notices=2)
+    extracts = parser.invoke(_notices(2))
+    assert parser.single_calls == 2 and single.calls == 2
+    assert set(extracts) == {"0", "1"}
+
+
+def test_ainvoke_keeps_at_most_concurrency_batches_in_flight(monkeypatch):
+    in_flight = peak = 0
+    _, batch = _install(monkeypatch, answer_batch)
+
+    async def tracked(input, config=None, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return answer_batch(input)
+
+    monkeypatch.setattr(batch, "ainvoke", tracked)
+    parser = BatchNoticeParser(max_notices=2)
+    extracts = asyncio.run(parser.ainvoke(_notices(40), concurrency=3))
+    assert len(extracts) == 40 and all(extracts.values())
+    assert peak == 3
+    assert parser.single_calls == 0
+
+
+def test_a_failing_batch_stops_the_other_workers_and_the_producer(monkeypatch):
+    _install(monkeypatch, answer_batch, latency=0.01)
+    pulled = []
+
+    def notices():
+        for notice in _notices(1000):
+            pulled.append(notice)
+            yield notice
+
+    def fail(batch, extracts):
+        raise RuntimeError("output closed")
+
+    async def run():
+        with pytest.raises(RuntimeError, match="output closed"):
+            await BatchNoticeParser(max_notices=2).aparse_batches(notices(), fail, concurrency=3)
+        # No producer or worker is left running on the loop
+        assert not [task for task in asyncio.all_tasks() if task.get_coro().__name__ in ("produce", "work")]
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert len(pulled) < 40
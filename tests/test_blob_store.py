@@ -0,0 +1,33 @@
+import pytest
+
+from utils.blob_store import BlobNotFound, BlobStore, InMemoryBlobStore, MmapBlobStore, is_blob_ref
+
+
+@pytest.mark.parametrize("make_store", [
+    lambda tmp_path: InMemoryBlobStore(min_chars=10),
+    lambda tmp_path: MmapBlobStore(str(tmp_path / "blobs"), min_chars=10),
+])
+def test_put_returns_a_reference_get_resolves(tmp_path, make_store):
+    store = make_store(tmp_path)
+    text = "Notice of violation " * 20
+    ref = store.put(text)
+    assert is_blob_ref(ref) and ref in store
+    assert store.put(text) == ref
+    assert store.get(ref) == text
+
+
+def test_evicted_reference_raises_blob_not_found():
+    store = InMemoryBlobStore(max_chars=100, min_chars=10)
+    first = store.put("a" * 60)
+    store.put("b" * 60)
+    with pytest.raises(BlobNotFound):
+        store.get(first)
+
+
+def test_store_missing_a_method_fails_at_construction():
+    class WriteOnly(BlobStore):
+        def put(self, text):
+            return text
+
+    with pytest.raises(TypeError):
+        WriteOnly()
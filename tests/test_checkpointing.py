@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from utils.checkpointing import SQLiteCheckpointSaver, _thread_lock, arun_checkpointed, run_checkpointed
+
+
+class _State(TypedDict):
+    steps: list
+
+
+def _flaky_graph(tmp_path, calls: dict, fail_once: bool = True):
+    """extract -> answer, where answer fails on its first call."""
+
+    def extract(state):
+        calls["extract"] = calls.get("extract", 0) + 1
+        return {"steps": state["steps"] + ["extract"]}
+
+    def answer(state):
+        calls["answer"] = calls.get("answer", 0) + 1
+        if fail_once and calls["answer"] == 1:
+            raise RuntimeError("model unavailable")
+        return {"steps": state["steps"] + ["answer"]}
+
+    builder = StateGraph(_State)
+    builder.add_node("extract", extract)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "extract")
+    builder.add_edge("extract", "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite")))
+
+
+def test_failed_run_resumes_from_its_last_completed_node(tmp_path):
+    calls = {}
+    graph = _flaky_graph(tmp_path, calls)
+    with pytest.raises(RuntimeError):
+        run_checkpointed(graph, {"steps": []}, "email-1")
+
+    result = run_checkpointed(graph, {"steps": []}, "email-1")
+    assert result["steps"] == ["extract", "answer"]
+    assert calls == {"extract": 1, "answer": 2}
+    # A finished thread's checkpoints are dropped
+    assert graph.get_state({"configurable": {"thread_id": "email-1"}}).values == {}
+
+
+def test_async_run_resumes_from_its_last_completed_node(tmp_path):
+    calls = {}
+    graph = _flaky_graph(tmp_path, calls)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await arun_checkpointed(graph, {"steps": []}, "email-1")
+        return await arun_checkpointed(graph, {"steps": []}, "email-1")
+
+    assert asyncio.run(run())["steps"] == ["extract", "answer"]
+    assert calls == {"extract": 1, "answer": 2}
+
+
+def test_async_runs_of_one_thread_take_turns_without_blocking_the_loop(tmp_path):
+    graph = _flaky_graph(tmp_path, {}, fail_once=False)
+    thread_lock_held = threading.Event()
+    release = threading.Event()
+
+    def sync_run():
+        # A sync run of the same thread holds it while the async runs queue up
+        with _thread_lock("email-1"):
+            thread_lock_held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=sync_run)
+    holder.start()
+    thread_lock_held.wait(5)
+
+    async def run():
+        runs = [asyncio.create_task(arun_checkpointed(graph, {"steps": []}, "email-1")) for _ in range(3)]
+        # The loop stays free while the runs wait for the lock
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not any(run.done() for run in runs)
+        release.set()
+        return ticks, await asyncio.gather(*runs)
+
+    ticks, results = asyncio.run(run())
+    holder.join()
+    assert ticks == 5
+    assert [result["steps"] for result in results] == [["extract", "answer"]] * 3
@@ -0,0 +1,24 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from utils.context_compaction import compact_messages
+
+
+def _turn(call_id: str, body: str) -> list:
+    return [
+        AIMessage(content="", tool_calls=[{"name": "forward_email", "args": {"email_message": body}, "id": call_id}]),
+        ToolMessage(content=body, tool_call_id=call_id),
+    ]
+
+
+def test_only_earlier_turns_lose_long_arguments_and_outputs():
+    body = "x" * 5000
+    messages = [HumanMessage(content=body), *_turn("1", body), *_turn("2", body)]
+    compacted = compact_messages(messages, tool_output_max_chars=2000, stale_tool_output_max_chars=100, tool_arg_max_chars=200)
+
+    assert compacted[0] is messages[0]
+    assert compacted[1].tool_calls[0]["args"]["email_message"] == "[5000 chars omitted]"
+    assert len(compacted[2].content) < 200
+    # The latest turn's call is sent as the model made it
+    assert compacted[3] is messages[3]
+    assert compacted[3].tool_calls[0]["args"]["email_message"] == body
+    assert 2000 <= len(compacted[4].content) < 2100
@@ -0,0 +1,73 @@
+import pytest
+
+from chains import escalation_check
+from graphs import notice_extraction
+from graphs.email_agent import _build_notice_state
+from graphs.example_emails import EMAILS
+from utils.escalation_rules import (
+    EscalationFacts,
+    EscalationRule,
+    FieldThresholdRule,
+    KeywordRule,
+    RuleCost,
+    RuleEngine,
+    TextCriteriaRule,
+)
+
+CRITERIA = "Workers explicitly violating safety protocols"
+
+
+class CountingTextRule(TextCriteriaRule):
+    def __init__(self, answer: bool):
+        super().__init__()
+        self.answer = answer
+        self.calls = 0
+
+    def evaluate(self, facts: EscalationFacts):
+        self.calls += 1
+        return self.answer
+
+
+def _facts(fine=None) -> EscalationFacts:
+    fields = {} if fine is None else {"max_potential_fine": fine}
+    return EscalationFacts(message="Notice of violation", text_criteria=CRITERIA, dollar_criteria=10_000.0, fields=fields)
+
+
+def test_cheap_rules_decide_before_the_model_is_asked():
+    text = CountingTextRule(answer=True)
+    engine = RuleEngine([text, KeywordRule(["stop work"]), FieldThresholdRule()])
+    outcome = engine.evaluate(_facts(fine=25_000.0))
+    assert outcome.requires_escalation and outcome.reason == "max_potential_fine"
+    assert text.calls == 0 and outcome.skipped == ["keywords", "text"]
+
+
+def test_max_cost_leaves_the_model_rule_undecided():
+    text = CountingTextRule(answer=True)
+    engine = RuleEngine([FieldThresholdRule(), text])
+    outcome = engine.evaluate(_facts(fine=500.0), known={text.name: None}, max_cost=RuleCost.PATTERN)
+    assert outcome.requires_escalation is None
+    assert text.calls == 0
+    # A result settled earlier still counts
+    assert engine.evaluate(_facts(fine=500.0), known={text.name: True}, max_cost=RuleCost.PATTERN).requires_escalation
+
+
+def test_notice_graph_asks_the_model_at_most_once(fake_notice_chains):
+    graph = notice_extraction.get_notice_extraction_graph()
+    check = fake_notice_chains["ESCALATION_CHECK_CHAIN"]
+    for dollar_criteria, calls in ((10_000.0, 0), (1e7, 1)):
+        # The OSHA notice's $25,000 fine decides below 10,000, not below 10,000,000
+        before = check.calls
+        state = {**_build_notice_state(EMAILS[0], CRITERIA), "escalation_dollar_criteria": dollar_criteria}
+        result = graph.invoke(state)
+        assert result["requires_escalation"] is True
+        assert check.calls - before == calls
+        assert escalation_check.ESCALATION_CHECK_CHAIN is check
+
+
+def test_rule_without_evaluate_fails_at_construction():
+    class Unfinished(EscalationRule):
+        name = "unfinished"
+        cost = RuleCost.FIELD
+
+    with pytest.raises(TypeError):
+        Unfinished()
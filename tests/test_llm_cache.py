@@ -0,0 +1,85 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.fake_llm import FakeStructuredChain
+from chains.escalation_check import EscalationCheck
+from utils.llm_cache import CacheBackend, CachedChain, SQLiteCache, set_cache_backend
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_entries=10, evict_every=5, touch_seconds=0.0)
+    set_cache_backend(cache)
+    yield cache
+    set_cache_backend(None)
+
+
+def test_size_eviction_keeps_recently_used_entries(sqlite_cache):
+    for i in range(10):
+        sqlite_cache.set(f"k{i}", str(i))
+    time.sleep(0.01)
+    assert sqlite_cache.get("k0") == "0"  # now the most recently used
+    sqlite_cache.set("k10", "10")  # past max_entries: trimmed to 9
+    assert len(sqlite_cache) == 9
+    assert sqlite_cache.get("k0") == "0"
+    assert sqlite_cache.get("k1") is None and sqlite_cache.get("k2") is None
+
+
+def test_ttl_eviction_runs_every_few_writes(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=0.05, evict_every=3)
+    cache.set("a", "1")
+    cache.set("b", "1")
+    time.sleep(0.06)
+    assert cache.get("a") is None  # expired entries are never served
+    assert len(cache) == 1
+    cache.set("c", "1")  # third write: expired "b" is deleted too
+    assert len(cache) == 1
+
+
+def test_hits_refresh_the_lru_timestamp_at_most_every_touch_seconds(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), touch_seconds=3600.0)
+    cache.set("k", "v")
+    written = cache._conn.execute("SELECT accessed_at FROM llm_cache").fetchone()[0]
+    assert cache.get("k") == "v"
+    assert cache._conn.execute("SELECT accessed_at FROM llm_cache").fetchone()[0] == written
+
+
+def test_async_calls_share_the_cache(sqlite_cache):
+    chain = CachedChain(
+        FakeStructuredChain(EscalationCheck(needs_escalation=True)), EscalationCheck, "test_chain", {}
+    )
+    first = asyncio.run(chain.ainvoke({"message": "hello"}))
+    second = asyncio.run(chain.ainvoke({"message": "hello"}))
+    assert first.needs_escalation and second.needs_escalation
+    assert chain.stats()["hits"] == 1 and chain.chain.calls == 1
+
+
+def test_none_result_is_not_cached(sqlite_cache):
+    chain = CachedChain(FakeStructuredChain(None), EscalationCheck, "test_chain", {})
+    assert chain.invoke({"message": "hello"}) is None
+    assert asyncio.run(chain.ainvoke({"message": "hello"})) is None
+    assert len(sqlite_cache) == 0
+
+
+def test_backend_missing_a_method_fails_at_construction():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_hit_and_miss_counts_are_exact_under_threads(sqlite_cache):
+    chain = CachedChain(
+        FakeStructuredChain(EscalationCheck(needs_escalation=True)), EscalationCheck, "counted", {},
+    )
+    inputs = [{"message": f"notice {i % 50}"} for i in range(400)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(chain.invoke, inputs))
+    stats = chain.stats()
+    assert stats["hits"] + stats["misses"] == 400
+    assert stats["misses"] >= 50
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _handlers_after_import(setup: str) -> str:
+    # A fresh interpreter, since the module configures logging once on import
+    code = f"""
+import logging
+{setup}
+import utils.logging_config
+print(",".join(type(h).__name__ for h in logging.getLogger().handlers))
+"""
+    return subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_import_configures_logging_only_without_root_handlers():
+    assert _handlers_after_import("") == "DeferredQueueHandler"
+    assert _handlers_after_import("logging.basicConfig()") == "StreamHandler"
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import FakeProviderError, FlakyChatModel
+from utils.model_scheduler import AGENT_QUEUE, SUBGRAPH_QUEUE, AdaptiveConcurrency, ModelScheduler, RateLimitedChatModel
+
+
+# Generous limits, so the lane probes its concurrency starting from 8
+LIMITS = {"fake-model": (100_000, 0)}
+
+
+def _rate_limited(retry_after: float = 0.1) -> FakeProviderError:
+    return FakeProviderError(429, retry_after)
+
+
+def test_rate_limited_call_waits_for_retry_after_and_halves_concurrency():
+    scheduler = ModelScheduler(limits=LIMITS, initial_concurrency=8)
+    model = RateLimitedChatModel(model=FlakyChatModel(errors=[_rate_limited(0.1)]), chain="notice_parser", scheduler=scheduler)
+
+    start = time.monotonic()
+    assert model.invoke([HumanMessage(content="hi")]).content == "ok"
+    assert time.monotonic() - start >= 0.1
+    assert model.model.calls == 2
+    assert scheduler.rate_limited == 1
+    assert scheduler.concurrency_limit("fake-model") < 8
+
+
+def test_burst_of_429s_from_one_round_halves_concurrency_once():
+    scheduler = ModelScheduler(limits=LIMITS, initial_concurrency=8)
+    flaky = FlakyChatModel(errors=[_rate_limited(0.05) for _ in range(4)])
+    model = RateLimitedChatModel(model=flaky, chain="notice_parser", scheduler=scheduler)
+
+    async def run():
+        return await asyncio.gather(*(model.ainvoke([HumanMessage(content=str(i))]) for i in range(4)))
+
+    assert [result.content for result in asyncio.run(run())] == ["ok"] * 4
+    assert scheduler.rate_limited == 4
+    assert 4 <= scheduler.concurrency_limit("fake-model") < 5
+
+
+def test_client_errors_are_not_retried():
+    scheduler = ModelScheduler()
+    model = RateLimitedChatModel(model=FlakyChatModel(errors=[FakeProviderError(400)]), chain="notice_parser", scheduler=scheduler)
+    with pytest.raises(FakeProviderError):
+        model.invoke([HumanMessage(content="hi")])
+    assert model.model.calls == 1
+    # The failed call's slot was handed back
+    assert model.invoke([HumanMessage(content="hi")]).content == "ok"
+
+
+def test_gives_up_after_max_retries():
+    scheduler = ModelScheduler(max_retries=2)
+    model = RateLimitedChatModel(
+        model=FlakyChatModel(errors=[_rate_limited(0.01) for _ in range(3)]), chain="notice_parser", scheduler=scheduler
+    )
+    with pytest.raises(FakeProviderError):
+        model.invoke([HumanMessage(content="hi")])
+    assert model.model.calls == 3
+
+
+def test_models_without_limits_start_at_the_ceiling():
+    scheduler = ModelScheduler(initial_concurrency=8, max_concurrency=64)
+    assert scheduler.concurrency_limit("fake-model") == 64
+
+
+def test_mixed_chain_latencies_do_not_shrink_the_limit():
+    # One model serving short binary questions and long extractions
+    concurrency = AdaptiveConcurrency(initial=8)
+    for i in range(200):
+        sent_at = time.monotonic()
+        concurrency.on_success(0.3, sent_at, "binary_question")
+        concurrency.on_success(2.5, sent_at, "notice_parser")
+    assert concurrency.limit > 8
+    # A chain that really slows down still does
+    limit = concurrency.limit
+    concurrency.on_success(6.0, time.monotonic(), "notice_parser")
+    assert concurrency.limit < limit
+
+
+def test_token_bucket_holds_calls_until_tokens_refill():
+    # 6000 tokens per minute = 100 per second
+    scheduler = ModelScheduler(limits={"fake-model": (0, 6000)})
+    scheduler.release(scheduler.acquire("fake-model", SUBGRAPH_QUEUE, 6000))
+    start = time.monotonic()
+    scheduler.release(scheduler.acquire("fake-model", SUBGRAPH_QUEUE, 20))
+    assert 0.15 <= time.monotonic() - start < 1.0
+
+
+def test_agent_and_subgraph_queues_are_served_in_turn():
+    scheduler = ModelScheduler(limits=LIMITS, initial_concurrency=1, max_concurrency=1)
+    granted = []
+
+    async def call(queue: str) -> None:
+        permit = await scheduler.aacquire("fake-model", queue, 1)
+        granted.append(queue)
+        scheduler.release(permit)
+
+    async def run():
+        holder = await scheduler.aacquire("fake-model", AGENT_QUEUE, 1)
+        # A backlog of agent turns queues ahead of the sub-graph's calls
+        calls = [asyncio.create_task(call(AGENT_QUEUE)) for _ in range(4)]
+        calls += [asyncio.create_task(call(SUBGRAPH_QUEUE)) for _ in range(2)]
+        await asyncio.sleep(0)
+        scheduler.release(holder)
+        await asyncio.gather(*calls)
+
+    asyncio.run(run())
+    assert granted == [AGENT_QUEUE, SUBGRAPH_QUEUE, AGENT_QUEUE, SUBGRAPH_QUEUE, AGENT_QUEUE, AGENT_QUEUE]
@@ -0,0 +1,53 @@
+import pytest
+
+from graphs.email_agent import DEFAULT_ESCALATION_CRITERIA, _extract_notice_data
+from graphs.example_emails import EMAILS
+from utils.near_duplicates import NearDuplicateIndex, body_digest, set_near_duplicate_index, simhash
+
+NOTICE = EMAILS[0]
+RESENT = f"---------- Forwarded message ----------\nFrom: ops@company.com\nDate: Mon, 1 Jul 2024\n\n> {NOTICE}"
+
+
+@pytest.fixture
+def index():
+    index = NearDuplicateIndex()
+    set_near_duplicate_index(index)
+    yield index
+    set_near_duplicate_index(None)
+
+
+def _model_calls(fakes) -> int:
+    return sum(fake.calls for fake in fakes.values())
+
+
+def test_body_digest_ignores_headers_dates_and_whitespace():
+    reflowed = "\n\n".join(" ".join(line.split()) for line in NOTICE.splitlines())
+    dated = f"Date: 1 August 2024\n{NOTICE}\nNovember 2, 2024"
+    assert body_digest(NOTICE) == body_digest(RESENT) == body_digest(reflowed) == body_digest(dated)
+    assert body_digest(NOTICE) != body_digest(NOTICE.replace("scaffolding", "ladders", 1))
+
+
+def test_resent_notice_reuses_earlier_results(index, fake_notice_chains):
+    _extract_notice_data(NOTICE, DEFAULT_ESCALATION_CRITERIA)
+    calls = _model_calls(fake_notice_chains)
+    summary, artifact = _extract_notice_data(RESENT, DEFAULT_ESCALATION_CRITERIA)
+    assert _model_calls(fake_notice_chains) == calls
+    assert artifact["near_duplicate_of"]
+    assert summary.startswith("Near-duplicate of a notice processed earlier")
+
+
+def test_body_change_runs_extraction_again(index, fake_notice_chains):
+    _extract_notice_data(NOTICE, DEFAULT_ESCALATION_CRITERIA)
+    calls = _model_calls(fake_notice_chains)
+    # One word: the fingerprint still matches, but the body is not the same notice
+    changed = NOTICE.replace("Lack of fall protection", "Lack of fire protection")
+    assert index.find(simhash(changed)) is not None
+    _, artifact = _extract_notice_data(changed, DEFAULT_ESCALATION_CRITERIA)
+    assert _model_calls(fake_notice_chains) > calls
+    assert "near_duplicate_of" not in artifact
+
+
+def test_other_escalation_criteria_run_extraction_again(index, fake_notice_chains):
+    _extract_notice_data(NOTICE, DEFAULT_ESCALATION_CRITERIA)
+    _, artifact = _extract_notice_data(RESENT, "Escalate every notice")
+    assert "near_duplicate_of" not in artifact
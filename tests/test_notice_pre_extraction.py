@@ -0,0 +1,65 @@
+from benchmarks.fake_llm import FakeStructuredChain
+from chains import notice_extraction
+from chains.notice_extraction import NoticeEmailExtract, PreExtractingNoticeParser, partial_notice_model
+from graphs.example_emails import EMAILS
+from utils.notice_pre_extraction import pre_extract_notice_fields
+
+
+def test_example_notice():
+    assert pre_extract_notice_fields(EMAILS[0]) == {
+        "date_of_notice_str": "2024-10-15",
+        "compliance_deadline_str": "2024-11-10",
+        "entity_phone": "(555) 123-4567",
+        "entity_email": "compliance.osha@osha.gov",
+        "project_id": 111232345,
+        "max_potential_fine": 25000.0,
+    }
+
+
+def test_several_fine_amounts_are_left_to_the_model():
+    fields = pre_extract_notice_fields(
+        "Penalties accrue at $500 per day, up to a maximum of $25,000. "
+        "A prior penalty of $40,000 was paid in 2023."
+    )
+    assert "max_potential_fine" not in fields
+
+
+def test_repeated_fine_amount_is_kept():
+    fields = pre_extract_notice_fields("Fines of up to $25,000 per violation. The $25,000 fine applies per site.")
+    assert fields["max_potential_fine"] == 25000.0
+
+
+def test_notice_date_must_open_a_line():
+    fields = pre_extract_notice_fields("Re: site visit\nInspection Date: March 3, 2024\nAll good.")
+    assert "date_of_notice_str" not in fields
+    wrapped = pre_extract_notice_fields("  Date: March\n    3, 2024\nFrom: EPA")
+    assert wrapped["date_of_notice_str"] == "2024-03-03"
+
+
+def test_recipient_address_is_not_the_entity_email():
+    fields = pre_extract_notice_fields("To: compliance@company.com\nPlease fix the exposed wiring.")
+    assert "entity_email" not in fields
+
+
+def test_sender_address_is_the_entity_email():
+    fields = pre_extract_notice_fields(
+        "From: Fire Marshal <notices@firemarshal.org>\nTo: compliance@company.com\nBlocked exits."
+    )
+    assert fields["entity_email"] == "notices@firemarshal.org"
+    contact = pre_extract_notice_fields("Cc: legal@company.com\nFor questions, email inspections@lacity.gov.")
+    assert contact["entity_email"] == "inspections@lacity.gov"
+
+
+def test_parser_asks_the_model_for_the_free_text_fields(monkeypatch):
+    asked = []
+
+    def fake_partial_chain(fields):
+        asked.append(fields)
+        return FakeStructuredChain(partial_notice_model(fields)(violation_type="Fall protection"))
+
+    monkeypatch.setattr(notice_extraction, "partial_notice_parser_chain", fake_partial_chain)
+    extract = PreExtractingNoticeParser().invoke({"message": EMAILS[0]})
+    assert isinstance(extract, NoticeEmailExtract)
+    assert asked == [("entity_name", "site_location", "violation_type", "required_changes")]
+    assert extract.violation_type == "Fall protection"
+    assert extract.max_potential_fine == 25000.0
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import install_fake_agent_model
+from graphs import email_agent
+from graphs.example_emails import EMAILS
+from utils.outbox import (
+    FAILED, IN_PROGRESS, PENDING, SENT, Outbox, OutboxWorkerPool, get_outbox, get_outbox_workers, set_outbox,
+)
+
+
+def _queued(outbox: Outbox, kind: str) -> list:
+    return outbox._conn.execute("SELECT destination, payload FROM outbox WHERE kind = ?", (kind,)).fetchall()
+
+
+def test_separate_sends_with_the_same_payload_are_all_queued(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_agent, "EMAIL_AGENT_MODEL", email_agent.EMAIL_AGENT_MODEL)  # restored afterwards
+    install_fake_agent_model()  # same tool call ids every run, like a cached model answer
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    set_outbox(outbox, OutboxWorkerPool(outbox, workers=0))
+    try:
+        for _ in range(2):
+            email_agent.email_agent_graph.invoke(
+                {"messages": [HumanMessage(content=EMAILS[1])]},
+                config={"recursion_limit": 10, "configurable": {"fast_path": False}},
+            )
+    finally:
+        set_outbox(None)
+    notifications = _queued(outbox, "wrong_email_notification")
+    assert len(notifications) == 2
+    assert notifications[0] == notifications[1]
+
+
+def test_replayed_tool_call_is_queued_once(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    set_outbox(outbox, OutboxWorkerPool(outbox, workers=0))
+    config = {"configurable": {"checkpoint_ns": "tools:1f1c9efa", "tool_call_id": "call_1"}}
+    call = {
+        "name": "send_wrong_email_notification_to_sender", "id": "call_1", "type": "tool_call",
+        "args": {"sender_email": "someone@example.com", "correct_department": "billing@company.com"},
+    }
+    try:
+        for _ in range(2):
+            email_agent.send_wrong_email_notification_to_sender.invoke(call, config)
+    finally:
+        set_outbox(None)
+    assert len(_queued(outbox, "wrong_email_notification")) == 1
+
+
+def test_enqueue_without_send_id_does_not_dedupe(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    first = outbox.enqueue("forward_email", "support@company.com", {"email_message": "hi"})
+    second = outbox.enqueue("forward_email", "support@company.com", {"email_message": "hi"})
+    again = outbox.enqueue("forward_email", "support@company.com", {"email_message": "hi"}, send_id="a")
+    assert len({first, second, again}) == 3
+    assert outbox.enqueue("forward_email", "support@company.com", {"email_message": "hi"}, send_id="a") == again
+
+
+def test_claims_of_a_crashed_process_are_requeued_after_their_lease(tmp_path):
+    path = str(tmp_path / "outbox.sqlite")
+    crashed = Outbox(path, lease_seconds=0.2)
+    for i in range(3):
+        crashed.enqueue("forward_email", "support@company.com", {"email_message": f"message {i}"})
+    claimed = crashed.claim_batch()
+    assert len(claimed) == 3
+
+    other = Outbox(path, lease_seconds=0.2)
+    assert other.counts()[IN_PROGRESS] == 3
+    assert other.claim_batch() == []  # still leased to the first process
+    time.sleep(0.25)
+    reclaimed = other.claim_batch()
+    assert [job.id for job in reclaimed] == [job.id for job in claimed]
+
+    # The first process's late reports no longer apply to jobs it lost
+    crashed.mark_failed(claimed, "timeout")
+    crashed.mark_sent(claimed)
+    assert other.counts()[IN_PROGRESS] == 3
+    other.mark_sent(reclaimed)
+    assert other.counts() == {PENDING: 0, IN_PROGRESS: 0, SENT: 3, FAILED: 0}
+
+
+def test_concurrent_first_use_builds_one_outbox(tmp_path, monkeypatch):
+    monkeypatch.setenv("OUTBOX_PATH", str(tmp_path / "outbox.sqlite"))
+    monkeypatch.setenv("OUTBOX_WORKERS", "1")
+    set_outbox(None)
+    barrier = threading.Barrier(8)
+    pools = []
+
+    def first_send():
+        barrier.wait()
+        pools.append(get_outbox_workers())
+
+    threads = [threading.Thread(target=first_send) for _ in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(pool) for pool in pools}) == 1
+        assert pools[0].outbox is get_outbox()
+    finally:
+        set_outbox(None)
@@ -0,0 +1,31 @@
+import asyncio
+import io
+import json
+import threading
+
+from benchmarks.fake_llm import install_fake_agent_model, install_temp_outbox
+from graphs import email_agent
+from graphs.example_emails import EMAILS
+from process_inbox import process_inbox
+from utils.outbox import set_outbox
+
+
+def test_input_is_read_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(email_agent, "EMAIL_AGENT_MODEL", email_agent.EMAIL_AGENT_MODEL)  # restored afterwards
+    install_fake_agent_model()
+    install_temp_outbox(workers=0)
+    readers = []
+
+    def emails():
+        for i, email in enumerate([EMAILS[1], EMAILS[2]]):
+            readers.append(threading.current_thread())
+            yield str(i), email
+
+    output = io.StringIO()
+    try:
+        stats = asyncio.run(process_inbox(emails(), output, concurrency=2))
+    finally:
+        set_outbox(None)
+    assert stats["processed"] == 2 and stats["errors"] == 0
+    assert {json.loads(line)["id"] for line in output.getvalue().splitlines()} == {"0", "1"}
+    assert readers and threading.main_thread() not in readers
@@ -0,0 +1,16 @@
+from chains.notice_extraction import _SettledFields, partial_notice_model
+
+
+def test_field_still_streaming_is_not_settled_when_it_arrives_with_another():
+    model = partial_notice_model(("max_potential_fine", "entity_email", "violation_type"))
+    settled = _SettledFields()
+    # One chunk completes the fine and starts the email; set order is arbitrary
+    partial = model.model_construct(
+        _fields_set={"entity_email", "max_potential_fine"}, max_potential_fine=25000.0, entity_email="compl"
+    )
+    assert settled.update(partial) == {"max_potential_fine": 25000.0}
+    partial = model.model_construct(
+        _fields_set={"violation_type", "entity_email", "max_potential_fine"},
+        max_potential_fine=25000.0, entity_email="compliance.osha@osha.gov", violation_type="Saf",
+    )
+    assert settled.update(partial) == {"max_potential_fine": 25000.0, "entity_email": "compliance.osha@osha.gov"}
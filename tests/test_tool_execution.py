@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
+
+from utils.tool_execution import make_parallel_tool_node
+
+
+def _slow_tool(sent: list, seconds: float) -> StructuredTool:
+    """Blocks, then does its side effect as a runnable step."""
+    def run(email: str) -> str:
+        time.sleep(seconds)
+        RunnableLambda(sent.append).invoke(email)
+        return "sent"
+
+    async def arun(email: str) -> str:
+        return await asyncio.to_thread(run, email)
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name="slow_send", description="Slow send")
+
+
+STATE = {"messages": [AIMessage(content="", tool_calls=[{"name": "slow_send", "args": {"email": "x"}, "id": "c1"}])]}
+
+
+def test_timed_out_sync_tool_is_cancelled_before_its_side_effect():
+    sent = []
+    node = make_parallel_tool_node([_slow_tool(sent, 0.2)], timeout_seconds=0.05)
+    message = node.invoke(STATE)["messages"][0]
+    assert message.status == "error" and "timed out" in message.content
+    time.sleep(0.3)  # the abandoned thread gets to its next step
+    assert sent == []
+
+
+def test_timed_out_async_tool_is_cancelled_before_its_side_effect():
+    sent = []
+    node = make_parallel_tool_node([_slow_tool(sent, 0.2)], timeout_seconds=0.05)
+    message = asyncio.run(node.ainvoke(STATE))["messages"][0]
+    assert message.status == "error" and "timed out" in message.content
+    time.sleep(0.3)
+    assert sent == []
+
+
+def test_tool_within_its_timeout_runs_to_completion():
+    sent = []
+    node = make_parallel_tool_node([_slow_tool(sent, 0.0)], timeout_seconds=1.0)
+    assert node.invoke(STATE)["messages"][0].content == "sent"
+    assert sent == ["x"]
@@ -0,0 +1,299 @@
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph.message import add_messages
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+
+# A reference is "blob:" + the 128-bit BLAKE2b digest of the UTF-8 text
+BLOB_REF_PREFIX = "blob:"
+_BLOB_REF = re.compile(r"blob:[0-9a-f]{32}")
+_DIGEST_SIZE = 16
+
+
+class BlobNotFound(LookupError):
+    """A reference whose text is not in the blob store (evicted from memory,
+    written by another process's in-memory store, or no store configured)."""
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, str) and len(value) == 37 and _BLOB_REF.fullmatch(value) is not None
+
+
+def blob_ref(text: str) -> str:
+    return BLOB_REF_PREFIX + hashlib.blake2b(text.encode("utf-8"), digest_size=_DIGEST_SIZE).hexdigest()
+
+
+class BlobStore(ABC):
+    """Content-addressed text store: put() returns a compact reference that
+    get() resolves. Storing the same text twice stores it once."""
+
+    # Texts shorter than this stay inline; a reference would not save much
+    min_chars: int = 1024
+
+    @abstractmethod
+    def put(self, text: str) -> str:
+        ...
+
+    @abstractmethod
+    def get(self, ref: str) -> str:
+        ...
+
+    @abstractmethod
+    def __contains__(self, ref: str) -> bool:
+        ...
+
+
+class InMemoryBlobStore(BlobStore):
+    """Process-local store, evicting the least recently used texts beyond
+    `max_chars`. Keep the limit well above the text of all emails in flight:
+    resolving an evicted reference raises BlobNotFound."""
+
+    def __init__(self, max_chars: int = 256 * 2**20, min_chars: int = 1024):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self.chars = 0
+        self._blobs: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        ref = blob_ref(text)
+        with self._lock:
+            if ref in self._blobs:
+                self._blobs.move_to_end(ref)
+                return ref
+            self._blobs[ref] = text
+            self.chars += len(text)
+            while self.chars > self.max_chars and len(self._blobs) > 1:
+                self.chars -= len(self._blobs.popitem(last=False)[1])
+        return ref
+
+    def get(self, ref: str) -> str:
+        with self._lock:
+            text = self._blobs.get(ref)
+            if text is None:
+                raise BlobNotFound(f"{ref} is not in the in-memory blob store (evicted, or stored by another process)")
+            self._blobs.move_to_end(ref)
+            return text
+
+    def __contains__(self, ref: str) -> bool:
+        return ref in self._blobs
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+
+class MmapBlobStore(BlobStore):
+    """Append-only file of texts, read through mmap, so bodies live in the
+    page cache instead of the Python heap and survive restarts (references in
+    SQLite checkpoints stay resolvable when an interrupted email resumes).
+
+    Each record is the 16-byte digest, a 4-byte length and the UTF-8 text.
+    Several processes can share a file: records are appended with a single
+    write, and a reference not in the index triggers a rescan of the tail.
+    """
+
+    _HEADER = struct.Struct(">16sI")
+
+    def __init__(self, path: str = ".blobs.bin", min_chars: int = 1024):
+        self.path = path
+        self.min_chars = min_chars
+        self._lock = threading.Lock()
+        self._index: Dict[str, tuple[int, int]] = {}
+        self._scanned = 0
+        self._map: Optional[mmap.mmap] = None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        with self._lock:
+            self._scan()
+            size = os.fstat(self._fd).st_size
+            if self._scanned < size:
+                LOGGER.warning(
+                    f"Blob store {path}: dropping {size - self._scanned} bytes of a record cut short by a crash"
+                )
+                os.ftruncate(self._fd, self._scanned)
+
+    def _remap(self) -> None:
+        size = os.fstat(self._fd).st_size
+        if self._map is not None and len(self._map) == size:
+            return
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ) if size else None
+
+    def _scan(self) -> None:
+        # Index the records appended since the last scan (by any process)
+        self._remap()
+        end = len(self._map) if self._map is not None else 0
+        offset = self._scanned
+        while offset + self._HEADER.size <= end:
+            digest, length = self._HEADER.unpack_from(self._map, offset)
+            start = offset + self._HEADER.size
+            if start + length > end:
+                break
+            self._index[BLOB_REF_PREFIX + digest.hex()] = (start, length)
+            offset = start + length
+        self._scanned = offset
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=_DIGEST_SIZE).digest()
+        ref = BLOB_REF_PREFIX + digest.hex()
+        with self._lock:
+            if ref not in self._index:
+                os.write(self._fd, self._HEADER.pack(digest, len(data)) + data)
+                self._scan()
+        return ref
+
+    def get(self, ref: str) -> str:
+        with self._lock:
+            if ref not in self._index:
+                self._scan()
+            location = self._index.get(ref)
+            if location is None:
+                raise BlobNotFound(f"{ref} is not in blob store {self.path}")
+            start, length = location
+            return self._map[start:start + length].decode("utf-8")
+
+    def __contains__(self, ref: str) -> bool:
+        return ref in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            os.close(self._fd)
+
+
+_BLOB_STORE: BlobStore | None = None
+_BLOB_STORE_LOADED = False
+
+
+def _store_from_env() -> BlobStore | None:
+    """Build the blob store configured by BLOB_STORE_* environment variables.
+
+    BLOB_STORE: none (default; state carries the full text), memory or file
+    BLOB_STORE_PATH: file for the mmap'd store (default .blobs.bin)
+    BLOB_STORE_MIN_CHARS: shorter texts stay inline (default 1024)
+    BLOB_STORE_MAX_MB: in-memory store size before LRU eviction (default 256)
+    """
+    load_env_once()
+    kind = os.getenv("BLOB_STORE", "none").lower()
+    min_chars = int(os.getenv("BLOB_STORE_MIN_CHARS", "1024"))
+    if kind == "memory":
+        return InMemoryBlobStore(max_chars=int(float(os.getenv("BLOB_STORE_MAX_MB", "256")) * 2**20), min_chars=min_chars)
+    if kind == "file":
+        store = MmapBlobStore(os.getenv("BLOB_STORE_PATH", ".blobs.bin"), min_chars=min_chars)
+        LOGGER.info(f"Email bodies stored by reference in {store.path}")
+        return store
+    return None
+
+
+def get_blob_store() -> BlobStore | None:
+    """Return the process-wide blob store, or None if bodies stay inline."""
+    global _BLOB_STORE, _BLOB_STORE_LOADED
+    if not _BLOB_STORE_LOADED:
+        _BLOB_STORE = _store_from_env()
+        _BLOB_STORE_LOADED = True
+    return _BLOB_STORE
+
+
+def set_blob_store(store: BlobStore | None) -> None:
+    """Plug in a blob store (None keeps bodies inline). References already in
+    state only resolve against the store that produced them."""
+    global _BLOB_STORE, _BLOB_STORE_LOADED
+    _BLOB_STORE, _BLOB_STORE_LOADED = store, True
+
+
+def store_text(text: str) -> str:
+    """A reference to `text` if a blob store is configured and the text is
+    long enough to be worth it, otherwise `text` itself."""
+    store = get_blob_store()
+    if store is None or not isinstance(text, str) or len(text) < store.min_chars or is_blob_ref(text):
+        return text
+    return store.put(text)
+
+
+def load_text(value: str) -> str:
+    """The text behind a reference; anything else is returned as is."""
+    if not is_blob_ref(value):
+        return value
+    store = get_blob_store()
+    if store is None:
+        raise BlobNotFound(f"{value} cannot be resolved: no blob store is configured")
+    return store.get(value)
+
+
+# --- Messages ---
+# In the agent's state the email lives in the input HumanMessage and in the
+# string arguments of tool calls (extract_notice_data, forward_email). The
+# reducer below swaps those for references as messages are added; nodes that
+# hand messages to a model or a tool resolve them first.
+
+def _map_tool_args(message: AIMessage, convert) -> AIMessage:
+    tool_calls = [
+        {**call, "args": {k: convert(v) if isinstance(v, str) else v for k, v in call["args"].items()}}
+        for call in message.tool_calls
+    ]
+    if tool_calls == message.tool_calls:
+        return message
+    # The provider's raw tool_calls repeat every argument as a JSON string;
+    # the model client rebuilds them from message.tool_calls
+    additional_kwargs = {k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"}
+    return message.copy(update={"tool_calls": tool_calls, "additional_kwargs": additional_kwargs})
+
+
+def message_by_reference(message: BaseMessage) -> BaseMessage:
+    """`message` with its email text (human content, tool-call arguments)
+    stored as references."""
+    if isinstance(message, HumanMessage) and isinstance(message.content, str):
+        ref = store_text(message.content)
+        return message if ref is message.content else message.copy(update={"content": ref})
+    if isinstance(message, AIMessage) and message.tool_calls:
+        return _map_tool_args(message, store_text)
+    return message
+
+
+def resolve_message(message: BaseMessage) -> BaseMessage:
+    """Inverse of message_by_reference."""
+    if isinstance(message, HumanMessage) and is_blob_ref(message.content):
+        return message.copy(update={"content": load_text(message.content)})
+    if isinstance(message, AIMessage) and message.tool_calls:
+        return _map_tool_args(message, load_text)
+    return message
+
+
+def resolve_messages(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    return [resolve_message(m) for m in messages]
+
+
+def add_messages_by_reference(left: Any, right: Any) -> List[BaseMessage]:
+    """add_messages, storing the email text of new messages by reference
+    when a blob store is configured."""
+    merged = add_messages(left, right)
+    if get_blob_store() is None:
+        return merged
+    return [message_by_reference(m) for m in merged]
@@ -0,0 +1,289 @@
+import asyncio
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableSequence
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+
+RECORD = "record"
+REPLAY = "replay"
+CASSETTE_VERSION = 1
+
+
+class CassetteMismatch(LookupError):
+    """A replayed model call whose prompt is not in the cassette."""
+
+
+def _message_request(message: BaseMessage) -> Dict[str, Any]:
+    # What the provider sees; message ids are ours, not part of the prompt
+    request = {"type": message.type, "content": message.content}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        request["tool_calls"] = [{"name": c["name"], "args": c["args"], "id": c["id"]} for c in message.tool_calls]
+    for field in ("tool_call_id", "name"):
+        if getattr(message, field, None):
+            request[field] = getattr(message, field)
+    return request
+
+
+def request_for(chain: str, messages: Sequence[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a model call a cassette matches on: the chain, the prompt
+    messages and the call options (tools, tool_choice, ...)."""
+    return {
+        "chain": chain,
+        "messages": [_message_request(m) for m in messages],
+        "stop": stop,
+        "options": {k: v for k, v in kwargs.items() if k != "run_manager"},
+    }
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Cassette:
+    """Recorded model calls in a gzipped JSONL file, one call per line.
+
+    In record mode every call is appended (and flushed) as it completes. In
+    replay mode calls are matched on request_key(); a prompt that was called
+    more than once replays its responses in recorded order. A prompt that
+    was never recorded raises CassetteMismatch with a diff against the
+    closest recorded prompt, and is also kept in `mismatches`, because graph
+    nodes log and swallow their chains' errors.
+    """
+
+    def __init__(self, path: str, mode: str, replay_latency: bool = False):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r}; expected {RECORD!r} or {REPLAY!r}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.mismatches: List[str] = []
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._requests: Dict[str, Dict[str, Any]] = {}
+        self._file = None
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._write({"version": CASSETTE_VERSION})
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(next(f))
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"{self.path}: unsupported cassette version {header.get('version')!r}")
+            for line in f:
+                entry = json.loads(line)
+                self._entries[entry["key"]].append(entry)
+                self._requests.setdefault(entry["key"], entry["request"])
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        self._file.flush()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def record(self, request: Dict[str, Any], result: ChatResult, latency_s: float) -> None:
+        key = request_key(request)
+        entry = {
+            "key": key,
+            "request": request,
+            "generations": [
+                {"message": message_to_dict(g.message), "generation_info": g.generation_info} for g in result.generations
+            ],
+            "llm_output": result.llm_output,
+            "latency_s": round(latency_s, 4),
+        }
+        with self._lock:
+            self.calls += 1
+            self._entries[key].append(entry)
+            self._write(entry)
+
+    def replay(self, request: Dict[str, Any]) -> tuple[ChatResult, float]:
+        """The recorded result for `request` and the latency it was recorded with."""
+        key = request_key(request)
+        with self._lock:
+            self.calls += 1
+            entries = self._entries.get(key)
+            if not entries:
+                message = self._mismatch_message(request)
+                self.mismatches.append(message)
+                LOGGER.error(message)
+                raise CassetteMismatch(message)
+            # Keep the last response for prompts replayed more often than recorded
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+        generations = [
+            ChatGeneration(message=messages_from_dict([g["message"]])[0], generation_info=g["generation_info"])
+            for g in entry["generations"]
+        ]
+        return ChatResult(generations=generations, llm_output=entry["llm_output"]), entry["latency_s"]
+
+    def _mismatch_message(self, request: Dict[str, Any]) -> str:
+        text = json.dumps(request, indent=1, sort_keys=True, default=str).splitlines()
+        candidates = [r for r in self._requests.values() if r["chain"] == request["chain"]]
+        if not candidates:
+            return f"Cassette {self.path} has no recorded calls for chain {request['chain']!r}"
+        closest = max(
+            candidates,
+            key=lambda r: difflib.SequenceMatcher(
+                None, json.dumps(r, sort_keys=True, default=str), json.dumps(request, sort_keys=True, default=str)
+            ).quick_ratio(),
+        )
+        recorded = json.dumps(closest, indent=1, sort_keys=True, default=str).splitlines()
+        diff = list(difflib.unified_diff(recorded, text, "recorded", "requested", n=1, lineterm=""))
+        shown = "\n".join(diff[:40]) + (f"\n... {len(diff) - 40} more diff lines" if len(diff) > 40 else "")
+        return f"Prompt for chain {request['chain']!r} not in cassette {self.path}; closest recorded prompt:\n{shown}"
+
+    def assert_no_mismatches(self) -> None:
+        """Raise if any replayed call missed, even if a node swallowed the error."""
+        if self.mismatches:
+            raise CassetteMismatch(f"{len(self.mismatches)} prompt mismatches; first:\n{self.mismatches[0]}")
+
+
+def rebind(runnable: Runnable, model: BaseChatModel, wrapper: BaseChatModel) -> Runnable:
+    """Point a binding or sequence built by `model` (bind_tools,
+    with_structured_output) at `wrapper`, a chat model wrapping it."""
+    if isinstance(runnable, RunnableBinding) and runnable.bound is model:
+        return runnable.__class__(bound=wrapper, kwargs=runnable.kwargs, config=runnable.config)
+    if isinstance(runnable, RunnableSequence):
+        return RunnableSequence(*(rebind(step, model, wrapper) for step in runnable.steps))
+    return runnable
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records the wrapped model's calls to a cassette, or
+    answers from the cassette without calling it.
+
+    tools and structured output are bound through the wrapped model, so the
+    requests (and the parsed results) are exactly the ones it would make.
+    """
+
+    model: BaseChatModel
+    chain: str
+    cassette: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cassette-{self.model._llm_type}"
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        return self.model._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        return rebind(self.model.bind_tools(tools, **kwargs), self.model, self)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        return rebind(self.model.with_structured_output(schema, **kwargs), self.model, self)
+
+    def _recorded(self, result: ChatResult, request: Dict[str, Any]) -> ChatResult:
+        # Give generated messages stable ids so later prompts that quote them
+        # are identical on replay
+        key = request_key(request)[:16]
+        for i, generation in enumerate(result.generations):
+            if generation.message.id is None:
+                generation.message.id = f"cassette-{key}-{i}"
+        return result
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        request = request_for(self.chain, messages, stop, kwargs)
+        if self.cassette.mode == REPLAY:
+            result, latency_s = self.cassette.replay(request)
+            if self.cassette.replay_latency:
+                time.sleep(latency_s)
+            return result
+        start = time.perf_counter()
+        result = self._recorded(self.model._generate(messages, stop=stop, **kwargs), request)
+        self.cassette.record(request, result, time.perf_counter() - start)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        request = request_for(self.chain, messages, stop, kwargs)
+        if self.cassette.mode == REPLAY:
+            result, latency_s = self.cassette.replay(request)
+            if self.cassette.replay_latency:
+                await asyncio.sleep(latency_s)
+            return result
+        start = time.perf_counter()
+        result = self._recorded(await self.model._agenerate(messages, stop=stop, **kwargs), request)
+        self.cassette.record(request, result, time.perf_counter() - start)
+        return result
+
+
+_CASSETTE: Cassette | None = None
+_CASSETTE_LOADED = False
+
+
+def get_cassette() -> Cassette | None:
+    """Return the process-wide cassette, if LLM_CASSETTE_MODE is record or
+    replay (file LLM_CASSETTE_PATH, default cassettes/llm.jsonl.gz; replayed
+    calls sleep their recorded latency with LLM_CASSETTE_REPLAY_LATENCY=1)."""
+    global _CASSETTE, _CASSETTE_LOADED
+    if not _CASSETTE_LOADED:
+        load_env_once()
+        mode = os.getenv("LLM_CASSETTE_MODE", "").lower()
+        if mode:
+            _CASSETTE = Cassette(
+                os.getenv("LLM_CASSETTE_PATH", os.path.join("cassettes", "llm.jsonl.gz")),
+                mode,
+                replay_latency=os.getenv("LLM_CASSETTE_REPLAY_LATENCY", "0").lower() in ("1", "true", "yes"),
+            )
+            LOGGER.info(f"LLM calls {'recorded to' if mode == RECORD else 'replayed from'} {_CASSETTE.path}")
+        _CASSETTE_LOADED = True
+    return _CASSETTE
+
+
+def set_cassette(cassette: Cassette | None) -> None:
+    """Plug in a cassette (None turns record/replay off). Only models built
+    afterwards use it, so set it before the first chain or graph is used."""
+    global _CASSETTE, _CASSETTE_LOADED
+    _CASSETTE, _CASSETTE_LOADED = cassette, True
+
+
+def with_cassette(model: BaseChatModel, chain: str) -> BaseChatModel:
+    """Wrap `model` in the active cassette, if any."""
+    cassette = get_cassette()
+    return model if cassette is None else CassetteChatModel(model=model, chain=chain, cassette=cassette)
@@ -0,0 +1,480 @@
+import asyncio
+import hashlib
+import importlib
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import ormsgpack
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import (
+    EXT_PYDANTIC_V1,
+    EXT_PYDANTIC_V2,
+    JsonPlusSerializer,
+    _msgpack_default,
+    _msgpack_ext_hook,
+    _option as _MSGPACK_OPTIONS,
+)
+from langgraph.checkpoint.serde.types import TASKS
+from pydantic import BaseModel
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.blob_store import message_by_reference
+    from utils.lazy import load_env_once
+    from utils.llm_cache import construct_model, dump_model
+    from utils.logging_config import LOGGER
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.blob_store import message_by_reference
+    from utils.lazy import load_env_once
+    from utils.llm_cache import construct_model, dump_model
+    from utils.logging_config import LOGGER
+
+
+def message_id(email: str) -> str:
+    """Stable id for an email: a hash of its whitespace-normalized text, so a
+    restarted worker finds the checkpoints of the same message."""
+    return hashlib.sha256(" ".join(email.split()).encode()).hexdigest()[:32]
+
+
+def _default(obj: Any) -> Any:
+    # Pydantic models keep every declared field, including exclude=True ones
+    # like NoticeEmailExtract's *_str dates, which model_dump() would drop
+    if isinstance(obj, BaseModel):
+        return ormsgpack.Ext(EXT_PYDANTIC_V2, _pack(
+            (obj.__class__.__module__, obj.__class__.__name__, dump_model(obj), "model_construct")
+        ))
+    # Messages reach the saver outside the state's reducer too (graph input,
+    # pending node writes, metadata), so email text goes by reference here
+    if isinstance(obj, BaseMessage):
+        obj = message_by_reference(obj)
+    # Pydantic v1 objects (langchain messages) are re-encoded here so models
+    # nested in them, e.g. a ToolMessage artifact, also go through _default
+    if hasattr(obj, "dict") and callable(obj.dict) and hasattr(obj, "__fields__"):
+        values = {name: getattr(obj, name) for name in obj.__fields__}
+        return ormsgpack.Ext(EXT_PYDANTIC_V1, _pack((obj.__class__.__module__, obj.__class__.__name__, values)))
+    return _msgpack_default(obj)
+
+
+def _pack(value: Any) -> bytes:
+    return ormsgpack.packb(value, default=_default, option=_MSGPACK_OPTIONS)
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_PYDANTIC_V2:
+        module, name, values, _ = ormsgpack.unpackb(data, ext_hook=_ext_hook, option=ormsgpack.OPT_NON_STR_KEYS)
+        # Written by us from valid models, so rebuild without re-validating
+        return construct_model(getattr(importlib.import_module(module), name), values)
+    return _msgpack_ext_hook(code, data)
+
+
+class CheckpointSerializer(JsonPlusSerializer):
+    """msgpack serializer that round-trips the graphs' pydantic models
+    (NoticeEmailExtract, EscalationDeliveryResult, ...) losslessly and
+    rebuilds them with model_construct, skipping validation."""
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if obj is None or isinstance(obj, (bytes, bytearray)):
+            return super().dumps_typed(obj)
+        return "msgpack", _pack(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, data_ = data
+        if type_ == "msgpack":
+            return ormsgpack.unpackb(data_, ext_hook=_ext_hook, option=ormsgpack.OPT_NON_STR_KEYS)
+        return super().loads_typed(data)
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[int]):
+    """LangGraph checkpointer backed by a local SQLite file.
+
+    Like LangGraph's in-memory saver, channel values are stored as separate
+    versioned blobs, so each step only writes the channels it changed.
+    Runs without a thread_id in their config are not persisted, so the
+    graphs can still be invoked without one. The async methods run the sync
+    ones on a worker thread, so a slow disk or a wait for the lock never
+    stalls the event loop.
+    """
+
+    def __init__(self, path: str = ".checkpoints.sqlite", serde: Optional[CheckpointSerializer] = None):
+        super().__init__(serde=serde or CheckpointSerializer())
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: a commit is durable once the OS has it, without an fsync per step
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+
+    # --- Reads ---
+
+    def _row_to_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_b, metadata_b = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_b))
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self._conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+        pending_sends = []
+        if parent_checkpoint_id:
+            pending_sends = [
+                self.serde.loads_typed((t, v))
+                for t, v in self._conn.execute(
+                    """SELECT type, value FROM writes
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? AND channel = ?
+                    ORDER BY task_path, task_id, idx""",
+                    (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+                )
+            ]
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((t, v)))
+            for task_id, channel, t, v in self._conn.execute(
+                """SELECT task_id, channel, type, value FROM writes
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                ORDER BY task_id, idx""",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        ]
+
+        def config_for(id_: str) -> RunnableConfig:
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": id_}}
+
+        return CheckpointTuple(
+            config=config_for(checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": channel_values, "pending_sends": pending_sends},
+            metadata=self.serde.loads_typed(("msgpack", metadata_b)),
+            parent_config=config_for(parent_checkpoint_id) if parent_checkpoint_id else None,
+            pending_writes=pending_writes,
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"].get("thread_id")
+        if not thread_id:
+            return None
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = """SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?"""
+        params: List[Any] = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            return self._row_to_tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints newest first, optionally for one thread/namespace."""
+        query = """SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata
+            FROM checkpoints WHERE 1 = 1"""
+        params: List[Any] = []
+        configurable = (config or {}).get("configurable", {})
+        for key in ("thread_id", "checkpoint_ns", "checkpoint_id"):
+            if configurable.get(key) is not None:
+                query += f" AND {key} = ?"
+                params.append(configurable[key])
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                item = self._row_to_tuple(thread_id, checkpoint_ns, tuple(row))
+            if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield item
+
+    # --- Writes ---
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"].get("thread_id")
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        next_config = {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"],
+        }}
+        if not thread_id:
+            return next_config
+        stored = {k: v for k, v in checkpoint.items() if k not in ("channel_values", "pending_sends")}
+        values = checkpoint["channel_values"]
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        type_, checkpoint_b = self.serde.dumps_typed(stored)
+        _, metadata_b = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     type_, checkpoint_b, metadata_b),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"].get("thread_id")
+        if not thread_id:
+            return
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+             *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        # Special writes (errors, interrupts; negative idx) replace earlier ones,
+        # regular writes of a task are kept from its first attempt
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] < 0]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] >= 0]
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove every checkpoint, blob and write of a thread, e.g. once it finished."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("COMMIT")
+
+    def threads(self) -> List[str]:
+        """Threads with at least one checkpoint (finished ones are deleted by callers)."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+
+    # --- Async (the sync methods, on a worker thread) ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+
+def _thread_config(thread_id: str, config: Optional[RunnableConfig]) -> RunnableConfig:
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), "thread_id": thread_id}
+    return config
+
+
+def _delete_finished(graph: Any, thread_id: str) -> None:
+    # A finished run's checkpoints are not needed for resuming; dropping them
+    # keeps the file small and lets the same email be processed afresh later
+    if hasattr(graph.checkpointer, "delete_thread"):
+        graph.checkpointer.delete_thread(thread_id)
+
+
+_THREAD_LOCKS: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_THREAD_LOCKS_LOCK = threading.Lock()
+
+
+def _thread_lock(thread_id: str) -> threading.Lock:
+    # Two copies of the same email in flight share a thread id; without this
+    # one would resume (or delete) the other's checkpoints mid-run
+    with _THREAD_LOCKS_LOCK:
+        lock = _THREAD_LOCKS.get(thread_id)
+        if lock is None:
+            lock = _THREAD_LOCKS[thread_id] = threading.Lock()
+        return lock
+
+
+def run_checkpointed(graph: Any, input: Any, thread_id: str, config: Optional[RunnableConfig] = None) -> Any:
+    """Invoke a checkpointed graph on `thread_id`. If an earlier run of the
+    thread stopped part-way (crash, error), resume it from its last completed
+    node instead of starting over. Runs of the same thread in this process
+    take turns."""
+    config = _thread_config(thread_id, config)
+    with _thread_lock(thread_id):
+        if graph.get_state(config).next:
+            LOGGER.info(f"Resuming {thread_id} from its last checkpoint")
+            input = None
+        result = graph.invoke(input, config)
+        _delete_finished(graph, thread_id)
+    return result
+
+
+_ASYNC_THREAD_LOCKS: "weakref.WeakValueDictionary[Tuple[Any, str], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _async_thread_lock(thread_id: str) -> asyncio.Lock:
+    # Per event loop, since an asyncio.Lock belongs to the loop it waits on
+    key = (asyncio.get_running_loop(), thread_id)
+    with _THREAD_LOCKS_LOCK:
+        lock = _ASYNC_THREAD_LOCKS.get(key)
+        if lock is None:
+            lock = _ASYNC_THREAD_LOCKS[key] = asyncio.Lock()
+        return lock
+
+
+async def _acquire_in_thread(lock: threading.Lock) -> None:
+    # Waits on a worker thread; if the caller is cancelled meanwhile, the
+    # lock is released as soon as that thread gets it
+    if lock.acquire(blocking=False):
+        return
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        acquiring.add_done_callback(lambda _: lock.release())
+        raise
+
+
+async def arun_checkpointed(graph: Any, input: Any, thread_id: str, config: Optional[RunnableConfig] = None) -> Any:
+    """Async version of run_checkpointed. Runs of the same thread on this
+    event loop queue on an asyncio.Lock; the thread lock shared with sync
+    runs is then taken on a worker thread, so waiting never blocks the loop."""
+    config = _thread_config(thread_id, config)
+    async with _async_thread_lock(thread_id):
+        lock = _thread_lock(thread_id)
+        await _acquire_in_thread(lock)
+        try:
+            if (await graph.aget_state(config)).next:
+                LOGGER.info(f"Resuming {thread_id} from its last checkpoint")
+                input = None
+            result = await graph.ainvoke(input, config)
+            await asyncio.to_thread(_delete_finished, graph, thread_id)
+        finally:
+            lock.release()
+    return result
+
+
+_CHECKPOINTER: SQLiteCheckpointSaver | None = None
+_CHECKPOINTER_LOCK = threading.Lock()
+
+
+def get_checkpointer() -> SQLiteCheckpointSaver:
+    """Return the process-wide checkpointer (CHECKPOINT_PATH, default .checkpoints.sqlite)."""
+    global _CHECKPOINTER
+    with _CHECKPOINTER_LOCK:
+        if _CHECKPOINTER is None:
+            load_env_once()
+            _CHECKPOINTER = SQLiteCheckpointSaver(os.getenv("CHECKPOINT_PATH", ".checkpoints.sqlite"))
+            LOGGER.info(f"Checkpoints stored in {_CHECKPOINTER.path}")
+        return _CHECKPOINTER
+
+
+def set_checkpointer(checkpointer: SQLiteCheckpointSaver | None) -> None:
+    """Plug in a checkpointer (None re-reads the environment). Graphs built
+    before the call keep the one they were compiled with."""
+    global _CHECKPOINTER
+    _CHECKPOINTER = checkpointer
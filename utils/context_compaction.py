@@ -0,0 +1,101 @@
+import json
+from typing import Any, List
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+# Defaults for compact_messages; override per run with
+# config={"configurable": {"tool_output_max_chars": ..., "stale_tool_output_max_chars": ...}}
+TOOL_OUTPUT_MAX_CHARS = 2000
+STALE_TOOL_OUTPUT_MAX_CHARS = 200
+# Tool-call arguments longer than this (e.g. the email itself) are elided from
+# earlier turns; the model already has the email in the first message
+TOOL_ARG_MAX_CHARS = 200
+
+
+def _drop_nulls(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(v) for v in value]
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """Serialize a tool result for the model: no indentation, no null fields."""
+    return json.dumps(_drop_nulls(value), separators=(",", ":"), default=str)
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Cut text to about max_chars, saying how much was left out."""
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars].rstrip()} [... {len(text) - max_chars} more chars omitted]"
+
+
+def _latest_turn_start(messages: List[BaseMessage]) -> int:
+    """Index of the last AIMessage; messages before it belong to stale turns."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], AIMessage):
+            return i
+    return len(messages)
+
+
+def _elide_args(message: AIMessage, max_chars: int) -> AIMessage:
+    if not any(isinstance(v, str) and len(v) > max_chars for c in message.tool_calls for v in c["args"].values()):
+        return message
+    tool_calls = [
+        {**call, "args": {
+            k: f"[{len(v)} chars omitted]" if isinstance(v, str) and len(v) > max_chars else v
+            for k, v in call["args"].items()
+        }}
+        for call in message.tool_calls
+    ]
+    # Drop the provider's raw tool_calls so they are rebuilt from the elided ones
+    additional_kwargs = {k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"}
+    return message.copy(update={"tool_calls": tool_calls, "additional_kwargs": additional_kwargs})
+
+
+def _cap_tool_output(message: ToolMessage, max_chars: int) -> ToolMessage:
+    if not isinstance(message.content, str) or len(message.content) <= max_chars:
+        return message
+    return message.copy(update={"content": truncate_text(message.content, max_chars)})
+
+
+def compact_messages(
+    messages: List[BaseMessage],
+    tool_output_max_chars: int = TOOL_OUTPUT_MAX_CHARS,
+    stale_tool_output_max_chars: int = STALE_TOOL_OUTPUT_MAX_CHARS,
+    tool_arg_max_chars: int = TOOL_ARG_MAX_CHARS,
+) -> List[BaseMessage]:
+    """Return the agent's message history trimmed for the next model call.
+
+    The first message (the email and instructions) is kept as is. Tool
+    outputs from the latest turn are capped at `tool_output_max_chars`;
+    outputs from earlier turns, which the model has already acted on, are cut
+    to `stale_tool_output_max_chars`. Long tool-call arguments in earlier
+    turns (usually a copy of the email) are elided. Tool calls and their
+    results stay paired, as the API requires. The graph state is not
+    modified, so the full outputs (and ToolMessage artifacts) remain there.
+    """
+    latest = _latest_turn_start(messages)
+    compacted: List[BaseMessage] = []
+    for i, message in enumerate(messages):
+        if 0 < i < latest and isinstance(message, AIMessage) and message.tool_calls:
+            message = _elide_args(message, tool_arg_max_chars)
+        elif isinstance(message, ToolMessage):
+            message = _cap_tool_output(
+                message, tool_output_max_chars if i > latest else stale_tool_output_max_chars
+            )
+        compacted.append(message)
+    return compacted
+
+
+def message_chars(messages: List[BaseMessage]) -> int:
+    """Characters sent to the model for these messages (content plus tool-call arguments)."""
+    total = 0
+    for message in messages:
+        total += len(message.content) if isinstance(message.content, str) else len(json.dumps(message.content))
+        if isinstance(message, AIMessage):
+            total += sum(len(json.dumps(call["args"])) for call in message.tool_calls)
+    return total
+
@@ -0,0 +1,93 @@
+import re
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Categories the fast path can handle without the agent model
+REGULATORY_NOTICE = "regulatory_notice"
+INVOICE = "invoice"
+CUSTOMER_SUPPORT = "customer_support"
+
+# Regulator names and domains (strong signals for a regulatory notice)
+_REGULATOR_PATTERN = re.compile(
+    r"\b(OSHA|Occupational Safety and Health Administration|EPA|"
+    r"Environmental Protection Agency|Fire Marshal|Department of Labor|"
+    r"Building and Safety Department|Department of Buildings|Code Enforcement|"
+    r"City of [A-Z][a-z]+(?: [A-Z][a-z]+)*)\b"
+)
+_GOV_DOMAIN_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.gov\b", re.IGNORECASE)
+
+# Vocabulary signals: (pattern, category, weight)
+_VOCABULARY = [
+    (re.compile(r"\bviolations?\b", re.IGNORECASE), REGULATORY_NOTICE, 1),
+    (re.compile(r"\binspections?\b", re.IGNORECASE), REGULATORY_NOTICE, 1),
+    (re.compile(r"\b(deadline for compliance|corrective actions?|stop-work order)\b", re.IGNORECASE), REGULATORY_NOTICE, 2),
+    (re.compile(r"\binvoices?\b", re.IGNORECASE), INVOICE, 2),
+    (re.compile(r"\b(billing statement|amount due|payment due|past due|remit)\b", re.IGNORECASE), INVOICE, 2),
+    (re.compile(r"\$\s?\d[\d,]*(?:\.\d{2})?"), INVOICE, 1),
+    (re.compile(r"\brefunds?\b", re.IGNORECASE), CUSTOMER_SUPPORT, 2),
+    (re.compile(r"\b(maintenance|repair|not working|broken)\b", re.IGNORECASE), CUSTOMER_SUPPORT, 2),
+    (re.compile(r"\b(issue|problem|complaint)s? with\b", re.IGNORECASE), CUSTOMER_SUPPORT, 1),
+]
+
+_FROM_LINE_PATTERN = re.compile(r"^\s*From:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+# Minimum score for the top category, and the most any other category may score
+MIN_SCORE = 3
+MAX_RUNNER_UP_SCORE = 1
+
+
+class EmailClassification(BaseModel):
+    category: Optional[str] = Field(
+        default=None,
+        description="High-confidence category, or None when the agent should decide",
+    )
+    sender_email: Optional[str] = None
+    scores: Dict[str, int] = Field(default_factory=dict)
+    reasons: List[str] = Field(default_factory=list)
+
+
+def _sender_email(email: str) -> Optional[str]:
+    """The address on the email's From: line, if it has one."""
+    from_line = _FROM_LINE_PATTERN.search(email)
+    if not from_line:
+        return None
+    address = _EMAIL_PATTERN.search(from_line.group(1))
+    return address.group(0) if address else None
+
+
+def classify_email(email: str) -> EmailClassification:
+    """Score an email against sender, regulator and vocabulary rules.
+
+    Only returns a category when one clearly wins; invoices and support
+    requests additionally need a sender address to reply to.
+    """
+    scores = {REGULATORY_NOTICE: 0, INVOICE: 0, CUSTOMER_SUPPORT: 0}
+    reasons = []
+    sender_email = _sender_email(email)
+
+    from_line = _FROM_LINE_PATTERN.search(email)
+    regulator = _REGULATOR_PATTERN.search(from_line.group(1) if from_line else email)
+    if regulator:
+        scores[REGULATORY_NOTICE] += 3 if from_line else 2
+        reasons.append(f"regulator: {regulator.group(0)}")
+    if _GOV_DOMAIN_PATTERN.search(email):
+        scores[REGULATORY_NOTICE] += 1
+        reasons.append("government email domain")
+
+    for pattern, category, weight in _VOCABULARY:
+        match = pattern.search(email)
+        if match:
+            scores[category] += weight
+            reasons.append(f"{category}: '{match.group(0)}'")
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (top_category, top_score), (_, runner_up_score) = ranked[0], ranked[1]
+    category = None
+    if top_score >= MIN_SCORE and runner_up_score <= MAX_RUNNER_UP_SCORE:
+        if top_category == REGULATORY_NOTICE or sender_email:
+            category = top_category
+    return EmailClassification(
+        category=category, sender_email=sender_email, scores=scores, reasons=reasons
+    )
@@ -0,0 +1,248 @@
+import re
+import time
+import threading
+from abc import ABC, abstractmethod
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence
+
+from pydantic import BaseModel
+
+# Use try-except for robust imports relative to project structure
+try:
+    from chains.escalation_check import get_escalation_check_chain
+    from utils.logging_config import LOGGER
+    from utils.metrics import get_metrics
+except ImportError:
+    import sys
+    import os
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from chains.escalation_check import get_escalation_check_chain
+    from utils.logging_config import LOGGER
+    from utils.metrics import get_metrics
+
+
+class RuleCost(IntEnum):
+    """What evaluating a rule costs; cheaper rules are evaluated first."""
+    FIELD = 0    # comparison on an already extracted field
+    PATTERN = 1  # regex / keyword scan of the notice text
+    LLM = 2      # a model call
+
+
+class EscalationFacts:
+    """What the rules can look at. `fields` holds the NoticeEmailExtract
+    fields known so far: a missing key is not known yet, None means the
+    notice doesn't have it."""
+
+    def __init__(self, message: str, text_criteria: str, dollar_criteria: float, fields: Dict[str, Any]):
+        self.message = message
+        self.text_criteria = text_criteria
+        self.dollar_criteria = dollar_criteria
+        self.fields = fields
+
+
+class EscalationRule(ABC):
+    """One escalation condition. evaluate() returns True/False, or None when
+    the facts it needs are not known yet."""
+
+    name: str
+    cost: RuleCost
+    # Typical evaluation time, reported as latency saved when the rule is skipped
+    expected_seconds: float = 0.0
+
+    @abstractmethod
+    def evaluate(self, facts: EscalationFacts) -> Optional[bool]:
+        ...
+
+    async def aevaluate(self, facts: EscalationFacts) -> Optional[bool]:
+        return self.evaluate(facts)
+
+
+class FieldThresholdRule(EscalationRule):
+    """An extracted number at or above a threshold (default: the state's
+    escalation_dollar_criteria)."""
+
+    cost = RuleCost.FIELD
+
+    def __init__(self, field: str = "max_potential_fine", threshold: Optional[float] = None):
+        self.name = field
+        self.field = field
+        self.threshold = threshold
+
+    def evaluate(self, facts: EscalationFacts) -> Optional[bool]:
+        if self.field not in facts.fields:
+            return None
+        value = facts.fields[self.field]
+        threshold = facts.dollar_criteria if self.threshold is None else self.threshold
+        return value is not None and value >= threshold
+
+
+class KeywordRule(EscalationRule):
+    """Any of `patterns` (regexes, case-insensitive) in the notice text."""
+
+    cost = RuleCost.PATTERN
+
+    def __init__(self, patterns: Iterable[str], name: str = "keywords"):
+        self.name = name
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+    def evaluate(self, facts: EscalationFacts) -> Optional[bool]:
+        return self.pattern.search(facts.message) is not None
+
+
+class TextCriteriaRule(EscalationRule):
+    """The escalation text criteria, judged by ESCALATION_CHECK_CHAIN's model.
+    expected_seconds tracks the mean time of the calls made so far."""
+
+    name = "text"
+    cost = RuleCost.LLM
+
+    def __init__(self, expected_seconds: float = 1.0):
+        self.expected_seconds = expected_seconds
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def _observe(self, elapsed: float) -> None:
+        with self._lock:
+            self._calls += 1
+            self.expected_seconds += (elapsed - self.expected_seconds) / self._calls
+
+    def evaluate(self, facts: EscalationFacts) -> Optional[bool]:
+        start = time.perf_counter()
+        try:
+            result = get_escalation_check_chain().invoke(
+                {"escalation_criteria": facts.text_criteria, "message": facts.message}
+            ).needs_escalation
+        except Exception as e:
+            LOGGER.error(f"Error checking text escalation criteria: {e}", exc_info=True)
+            return False
+        self._observe(time.perf_counter() - start)
+        return result
+
+    async def aevaluate(self, facts: EscalationFacts) -> Optional[bool]:
+        start = time.perf_counter()
+        try:
+            result = (
+                await get_escalation_check_chain().ainvoke(
+                    {"escalation_criteria": facts.text_criteria, "message": facts.message}
+                )
+            ).needs_escalation
+        except Exception as e:
+            LOGGER.error(f"Error checking text escalation criteria: {e}", exc_info=True)
+            return False
+        self._observe(time.perf_counter() - start)
+        return result
+
+
+class EscalationOutcome(BaseModel):
+    requires_escalation: Optional[bool]  # None: undecided until more facts are known
+    reason: Optional[str] = None         # the rule that decided a positive outcome
+    results: Dict[str, Optional[bool]] = {}
+    skipped: List[str] = []
+    seconds_saved: float = 0.0
+
+
+class RuleEngine:
+    """Evaluates rules cheapest first and stops as soon as the combined
+    outcome is known: the first True for mode="any" (OR), the first False
+    for mode="all" (AND). Rules of equal cost keep their given order.
+
+    `known` passes in results from an earlier evaluation (e.g. the text check
+    run before the notice was parsed); those rules are not evaluated again.
+    Skipped LLM rules are counted in the escalation_llm_calls_skipped_total
+    metric and their expected time in escalation_llm_seconds_saved.
+    """
+
+    def __init__(self, rules: Sequence[EscalationRule], mode: Literal["any", "all"] = "any"):
+        self.rules = sorted(rules, key=lambda rule: rule.cost)
+        self.mode = mode
+
+    def _decides(self, result: Optional[bool]) -> bool:
+        return result is (self.mode == "any")
+
+    def _start(self, known: Optional[Dict[str, Optional[bool]]]) -> Dict[str, Optional[bool]]:
+        return {name: result for name, result in (known or {}).items() if result is not None}
+
+    def _outcome(self, results: Dict[str, Optional[bool]], known: Optional[Dict[str, Optional[bool]]]) -> EscalationOutcome:
+        reason = next((name for name, result in results.items() if self._decides(result)), None)
+        if reason is not None:
+            decision = self.mode == "any"
+        elif any(results.get(rule.name) is None for rule in self.rules):
+            decision = None
+        else:
+            decision = self.mode == "all"
+        # Rules settled (or deliberately left) by an earlier evaluation are not this one's to count
+        skipped = [rule for rule in self.rules if rule.name not in results and rule.name not in (known or {})]
+        outcome = EscalationOutcome(
+            requires_escalation=decision,
+            reason=reason if decision else None,
+            results=results,
+            skipped=[rule.name for rule in skipped],
+            seconds_saved=sum(rule.expected_seconds for rule in skipped if rule.cost is RuleCost.LLM),
+        )
+        self._record(skipped, outcome, known)
+        return outcome
+
+    def _record(self, skipped: List[EscalationRule], outcome: EscalationOutcome, known) -> None:
+        llm_rules = [rule for rule in self.rules if rule.cost is RuleCost.LLM and rule.name not in (known or {})]
+        if not llm_rules:
+            return
+        metrics = get_metrics()
+        for rule in skipped:
+            if rule.cost is RuleCost.LLM:
+                metrics.inc("escalation_llm_calls_skipped_total", rule=rule.name)
+        metrics.observe("escalation_llm_seconds_saved", outcome.seconds_saved)
+
+    def evaluate(
+        self,
+        facts: EscalationFacts,
+        known: Optional[Dict[str, Optional[bool]]] = None,
+        max_cost: RuleCost = RuleCost.LLM,
+    ) -> EscalationOutcome:
+        """Rules costing more than `max_cost` are left unevaluated (undecided)."""
+        results = self._start(known)
+        for rule in self.rules:
+            if rule.cost > max_cost:
+                break
+            if rule.name in results:
+                if self._decides(results[rule.name]):
+                    break
+                continue
+            results[rule.name] = rule.evaluate(facts)
+            if self._decides(results[rule.name]):
+                break
+        return self._outcome(results, known)
+
+    async def aevaluate(
+        self,
+        facts: EscalationFacts,
+        known: Optional[Dict[str, Optional[bool]]] = None,
+        max_cost: RuleCost = RuleCost.LLM,
+    ) -> EscalationOutcome:
+        """Async version of evaluate."""
+        results = self._start(known)
+        for rule in self.rules:
+            if rule.cost > max_cost:
+                break
+            if rule.name in results:
+                if self._decides(results[rule.name]):
+                    break
+                continue
+            results[rule.name] = await rule.aevaluate(facts)
+            if self._decides(results[rule.name]):
+                break
+        return self._outcome(results, known)
+
+
+_TEXT_CRITERIA_RULE = TextCriteriaRule()
+
+
+def escalation_rule_engine(keywords: Optional[Sequence[str]] = None) -> RuleEngine:
+    """The notice graph's rules: the fine against the dollar criteria, any
+    escalation keywords, then the model's reading of the text criteria.
+    Any one of them escalates."""
+    rules: List[EscalationRule] = [FieldThresholdRule("max_potential_fine"), _TEXT_CRITERIA_RULE]
+    if keywords:
+        rules.append(KeywordRule(keywords))
+    return RuleEngine(rules, mode="any")
@@ -1,6 +1,9 @@
+import asyncio
 import random
 import time
-from pydantic import EmailStr
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+from pydantic import BaseModel, EmailStr
 # Use try-except for conditional import based on relative path
 try:
     from chains.notice_extraction import NoticeEmailExtract
@@ -19,44 +22,142 @@ except ImportError:
     from utils.logging_config import LOGGER
 
 
+# Multiplier applied to every simulated API delay (e.g. 0.0 for instant runs)
+SIMULATED_DELAY_SCALE = 1.0
+# Sources of the follow-up questions the ticket API asks and of the simulated
+# delays' jitter; seed them with configure_simulation() for repeatable runs.
+# Delays are also drawn by background outbox workers, so they get their own
+# generator and cannot shift the sequence of follow-up questions.
+SIMULATION_RANDOM = random.Random()
+DELAY_RANDOM = random.Random()
+
+
+def configure_simulation(delay_scale: float | None = None, seed: int | None = None) -> None:
+    """Set the simulated API delay scale and/or reseed the simulation."""
+    global SIMULATED_DELAY_SCALE
+    if delay_scale is not None:
+        SIMULATED_DELAY_SCALE = delay_scale
+    if seed is not None:
+        SIMULATION_RANDOM.seed(seed)
+        DELAY_RANDOM.seed(seed)
+
+
+def simulated_delay(base: float, jitter: float) -> float:
+    """Return a simulated API delay of base + up to jitter seconds, scaled."""
+    return (base + DELAY_RANDOM.random() * jitter) * SIMULATED_DELAY_SCALE
+
+
+# Escalation delivery limits: recipients sent to at once per notice, and how
+# long a single recipient may take before it is reported as timed out
+ESCALATION_MAX_CONCURRENCY = 10
+ESCALATION_TIMEOUT_SECONDS = 5.0
+
+
+class EscalationDeliveryResult(BaseModel):
+    recipient: str
+    status: Literal["sent", "timeout", "error"]
+    latency_s: float
+    error: str | None = None
+
+
+def _deliver_escalation_email(email: str, timeout: float) -> None:
+    """Simulate the blocking email API call, which gives up after `timeout` seconds."""
+    delay = simulated_delay(0.5, 0.5)
+    if delay > timeout:
+        time.sleep(timeout)
+        raise TimeoutError(f"no response within {timeout:.2f}s")
+    time.sleep(delay)
+
+def _delivery_result(email: str, start: float, error: Exception | None = None) -> EscalationDeliveryResult:
+    latency_s = round(time.perf_counter() - start, 3)
+    if error is None:
+        LOGGER.info("---> Escalation details sent to %s", email)
+        return EscalationDeliveryResult(recipient=email, status="sent", latency_s=latency_s)
+    status = "timeout" if isinstance(error, (TimeoutError, asyncio.TimeoutError)) else "error"
+    LOGGER.warning(f"---> Escalation email to {email} failed ({status}): {error}")
+    return EscalationDeliveryResult(
+        recipient=email, status=status, latency_s=latency_s, error=str(error) or type(error).__name__
+    )
+
+def _send_one(email: str, timeout: float) -> EscalationDeliveryResult:
+    start = time.perf_counter()
+    try:
+        _deliver_escalation_email(email, timeout)
+    except Exception as e:
+        return _delivery_result(email, start, e)
+    return _delivery_result(email, start)
+
 def send_escalation_email(
     notice_email_extract: NoticeEmailExtract,
-    escalation_emails: list[EmailStr] | None # Allow None
-) -> None:
-    """Simulate sending escalation emails"""
+    escalation_emails: list[EmailStr] | None, # Allow None
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
+) -> list[EscalationDeliveryResult]:
+    """Simulate sending escalation emails to all recipients concurrently.
+
+    At most `max_concurrency` recipients are in flight at once, so with the
+    default cap a notice takes about as long as its slowest recipient.
+    Returns one result per recipient, in the order given.
+    """
     if not escalation_emails:
         LOGGER.warning("No escalation emails provided. Skipping email simulation.")
-        return
+        return []
 
-    LOGGER.info(f"Simulating sending escalation emails to: {', '.join(escalation_emails)}")
-    for email in escalation_emails:
-        # Simulate API call delay
-        time.sleep(0.5 + random.random() * 0.5) # Shorter delay
-        LOGGER.info(f"---> Escalation details sent to {email}")
+    max_concurrency = max_concurrency or ESCALATION_MAX_CONCURRENCY
+    timeout = timeout or ESCALATION_TIMEOUT_SECONDS
+    LOGGER.info("Simulating sending escalation emails to: %s", ', '.join(escalation_emails))
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(escalation_emails))) as executor:
+        results = list(executor.map(lambda email: _send_one(email, timeout), escalation_emails))
     LOGGER.info("Finished sending all escalation emails.")
+    return results
 
-def create_legal_ticket(
-    current_follow_ups: dict[str, bool] | None,
+async def _asend_one(email: str, timeout: float, semaphore: asyncio.Semaphore) -> EscalationDeliveryResult:
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.sleep(simulated_delay(0.5, 0.5)), timeout)
+        except Exception as e:
+            return _delivery_result(email, start, e)
+        return _delivery_result(email, start)
+
+async def asend_escalation_email(
     notice_email_extract: NoticeEmailExtract,
-) -> str | None:
-    """Simulate creating a legal ticket using your company's API.
-    Returns a follow-up question if required, otherwise None.
-    """
-    LOGGER.info("Attempting to create legal ticket for notice...")
-    # Simulate API call delay
-    time.sleep(1 + random.random())
+    escalation_emails: list[EmailStr] | None,
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
+) -> list[EscalationDeliveryResult]:
+    """Async version of send_escalation_email that does not block the event loop"""
+    if not escalation_emails:
+        LOGGER.warning("No escalation emails provided. Skipping email simulation.")
+        return []
+
+    semaphore = asyncio.Semaphore(max_concurrency or ESCALATION_MAX_CONCURRENCY)
+    timeout = timeout or ESCALATION_TIMEOUT_SECONDS
+    LOGGER.info("Simulating sending escalation emails to: %s", ', '.join(escalation_emails))
+    results = await asyncio.gather(*(_asend_one(email, timeout, semaphore) for email in escalation_emails))
+    LOGGER.info("Finished sending all escalation emails.")
+    return list(results)
 
-    # Pool of potential follow-up questions (including None for no question)
-    follow_ups_pool = [
-        None,
-        "Does this message mention the states of Texas, Georgia, or New Jersey?",
-        "Did this notice involve an issue with FakeAirCo's HVAC system?",
-        # Add more potential questions here if desired
-    ]
+# Pool of potential follow-up questions (including None for no question)
+FOLLOW_UPS_POOL = [
+    None,
+    "Does this message mention the states of Texas, Georgia, or New Jersey?",
+    "Did this notice involve an issue with FakeAirCo's HVAC system?",
+    # Add more potential questions here if desired
+]
 
+def known_follow_up_questions() -> list[str]:
+    """All follow-up questions the ticket API may ask, so they can be answered
+    up front in one batched call."""
+    return [q for q in FOLLOW_UPS_POOL if q is not None]
+
+def _pick_follow_up(current_follow_ups: dict[str, bool] | None) -> str | None:
+    """Pick the next follow-up question the ticket API asks for, or None if the
+    ticket can be created.
+    """
     # Filter out questions already answered
     answered_questions = set(current_follow_ups.keys()) if current_follow_ups else set()
-    available_follow_ups = [q for q in follow_ups_pool if q not in answered_questions]
+    available_follow_ups = [q for q in FOLLOW_UPS_POOL if q not in answered_questions]
 
     # If only None is left (or pool was just None), or no questions remain
     if not available_follow_ups or all(q is None for q in available_follow_ups):
@@ -66,15 +167,36 @@ def create_legal_ticket(
         return None
 
     # Choose a follow-up question randomly from the available ones
-    follow_up = random.choice(available_follow_ups)
+    follow_up = SIMULATION_RANDOM.choice(available_follow_ups)
 
     if follow_up is None:
         LOGGER.info("*** Legal ticket successfully created (simulation). ***")
         return None
     else:
-        LOGGER.info(f"---> Follow-up required before creating ticket: '{follow_up}'")
+        LOGGER.info("---> Follow-up required before creating ticket: '%s'", follow_up)
         return follow_up
 
+def create_legal_ticket(
+    current_follow_ups: dict[str, bool] | None,
+    notice_email_extract: NoticeEmailExtract,
+) -> str | None:
+    """Simulate creating a legal ticket using your company's API.
+    Returns a follow-up question if required, otherwise None.
+    """
+    LOGGER.info("Attempting to create legal ticket for notice...")
+    # Simulate API call delay
+    time.sleep(simulated_delay(1, 1))
+    return _pick_follow_up(current_follow_ups)
+
+async def acreate_legal_ticket(
+    current_follow_ups: dict[str, bool] | None,
+    notice_email_extract: NoticeEmailExtract,
+) -> str | None:
+    """Async version of create_legal_ticket that does not block the event loop."""
+    LOGGER.info("Attempting to create legal ticket for notice...")
+    await asyncio.sleep(simulated_delay(1, 1))
+    return _pick_follow_up(current_follow_ups)
+
 # Example usage for testing
 if __name__ == "__main__":
     # Create a dummy NoticeEmailExtract for testing
@@ -86,7 +208,9 @@ if __name__ == "__main__":
     )
 
     print("\n--- Testing send_escalation_email ---")
-    send_escalation_email(dummy_extract, ["manager@example.com", "legal@example.com"])
+    for result in send_escalation_email(dummy_extract, ["manager@example.com", "legal@example.com"]):
+        print(result)
+    print(send_escalation_email(dummy_extract, ["slow@example.com"], timeout=0.6))
     send_escalation_email(dummy_extract, None)
 
     print("\n--- Testing create_legal_ticket --- ")
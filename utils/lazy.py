@@ -0,0 +1,41 @@
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Re-entrant: building one lazy object (e.g. a graph) may build others
+_LOCK = threading.RLock()
+
+
+@lru_cache(maxsize=None)
+def load_env_once() -> None:
+    """Load .env the first time anything needs configuration, instead of in
+    every module at import."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def lazy_global(namespace: Dict[str, Any], name: str, factory: Callable[[], T]) -> T:
+    """Return namespace[name], building it with factory() on first use.
+
+    The object is stored as a regular module global, so it is only built once
+    and assigning the name (e.g. a test swapping in a fake) overrides it.
+    """
+    value = namespace.get(name)
+    if value is None:
+        with _LOCK:
+            value = namespace.get(name)
+            if value is None:
+                value = namespace[name] = factory()
+    return value
+
+
+def lazy_module_getattr(module_name: str, accessors: Dict[str, Callable[[], Any]]) -> Callable[[str], Any]:
+    """Build a module-level __getattr__ so `module.NAME` (and `from module
+    import NAME`) keep working for names that are now built by an accessor."""
+    def __getattr__(name: str) -> Any:
+        if name in accessors:
+            return accessors[name]()
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+    return __getattr__
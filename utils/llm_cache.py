@@ -0,0 +1,449 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Type, get_args
+
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from pydantic import BaseModel
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import load_env_once
+    from utils.metrics import get_metrics
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import load_env_once
+    from utils.metrics import get_metrics
+
+
+class CacheBackend(ABC):
+    """Key/value store for serialized chain outputs."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    async def aget(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str) -> None:
+        self.set(key, value)
+
+
+class InMemoryLRUCache(CacheBackend):
+    """Process-local LRU cache with optional TTL."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache that survives restarts, with TTL and LRU size eviction.
+
+    Eviction runs every `evict_every` writes, or sooner once the table grows
+    past `max_entries`, and trims it to 90% of `max_entries` so the next one
+    is some writes away. A hit refreshes its LRU timestamp at most every
+    `touch_seconds`, so repeated hits are reads only. The async methods run
+    the queries on a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str = ".llm_cache.sqlite",
+        max_entries: int = 100_000,
+        ttl_seconds: float | None = None,
+        evict_every: int = 1000,
+        touch_seconds: float = 60.0,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self.touch_seconds = touch_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)"
+        )
+        # Upper bound on the row count (a replaced key counts again) until the next eviction
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, accessed_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at, accessed_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            if now - accessed_at > self.touch_seconds:
+                self._conn.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._rows += 1
+            self._writes += 1
+            if self._writes >= self.evict_every or self._rows > self.max_entries:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used beyond 90% of
+        max_entries. Both deletes walk an index. Called with the lock held."""
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if rows > self.max_entries:
+            excess = rows - max(int(self.max_entries * 0.9), 1)
+            self._conn.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?
+                )""",
+                (excess,),
+            )
+            rows -= excess
+        self._rows, self._writes = rows, 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._rows, self._writes = 0, 0
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything (caching disabled)."""
+
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+_CACHE_BACKEND: CacheBackend | None = None
+
+
+def _backend_from_env() -> CacheBackend:
+    """Build the cache backend configured by LLM_CACHE_* environment variables.
+
+    LLM_CACHE_BACKEND: memory (default), sqlite or none
+    LLM_CACHE_PATH: SQLite file (default .llm_cache.sqlite)
+    LLM_CACHE_TTL_SECONDS: entry time-to-live (default: no expiry)
+    LLM_CACHE_MAX_ENTRIES: size limit before LRU eviction
+    """
+    load_env_once()
+    kind = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+    ttl = os.getenv("LLM_CACHE_TTL_SECONDS")
+    ttl_seconds = float(ttl) if ttl else None
+    max_entries = os.getenv("LLM_CACHE_MAX_ENTRIES")
+    if kind == "sqlite":
+        return SQLiteCache(
+            path=os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite"),
+            max_entries=int(max_entries) if max_entries else 100_000,
+            ttl_seconds=ttl_seconds,
+        )
+    if kind == "memory":
+        return InMemoryLRUCache(
+            max_entries=int(max_entries) if max_entries else 10_000,
+            ttl_seconds=ttl_seconds,
+        )
+    return NullCache()
+
+
+def get_cache_backend() -> CacheBackend:
+    """Return the process-wide cache backend, creating it from the environment."""
+    global _CACHE_BACKEND
+    if _CACHE_BACKEND is None:
+        _CACHE_BACKEND = _backend_from_env()
+    return _CACHE_BACKEND
+
+
+def set_cache_backend(backend: CacheBackend | None) -> None:
+    """Plug in a cache backend for all cached chains (None re-reads the environment)."""
+    global _CACHE_BACKEND
+    _CACHE_BACKEND = backend
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize prompt inputs so trivially different copies share a key."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def chain_settings(prompt: Any, model: Any) -> Dict[str, Any]:
+    """Settings that change a chain's output and so must be part of the cache key."""
+    return {
+        "prompt": hashlib.sha256(prompt.pretty_repr().encode()).hexdigest(),
+        "model": getattr(model, "model_name", None),
+        "temperature": getattr(model, "temperature", None),
+    }
+
+
+def dump_model(model: BaseModel) -> Dict[str, Any]:
+    """Dump every declared field, including exclude=True ones (e.g. the *_str
+    date fields), recursing into nested models."""
+    def dump(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return dump_model(value)
+        if isinstance(value, list):
+            return [dump(v) for v in value]
+        return value
+    return {name: dump(getattr(model, name)) for name in type(model).model_fields}
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    """Return the BaseModel class inside an annotation like X, list[X] or X | None."""
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        nested = _nested_model(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+def construct_model(model_cls: Type[BaseModel], data: Dict[str, Any]) -> BaseModel:
+    """Rebuild a model from dump_model output with model_construct (no validation)."""
+    values = {}
+    for name, field in model_cls.model_fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        nested = _nested_model(field.annotation)
+        if nested is not None and value is not None:
+            if isinstance(value, list):
+                value = [construct_model(nested, v) for v in value]
+            else:
+                value = construct_model(nested, value)
+        values[name] = value
+    return model_cls.model_construct(**values)
+
+
+class CachedChain(Runnable):
+    """Wraps a structured-output chain with a response cache.
+
+    Results are keyed on a hash of the normalized inputs plus the chain's
+    settings, stored as JSON, and rebuilt with model_construct on a hit so no
+    validation is repeated. A None result (the model returned no structured
+    output) is passed through without being cached. Each call is timed into
+    chain_duration_seconds (labelled hit/miss), and model calls carry the
+    chain name in their metadata so token counts can be attributed to it.
+    """
+
+    def __init__(
+        self,
+        chain: Runnable,
+        output_model: Type[BaseModel],
+        name: str,
+        settings: Dict[str, Any],
+    ):
+        self.chain = chain
+        self.output_model = output_model
+        self.name = name
+        self.settings = settings
+        self.hits = 0
+        self.misses = 0
+        self._counts_lock = threading.Lock()
+
+    def _count(self, hit: bool) -> None:
+        with self._counts_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def cache_key(self, input: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"chain": self.name, "settings": self.settings, "input": _normalize(input)},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _dump(self, result: BaseModel) -> str:
+        return json.dumps(dump_model(result))
+
+    def _load(self, value: str) -> BaseModel:
+        return construct_model(self.output_model, json.loads(value))
+
+    def _model_config(self, config: Optional[RunnableConfig]) -> RunnableConfig:
+        return merge_configs(config, {"metadata": {"chain": self.name}})
+
+    def _observe(self, start: float, cache: str) -> None:
+        get_metrics().observe("chain_duration_seconds", time.perf_counter() - start, chain=self.name, cache=cache)
+
+    def invoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseModel:
+        backend = get_cache_backend()
+        key = self.cache_key(input)
+        start = time.perf_counter()
+        cached = backend.get(key)
+        if cached is not None:
+            self._count(hit=True)
+            result = self._load(cached)
+            self._observe(start, "hit")
+            return result
+        self._count(hit=False)
+        result = self.chain.invoke(input, self._model_config(config), **kwargs)
+        if result is not None:
+            backend.set(key, self._dump(result))
+        self._observe(start, "miss")
+        return result
+
+    async def ainvoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseModel:
+        backend = get_cache_backend()
+        key = self.cache_key(input)
+        start = time.perf_counter()
+        cached = await backend.aget(key)
+        if cached is not None:
+            self._count(hit=True)
+            result = self._load(cached)
+            self._observe(start, "hit")
+            return result
+        self._count(hit=False)
+        result = await self.chain.ainvoke(input, self._model_config(config), **kwargs)
+        if result is not None:
+            await backend.aset(key, self._dump(result))
+        self._observe(start, "miss")
+        return result
+
+    def stream(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[BaseModel]:
+        """Partially filled outputs as the model's structured output streams
+        in; the last one is the full result, which is cached. A hit yields
+        the cached result once."""
+        backend = get_cache_backend()
+        key = self.cache_key(input)
+        start = time.perf_counter()
+        cached = backend.get(key)
+        if cached is not None:
+            self._count(hit=True)
+            self._observe(start, "hit")
+            yield self._load(cached)
+            return
+        self._count(hit=False)
+        result = None
+        for result in self.chain.stream(input, self._model_config(config), **kwargs):
+            yield result
+        if result is not None:
+            backend.set(key, self._dump(result))
+        self._observe(start, "miss")
+
+    async def astream(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[BaseModel]:
+        """Async version of stream."""
+        backend = get_cache_backend()
+        key = self.cache_key(input)
+        start = time.perf_counter()
+        cached = await backend.aget(key)
+        if cached is not None:
+            self._count(hit=True)
+            self._observe(start, "hit")
+            yield self._load(cached)
+            return
+        self._count(hit=False)
+        result = None
+        async for result in self.chain.astream(input, self._model_config(config), **kwargs):
+            yield result
+        if result is not None:
+            await backend.aset(key, self._dump(result))
+        self._observe(start, "miss")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counts_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
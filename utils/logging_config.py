@@ -1,7 +1,147 @@
+import atexit
+import itertools
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Any, Callable, Dict, Optional, TextIO
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+LOGGER = logging.getLogger("LangGraphApp") # Changed logger name for clarity
+# Routing decisions are logged once per edge per run; sample them with
+# LOG_SAMPLE="LangGraphApp.routing=100" (keep 1 in 100) under heavy load
+ROUTING_LOGGER = LOGGER.getChild("routing")
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class _Lazy:
+    __slots__ = ("func", "args", "kwargs")
+
+    def __init__(self, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        self.func, self.args, self.kwargs = func, args, kwargs
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args, **self.kwargs))
+
+
+def lazy(func: Callable[..., Any], *args: Any, **kwargs: Any) -> _Lazy:
+    """Defer an expensive log argument until the record is formatted:
+    LOGGER.info("Extracted: %s", lazy(extract.model_dump_json, indent=2))
+    costs nothing when INFO is disabled."""
+    return _Lazy(func, args, kwargs)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any extra= fields as keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **{k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS},
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keep one in every `every` records (warnings and errors always pass)."""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or next(self._counter) % self.every == 0
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as they are; the stock QueueHandler formats them on
+    the calling thread first, which is the work the queue is there to move
+    off it. Arguments must therefore not be mutated after the call."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+
+def _parse_sampling(spec: str) -> Dict[str, int]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, every = item.partition("=")
+        rates[name.strip()] = int(every)
+    return rates
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    queued: Optional[bool] = None,
+    json_format: Optional[bool] = None,
+    sample: Optional[Dict[str, int]] = None,
+    stream: Optional[TextIO] = None,
+) -> None:
+    """(Re)configure the root handler. Arguments default to the environment:
+
+    LOG_LEVEL   root level (default INFO)
+    LOG_QUEUE   1 (default): callers only enqueue records and one background
+                thread formats and writes them; 0 writes synchronously
+    LOG_FORMAT  text (default) or json
+    LOG_SAMPLE  per-logger sampling, e.g. "LangGraphApp.routing=100"
+    """
+    global _LISTENER
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    queued = os.getenv("LOG_QUEUE", "1") != "0" if queued is None else queued
+    json_format = os.getenv("LOG_FORMAT", "text") == "json" if json_format is None else json_format
+    sample = _parse_sampling(os.getenv("LOG_SAMPLE", "")) if sample is None else sample
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT))
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    if queued:
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        _LISTENER = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+        _LISTENER.start()
+        root.addHandler(DeferredQueueHandler(records))
+    else:
+        root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, every in sample.items():
+        logger = logging.getLogger(name)
+        for old in [f for f in logger.filters if isinstance(f, SampleFilter)]:
+            logger.removeFilter(old)
+        if every > 1:
+            logger.addFilter(SampleFilter(every))
+
+
+def flush_logging() -> None:
+    """Write out every queued record (the listener restarts right away)."""
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER.start()
+
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
-LOGGER = logging.getLogger("LangGraphApp") # Changed logger name for clarity 
\ No newline at end of file
+# Like logging.basicConfig: an application that set up logging before
+# importing the project keeps its handlers (and gets no listener thread)
+if not logging.getLogger().handlers:
+    configure_logging()
+# Queued records are written out before the interpreter exits
+atexit.register(lambda: _LISTENER and _LISTENER.stop())
@@ -0,0 +1,372 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import load_env_once
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import load_env_once
+
+# Seconds; upper bounds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Follow-up rounds / agent turns per graph run
+CYCLE_BUCKETS = (0, 1, 2, 3, 5, 8, 13)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# name -> (type, help, buckets)
+METRICS: Dict[str, Tuple[str, str, Sequence[float]]] = {
+    "graph_duration_seconds": ("histogram", "Wall-clock time of a graph run.", LATENCY_BUCKETS),
+    "graph_cycles": (
+        "histogram",
+        "Visits to a graph's cycle nodes per run (follow-up rounds, agent turns).",
+        CYCLE_BUCKETS,
+    ),
+    "node_duration_seconds": ("histogram", "Wall-clock time of a graph node.", LATENCY_BUCKETS),
+    "chain_duration_seconds": ("histogram", "Wall-clock time of a cached LLM chain call.", LATENCY_BUCKETS),
+    "llm_duration_seconds": ("histogram", "Wall-clock time of a chat model request.", LATENCY_BUCKETS),
+    "llm_prompt_tokens_total": ("counter", "Prompt tokens sent to chat models.", ()),
+    "llm_completion_tokens_total": ("counter", "Completion tokens received from chat models.", ()),
+    "tool_duration_seconds": ("histogram", "Wall-clock time of an agent tool call.", LATENCY_BUCKETS),
+    "escalation_llm_calls_skipped_total": (
+        "counter",
+        "Model escalation checks skipped because a cheaper rule decided the outcome.",
+        (),
+    ),
+    "escalation_llm_seconds_saved": (
+        "histogram",
+        "Expected model escalation check time skipped per notice.",
+        LATENCY_BUCKETS,
+    ),
+    "near_duplicate_lookups_total": (
+        "counter",
+        "Near-duplicate index lookups, by result (hit or miss).",
+        (),
+    ),
+    "model_queue_wait_seconds": (
+        "histogram",
+        "Time a model call waited for the scheduler's rate and concurrency limits.",
+        LATENCY_BUCKETS,
+    ),
+    "model_rate_limited_total": ("counter", "Model calls answered with HTTP 429.", ()),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, "" if v is None else str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """In-process store for the counters and histograms in METRICS.
+
+    Recording is a dict lookup and a few additions under a lock, so it can
+    stay on in production. Read it with snapshot() (JSON-friendly) or
+    to_prometheus() (text exposition format).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(METRICS[name][2] if name in METRICS else LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the with-block in histogram `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every series as plain dicts, e.g. for json.dumps."""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(labels), "value": value} for labels, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "count": h.count,
+                        "sum": h.sum,
+                        "buckets": dict(zip([*map(str, h.buckets), "+Inf"], h.cumulative())),
+                    }
+                    for labels, h in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.extend(_header(name, "counter"))
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(v)}" for labels, v in series.items())
+            for name, series in sorted(self._histograms.items()):
+                lines.extend(_header(name, "histogram"))
+                for labels, h in series.items():
+                    bounds = [*map(_format_value, h.buckets), "+Inf"]
+                    lines.extend(
+                        f"{name}_bucket{_format_labels(labels, ('le', le))} {count}"
+                        for le, count in zip(bounds, h.cumulative())
+                    )
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(h.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(name: str, kind: str) -> List[str]:
+    help_text = METRICS[name][1] if name in METRICS else name
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+class _Run:
+    __slots__ = ("kind", "labels", "start", "visits")
+
+    def __init__(self, kind: str, labels: Dict[str, Any]):
+        self.kind = kind
+        self.labels = labels
+        self.start = time.perf_counter()
+        self.visits: Dict[str, int] = {}
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Feeds graph, node, chat model and tool timings into get_metrics().
+
+    Graphs are recognized by the names passed to instrument_graph(), and
+    nodes as the direct children of a graph run. Each event is handled once
+    even when the handler is attached twice (a graph run inside another
+    graph's tool inherits the outer handler as well as its own).
+    """
+
+    run_inline = True  # no thread hop for async runs
+
+    def __init__(self) -> None:
+        self.graphs: Dict[str, Tuple[str, ...]] = {}  # graph name -> cycle nodes
+        self._runs: Dict[UUID, _Run] = {}
+
+    def _start(self, run_id: UUID, run: _Run) -> None:
+        self._runs.setdefault(run_id, run)
+
+    def _end(self, run_id: UUID, status: str) -> Optional[_Run]:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        metrics = get_metrics()
+        elapsed = time.perf_counter() - run.start
+        if run.kind == "graph":
+            metrics.observe("graph_duration_seconds", elapsed, status=status, **run.labels)
+            for node in self.graphs.get(run.labels["graph"], ()):
+                metrics.observe("graph_cycles", run.visits.get(node, 0), node=node, **run.labels)
+        elif run.kind == "node":
+            metrics.observe("node_duration_seconds", elapsed, status=status, **run.labels)
+        elif run.kind == "tool":
+            metrics.observe("tool_duration_seconds", elapsed, status=status, **run.labels)
+        elif run.kind == "llm":
+            metrics.observe("llm_duration_seconds", elapsed, status=status, model=run.labels["model"])
+        return run
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name")
+        if name in self.graphs:
+            self._start(run_id, _Run("graph", {"graph": name}))
+            return
+        parent = self._runs.get(parent_run_id) if parent_run_id else None
+        if (
+            parent is not None and parent.kind == "graph" and metadata
+            and metadata.get("langgraph_node") == name and not name.startswith("__")
+        ):
+            parent.visits[name] = parent.visits.get(name, 0) + 1
+            self._start(run_id, _Run("node", {"graph": parent.labels["graph"], "node": name}))
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, "ok")
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, "error")
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        self._start(run_id, _Run("llm", {
+            "model": metadata.get("ls_model_name", ""),
+            "node": metadata.get("langgraph_node", ""),
+            "chain": metadata.get("chain", ""),
+        }))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._end(run_id, "ok")
+        if run is None:
+            return
+        prompt, completion = _token_usage(response)
+        metrics = get_metrics()
+        if prompt:
+            metrics.inc("llm_prompt_tokens_total", prompt, **run.labels)
+        if completion:
+            metrics.inc("llm_completion_tokens_total", completion, **run.labels)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, "error")
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, _Run("tool", {"tool": kwargs.get("name") or (serialized or {}).get("name", "")}))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, "ok")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, "error")
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    """(prompt, completion) tokens from a chat model response."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not (prompt or completion):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+_METRICS: MetricsRegistry | None = None
+_HANDLER = MetricsCallbackHandler()
+
+
+def metrics_enabled() -> bool:
+    load_env_once()
+    return os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide registry (disabled with METRICS_ENABLED=0)."""
+    global _METRICS
+    if _METRICS is None:
+        _METRICS = MetricsRegistry(enabled=metrics_enabled())
+    return _METRICS
+
+
+def set_metrics(registry: MetricsRegistry | None) -> None:
+    """Plug in a registry (None re-reads the environment)."""
+    global _METRICS
+    _METRICS = registry
+
+
+def instrument_graph(graph: Any, cycle_nodes: Sequence[str] = ()) -> Any:
+    """Attach the metrics callback handler to a compiled graph.
+
+    The graph must have been compiled with a name; runs of `cycle_nodes` are
+    counted per graph run into `graph_cycles`.
+    """
+    _HANDLER.graphs[graph.name] = tuple(cycle_nodes)
+    if not metrics_enabled():
+        return graph
+    return graph.with_config(callbacks=[_HANDLER])
+
+
+def write_metrics(path: str) -> None:
+    """Write get_metrics() to `path`: Prometheus text for *.prom, else JSON."""
+    metrics = get_metrics()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(metrics.to_prometheus() if path.endswith(".prom") else metrics.to_json(indent=2))
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import lazy_global, load_env_once
+    from utils.logging_config import LOGGER
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import lazy_global, load_env_once
+    from utils.logging_config import LOGGER
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TEMPERATURE = 0.0
+
+# Per-chain settings set in code; environment variables (see chat_model_settings) win
+_OVERRIDES: Dict[str, Dict[str, Any]] = {}
+_OVERRIDES_LOCK = threading.Lock()
+
+
+def _pool_limits():
+    """Connection pool sizing, from OPENAI_MAX_CONNECTIONS (default 64) and
+    OPENAI_KEEPALIVE_EXPIRY seconds (default 60)."""
+    import httpx
+    max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def _build_http_client():
+    from openai import DefaultHttpxClient
+    load_env_once()
+    return DefaultHttpxClient(limits=_pool_limits())
+
+
+def _build_async_http_client():
+    from openai import DefaultAsyncHttpxClient
+    load_env_once()
+    return DefaultAsyncHttpxClient(limits=_pool_limits())
+
+
+def get_http_client():
+    """The keep-alive connection pool shared by every sync model call."""
+    return lazy_global(globals(), "HTTP_CLIENT", _build_http_client)
+
+
+def get_async_http_client():
+    """The keep-alive connection pool shared by every async model call."""
+    return lazy_global(globals(), "ASYNC_HTTP_CLIENT", _build_async_http_client)
+
+
+def configure_chat_model(name: str, **settings: Any) -> None:
+    """Override settings (e.g. model="gpt-4o", temperature=0.2) for one chain's
+    client. Takes effect for clients built after the call."""
+    with _OVERRIDES_LOCK:
+        _OVERRIDES.setdefault(name, {}).update(settings)
+
+
+def chat_model_settings(name: str) -> Dict[str, Any]:
+    """Resolved settings for a chain's client: defaults, then
+    configure_chat_model overrides, then <NAME>_MODEL / <NAME>_TEMPERATURE
+    environment variables (e.g. NOTICE_PARSER_MODEL=gpt-4o)."""
+    load_env_once()
+    settings: Dict[str, Any] = {"model": DEFAULT_MODEL, "temperature": DEFAULT_TEMPERATURE}
+    with _OVERRIDES_LOCK:
+        settings.update(_OVERRIDES.get(name, {}))
+    prefix = name.upper()
+    if os.getenv(f"{prefix}_MODEL"):
+        settings["model"] = os.environ[f"{prefix}_MODEL"]
+    if os.getenv(f"{prefix}_TEMPERATURE"):
+        settings["temperature"] = float(os.environ[f"{prefix}_TEMPERATURE"])
+    return settings
+
+
+def get_chat_model(name: str):
+    """Build the ChatOpenAI client for one chain (notice_parser,
+    escalation_check, binary_question, email_agent), on the shared pools.
+    With a cassette active (see utils/cassettes.py), its calls are recorded
+    or replayed. With the model scheduler on (see utils/model_scheduler.py),
+    calls wait for its rate limits and it retries them instead of the
+    openai client."""
+    from langchain_openai import ChatOpenAI
+    from utils.cassettes import with_cassette
+    from utils.model_scheduler import get_model_scheduler, with_scheduler
+    settings = chat_model_settings(name)
+    if get_model_scheduler() is not None:
+        settings.setdefault("max_retries", 0)
+    model = ChatOpenAI(
+        **settings,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+    return with_cassette(with_scheduler(model, name), name)
+
+
+def _warmup_url() -> str:
+    """A cheap authenticated endpoint on the configured API base."""
+    load_env_once()
+    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE") or "https://api.openai.com/v1"
+    return base_url.rstrip("/") + "/models"
+
+
+def _warmup_headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '')}"}
+
+
+def prewarm_connections(count: int = 4) -> int:
+    """Open `count` keep-alive connections in the shared sync pool ahead of
+    the first model call, so it skips the TCP/TLS handshake. Returns how
+    many warm-up requests succeeded; failures are logged and ignored."""
+    client, url, headers = get_http_client(), _warmup_url(), _warmup_headers()
+
+    def warm(_: int) -> bool:
+        try:
+            client.get(url, headers=headers)
+            return True
+        except Exception as e:
+            LOGGER.warning(f"Connection pre-warm to {url} failed: {e}")
+            return False
+
+    # Concurrent requests, so each one needs its own connection
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        warmed = sum(executor.map(warm, range(count)))
+    LOGGER.info(f"Pre-warmed {warmed}/{count} connections to {url}")
+    return warmed
+
+
+async def aprewarm_connections(count: int = 4) -> int:
+    """Async version of prewarm_connections for the shared async pool. Call it
+    from the event loop that will make the model calls."""
+    client, url, headers = get_async_http_client(), _warmup_url(), _warmup_headers()
+
+    async def warm() -> bool:
+        try:
+            await client.get(url, headers=headers)
+            return True
+        except Exception as e:
+            LOGGER.warning(f"Connection pre-warm to {url} failed: {e}")
+            return False
+
+    warmed = sum(await asyncio.gather(*(warm() for _ in range(count))))
+    LOGGER.info(f"Pre-warmed {warmed}/{count} connections to {url}")
+    return warmed
@@ -0,0 +1,614 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.cassettes import rebind
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+    from utils.metrics import get_metrics
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.cassettes import rebind
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+    from utils.metrics import get_metrics
+
+# Every model call (the chains and the agent model, see get_chat_model) waits
+# here for a slot before it is sent. Per model the scheduler keeps:
+# - token buckets for the provider's requests and tokens per minute, charged
+#   with an estimate of the request's tokens and corrected from its usage;
+# - an AIMD concurrency limit: +1 per limit's worth of successful calls,
+#   halved on a 429 and, for models with configured limits, shrunk when a
+#   chain's latency climbs well above that chain's baseline (models without
+#   limits start at the ceiling and only back off on 429s);
+# - one FIFO queue per caller class, served round-robin, so the agent's turns
+#   for a busy inbox cannot starve extract_notice_data's sub-graph calls.
+# A 429 pauses the model for its Retry-After and the call is retried once
+# the scheduler lets it through again; the openai client's own retries are
+# turned off so they don't bypass the limits.
+
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 256
+AGENT_QUEUE = "agent"
+SUBGRAPH_QUEUE = "subgraph"
+# Chains whose calls queue as agent turns; every other chain is a sub-graph call
+AGENT_CHAINS = ("email_agent",)
+
+
+class TokenBucket:
+    """`per_minute` units, refilled continuously. Charges may overdraw it
+    (usage above the estimate); later callers then wait for the debt."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` (capped at capacity) is available."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / self.rate
+
+    def charge(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency limit. Successes add 1 / limit (about +1 per round
+    trip at full use); a rate limit halves it, a latency above
+    `latency_tolerance` times the baseline shrinks it by 10%. Baselines are
+    kept per chain, since one model serves both one-word answers and long
+    extractions. Only calls sent after the last decrease can decrease it
+    again, so a burst of 429s from one round counts once. With
+    `track_latency` off only rate limits decrease it."""
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        latency_tolerance: float = 2.0,
+        track_latency: bool = True,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.track_latency = track_latency
+        self.baselines: Dict[str, float] = {}
+        self._decreased_at = 0.0
+
+    @property
+    def slots(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def _decrease(self, factor: float, sent_at: float) -> None:
+        if sent_at < self._decreased_at:
+            return
+        self.limit = max(float(self.minimum), self.limit * factor)
+        self._decreased_at = time.monotonic()
+
+    def on_success(self, latency: float, sent_at: float, chain: str = "") -> None:
+        if self.track_latency:
+            # Slow-moving baseline that snaps down to faster calls
+            baseline = self.baselines.get(chain)
+            if baseline is None or latency < baseline:
+                baseline = latency
+            else:
+                baseline += (latency - baseline) * 0.05
+            self.baselines[chain] = baseline
+            if latency > self.latency_tolerance * baseline:
+                self._decrease(0.9, sent_at)
+                return
+        self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+    def on_rate_limited(self, sent_at: float) -> None:
+        self._decrease(0.5, sent_at)
+
+
+class Permit:
+    """A granted model call slot; hand it back with ModelScheduler.release."""
+
+    def __init__(self, model: str, queue: str, tokens: int, queued_at: float):
+        self.model = model
+        self.queue = queue
+        self.tokens = tokens
+        self.queued_at = queued_at
+        self.sent_at = 0.0
+
+
+class _Waiter:
+    def __init__(self, permit: Permit, notify: Callable[[], None]):
+        self.permit = permit
+        self.notify = notify
+        self.granted = False
+
+
+class _ModelLane:
+    """Scheduling state of one model."""
+
+    def __init__(self, rpm: float, tpm: float, concurrency: AdaptiveConcurrency):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.queues: Dict[str, Deque[_Waiter]] = {}
+        self.turns: Deque[str] = deque()  # queue names, next to serve first
+        self.paused_until = 0.0
+        self.timer: Optional[threading.Timer] = None
+        self.timer_at = 0.0
+
+    def waiting(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+
+class ModelScheduler:
+    """Process-wide gate for model calls; see the comment at the top of
+    utils/model_scheduler.py. Limits are per model name:
+
+        scheduler = ModelScheduler(limits={"gpt-4o-mini": (500, 200_000)})  # (rpm, tpm)
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, tuple]] = None,
+        default_rpm: float = 0,
+        default_tpm: float = 0,
+        initial_concurrency: int = 8,
+        max_concurrency: int = 64,
+        max_retries: int = 6,
+    ):
+        self.limits = dict(limits or {})
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.rate_limited = 0
+        self._lanes: Dict[str, _ModelLane] = {}
+        self._completion_tokens: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _lane(self, model: str) -> _ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            rpm, tpm = self.limits.get(model, (self.default_rpm, self.default_tpm))
+            # Without configured limits there is nothing to probe for: start at
+            # the ceiling and back off on 429s only
+            limited = bool(rpm or tpm)
+            initial = min(self.initial_concurrency, self.max_concurrency) if limited else self.max_concurrency
+            lane = self._lanes[model] = _ModelLane(
+                rpm, tpm, AdaptiveConcurrency(initial, maximum=self.max_concurrency, track_latency=limited)
+            )
+        return lane
+
+    def concurrency_limit(self, model: str) -> float:
+        with self._lock:
+            return self._lane(model).concurrency.limit
+
+    # --- Token estimates ---
+
+    def estimate_tokens(self, chain: str, messages: Sequence[BaseMessage], kwargs: Dict[str, Any]) -> int:
+        """Prompt tokens (messages, tool and schema definitions) at
+        CHARS_PER_TOKEN, plus max_tokens or the chain's usual completion."""
+        chars = sum(len(m.content) if isinstance(m.content, str) else len(json.dumps(m.content)) for m in messages)
+        for message in messages:
+            if isinstance(message, AIMessage):
+                chars += sum(len(json.dumps(call["args"])) for call in message.tool_calls)
+        if kwargs.get("tools"):
+            chars += len(json.dumps(kwargs["tools"], default=str))
+        completion = kwargs.get("max_tokens") or self._completion_tokens.get(chain, DEFAULT_COMPLETION_TOKENS)
+        return int(chars / CHARS_PER_TOKEN + completion)
+
+    def _learn_completion(self, chain: str, completion_tokens: int) -> None:
+        mean = self._completion_tokens.get(chain)
+        self._completion_tokens[chain] = completion_tokens if mean is None else mean + (completion_tokens - mean) * 0.1
+
+    # --- Slots ---
+
+    def _enqueue(self, model: str, queue: str, tokens: int, notify: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(Permit(model, queue, tokens, time.monotonic()), notify)
+        lane = self._lane(model)
+        if queue not in lane.queues:
+            lane.queues[queue] = deque()
+            lane.turns.append(queue)
+        lane.queues[queue].append(waiter)
+        self._dispatch(model, lane)
+        return waiter
+
+    def _next_waiter(self, lane: _ModelLane) -> Optional[_Waiter]:
+        # Round-robin over the queues with callers waiting
+        for _ in range(len(lane.turns)):
+            queue = lane.turns[0]
+            if lane.queues[queue]:
+                return lane.queues[queue][0]
+            lane.turns.rotate(-1)
+        return None
+
+    def _dispatch(self, model: str, lane: _ModelLane) -> None:
+        """Grant slots to waiters while concurrency and the buckets allow."""
+        while lane.in_flight < lane.concurrency.slots:
+            waiter = self._next_waiter(lane)
+            if waiter is None:
+                return
+            now = time.monotonic()
+            delay = lane.paused_until - now
+            if lane.requests is not None:
+                delay = max(delay, lane.requests.wait_time(1, now))
+            if lane.tokens is not None:
+                delay = max(delay, lane.tokens.wait_time(waiter.permit.tokens, now))
+            if delay > 0:
+                self._wake_in(model, lane, delay)
+                return
+            if lane.requests is not None:
+                lane.requests.charge(1, now)
+            if lane.tokens is not None:
+                lane.tokens.charge(waiter.permit.tokens, now)
+            lane.queues[waiter.permit.queue].popleft()
+            lane.turns.rotate(-1)
+            lane.in_flight += 1
+            waiter.granted = True
+            waiter.permit.sent_at = now
+            get_metrics().observe("model_queue_wait_seconds", now - waiter.permit.queued_at, model=model, queue=waiter.permit.queue)
+            waiter.notify()
+
+    def _wake_in(self, model: str, lane: _ModelLane, delay: float) -> None:
+        at = time.monotonic() + delay
+        if lane.timer is not None and lane.timer_at <= at:
+            return
+        if lane.timer is not None:
+            lane.timer.cancel()
+        lane.timer = threading.Timer(delay, self._on_timer, (model, lane))
+        lane.timer.daemon = True
+        lane.timer_at = at
+        lane.timer.start()
+
+    def _on_timer(self, model: str, lane: _ModelLane) -> None:
+        with self._lock:
+            lane.timer = None
+            self._dispatch(model, lane)
+
+    def acquire(self, model: str, queue: str, tokens: int) -> Permit:
+        """Block until a call of about `tokens` tokens may be sent to `model`."""
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(model, queue, tokens, event.set)
+        event.wait()
+        return waiter.permit
+
+    async def aacquire(self, model: str, queue: str, tokens: int) -> Permit:
+        """Async version of acquire."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def notify() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        with self._lock:
+            waiter = self._enqueue(model, queue, tokens, notify)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    self._lane(model).queues[queue].remove(waiter)
+                    raise
+            self.release(waiter.permit, "cancelled")
+            raise
+        return waiter.permit
+
+    def release(
+        self,
+        permit: Permit,
+        outcome: str = "ok",
+        used_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        chain: str = "",
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Hand a slot back. outcome is ok, rate_limited, error or cancelled;
+        used_tokens corrects the token bucket's estimate."""
+        now = time.monotonic()
+        with self._lock:
+            lane = self._lane(permit.model)
+            lane.in_flight -= 1
+            if lane.tokens is not None and used_tokens is not None:
+                lane.tokens.charge(used_tokens - permit.tokens, now)
+            if completion_tokens:
+                self._learn_completion(chain, completion_tokens)
+            if outcome == "ok":
+                lane.concurrency.on_success(now - permit.sent_at, permit.sent_at, chain)
+            elif outcome == "rate_limited":
+                self.rate_limited += 1
+                lane.concurrency.on_rate_limited(permit.sent_at)
+                lane.paused_until = max(lane.paused_until, now + (retry_after or 1.0))
+            self._dispatch(permit.model, lane)
+        if outcome == "rate_limited":
+            get_metrics().inc("model_rate_limited_total", model=permit.model)
+
+
+# --- Provider errors ---
+
+def _status_code(error: BaseException) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    return _status_code(error) == 429
+
+
+def _is_retryable(error: BaseException) -> bool:
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(error, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a 429's retry-after-ms / retry-after headers, if sent."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _usage(result: ChatResult) -> tuple[Optional[int], Optional[int]]:
+    """(total, completion) tokens reported for a response, if any."""
+    for generation in result.generations:
+        usage = getattr(generation.message, "usage_metadata", None)
+        if usage:
+            return usage.get("total_tokens"), usage.get("output_tokens")
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    return usage.get("total_tokens"), usage.get("completion_tokens")
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """Chat model whose calls to the wrapped model go through a ModelScheduler.
+
+    Like CassetteChatModel, tools and structured output are bound through
+    the wrapped model, so the requests are exactly the ones it would make.
+    """
+
+    model: BaseChatModel
+    chain: str
+    scheduler: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"rate-limited-{self.model._llm_type}"
+
+    # Read by chain_settings for the response cache key
+    @property
+    def model_name(self) -> Optional[str]:
+        return getattr(self.model, "model_name", None)
+
+    @property
+    def temperature(self) -> Optional[float]:
+        return getattr(self.model, "temperature", None)
+
+    @property
+    def _model_key(self) -> str:
+        return self.model_name or self.model._llm_type
+
+    @property
+    def _queue(self) -> str:
+        return AGENT_QUEUE if self.chain in AGENT_CHAINS else SUBGRAPH_QUEUE
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        return self.model._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        return rebind(self.model.bind_tools(tools, **kwargs), self.model, self)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        return rebind(self.model.with_structured_output(schema, **kwargs), self.model, self)
+
+    def _failed(self, permit: Permit, error: Exception, attempt: int) -> float:
+        """Release a failed call's slot; returns the backoff before retrying,
+        or re-raises when the error is final."""
+        if not _is_retryable(error) or attempt >= self.scheduler.max_retries:
+            self.scheduler.release(permit, "error")
+            raise error
+        retry_after = _retry_after(error)
+        if _is_rate_limited(error):
+            LOGGER.warning(f"Rate limited by {permit.model} ({self.chain}), retry {attempt + 1}")
+            self.scheduler.release(permit, "rate_limited", retry_after=retry_after)
+            return 0.0  # the scheduler holds the model back until retry_after
+        self.scheduler.release(permit, "error")
+        return retry_after or min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+
+    def _done(self, permit: Permit, result: ChatResult) -> None:
+        total, completion = _usage(result)
+        self.scheduler.release(permit, "ok", used_tokens=total, completion_tokens=completion, chain=self.chain)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self.scheduler.estimate_tokens(self.chain, messages, kwargs)
+        attempt = 0
+        while True:
+            permit = self.scheduler.acquire(self._model_key, self._queue, tokens)
+            try:
+                result = self.model._generate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                time.sleep(self._failed(permit, e, attempt))
+                attempt += 1
+                continue
+            self._done(permit, result)
+            return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self.scheduler.estimate_tokens(self.chain, messages, kwargs)
+        attempt = 0
+        while True:
+            permit = await self.scheduler.aacquire(self._model_key, self._queue, tokens)
+            try:
+                result = await self.model._agenerate(messages, stop=stop, **kwargs)
+            except asyncio.CancelledError:
+                self.scheduler.release(permit, "cancelled")
+                raise
+            except Exception as e:
+                await asyncio.sleep(self._failed(permit, e, attempt))
+                attempt += 1
+                continue
+            self._done(permit, result)
+            return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens = self.scheduler.estimate_tokens(self.chain, messages, kwargs)
+        attempt = 0
+        while True:
+            permit = self.scheduler.acquire(self._model_key, self._queue, tokens)
+            chunks: List[ChatGenerationChunk] = []
+            try:
+                for chunk in self.model._stream(messages, stop=stop, **kwargs):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                if chunks:  # part of the answer is out, so it can't be retried
+                    self.scheduler.release(permit, "error")
+                    raise
+                time.sleep(self._failed(permit, e, attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.scheduler.release(permit, "cancelled")
+                raise
+            self._done(permit, ChatResult(generations=chunks[-1:]))
+            return
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = self.scheduler.estimate_tokens(self.chain, messages, kwargs)
+        attempt = 0
+        while True:
+            permit = await self.scheduler.aacquire(self._model_key, self._queue, tokens)
+            chunks: List[ChatGenerationChunk] = []
+            try:
+                async for chunk in self.model._astream(messages, stop=stop, **kwargs):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                if chunks:
+                    self.scheduler.release(permit, "error")
+                    raise
+                await asyncio.sleep(self._failed(permit, e, attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.scheduler.release(permit, "cancelled")
+                raise
+            self._done(permit, ChatResult(generations=chunks[-1:]))
+            return
+
+
+_SCHEDULER: ModelScheduler | None = None
+_SCHEDULER_LOADED = False
+
+
+def _parse_limits(spec: str) -> Dict[str, tuple]:
+    """"gpt-4o-mini=500:200000,gpt-4o=100:30000" -> {model: (rpm, tpm)}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, values = item.partition("=")
+        rpm, _, tpm = values.partition(":")
+        limits[model.strip()] = (float(rpm or 0), float(tpm or 0))
+    return limits
+
+
+def _scheduler_from_env() -> ModelScheduler | None:
+    """Build the scheduler configured by MODEL_* environment variables.
+
+    MODEL_SCHEDULER: 1 (default) or 0 to send model calls straight through
+    MODEL_RATE_LIMITS: per-model "model=rpm:tpm" pairs, comma separated
+    MODEL_RPM / MODEL_TPM: limits for other models (default 0 = none)
+    MODEL_INITIAL_CONCURRENCY: calls in flight per limited model to start with (default 8)
+    MODEL_MAX_CONCURRENCY: ceiling for the adaptive limit (default OPENAI_MAX_CONNECTIONS, 64)
+    MODEL_MAX_RETRIES: retries of a rate-limited or failed call (default 6)
+    """
+    load_env_once()
+    if os.getenv("MODEL_SCHEDULER", "1").lower() in ("0", "false", "no"):
+        return None
+    return ModelScheduler(
+        limits=_parse_limits(os.getenv("MODEL_RATE_LIMITS", "")),
+        default_rpm=float(os.getenv("MODEL_RPM", "0")),
+        default_tpm=float(os.getenv("MODEL_TPM", "0")),
+        initial_concurrency=int(os.getenv("MODEL_INITIAL_CONCURRENCY", "8")),
+        max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", os.getenv("OPENAI_MAX_CONNECTIONS", "64"))),
+        max_retries=int(os.getenv("MODEL_MAX_RETRIES", "6")),
+    )
+
+
+def get_model_scheduler() -> ModelScheduler | None:
+    """Return the process-wide model scheduler, or None if disabled."""
+    global _SCHEDULER, _SCHEDULER_LOADED
+    if not _SCHEDULER_LOADED:
+        _SCHEDULER = _scheduler_from_env()
+        _SCHEDULER_LOADED = True
+    return _SCHEDULER
+
+
+def set_model_scheduler(scheduler: ModelScheduler | None) -> None:
+    """Plug in a scheduler (None sends calls straight through). Only models
+    built afterwards use it, so set it before the first chain or graph is used."""
+    global _SCHEDULER, _SCHEDULER_LOADED
+    _SCHEDULER, _SCHEDULER_LOADED = scheduler, True
+
+
+def with_scheduler(model: BaseChatModel, chain: str) -> BaseChatModel:
+    """Route `model`'s calls through the process-wide scheduler, if enabled."""
+    scheduler = get_model_scheduler()
+    return model if scheduler is None else RateLimitedChatModel(model=model, chain=chain, scheduler=scheduler)
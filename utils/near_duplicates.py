@@ -0,0 +1,296 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from array import array
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+    from utils.metrics import get_metrics
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+    from utils.metrics import get_metrics
+
+# Regulators resend notices with a new date line, forwarding headers or
+# reflowed whitespace. Emails are normalized (headers and quoting dropped,
+# lowercased, punctuation and whitespace ignored) and reduced to a 64-bit
+# SimHash of their word 3-grams: near-identical texts get fingerprints a few
+# bits apart.
+
+FINGERPRINT_BITS = 64
+SHINGLE_WORDS = 3
+
+_WORD = re.compile(r"\w+")
+_HEADER_LINE = re.compile(r"^(?:from|to|cc|bcc|sent|date|subject|reply-to)\s*:", re.IGNORECASE)
+_FORWARD_BANNER = re.compile(r"^-*\s*(?:forwarded|original)\s+message\s*-*$|^begin forwarded message:?$", re.IGNORECASE)
+# A line holding nothing but a date, e.g. "October 15, 2024" or "Mon, 1 Jul 2024"
+# (only tried on lines up to _DATE_LINE_MAX characters)
+_DATE_LINE_MAX = 40
+_DATE_LINE = re.compile(
+    r"^(?:(?:mon|tue|wed|thu|fri|sat|sun)\w*,?\s+)?"
+    r"(?:[a-z]{3,9}\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}|\d{1,2}\s+[a-z]{3,9}\.?,?\s+\d{4}"
+    r"|\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2})"
+    r"(?:,?\s+(?:at\s+)?\d{1,2}:\d{2}(?::\d{2})?\s*(?:[ap]m)?)?\.?$",
+    re.IGNORECASE,
+)
+
+
+def normalize_email(text: str) -> str:
+    """The email's body words, lowercased, without header lines, date-only
+    lines, forwarding banners or quote markers."""
+    lines = []
+    for line in text.splitlines():
+        line = line.strip().lstrip(">").strip()
+        if not line or _HEADER_LINE.match(line) or _FORWARD_BANNER.match(line):
+            continue
+        if len(line) <= _DATE_LINE_MAX and _DATE_LINE.match(line):
+            continue
+        lines.append(line.lower())
+    return " ".join(_WORD.findall(" ".join(lines)))
+
+
+def body_digest(text: str) -> str:
+    """Hash of normalize_email(text): equal for two emails exactly when they
+    differ only in header, date or whitespace lines (and quoting)."""
+    return hashlib.sha256(normalize_email(text).encode()).hexdigest()[:32]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the normalized email's word 3-grams."""
+    words = normalize_email(text).split()
+    if not words:
+        return 0
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(len(words) - SHINGLE_WORDS + 1, 1))}
+    # The shingles' hashes as one string of 64-char bit rows; each column's
+    # majority is a fingerprint bit (string ops keep this off the Python loop)
+    digests = b"".join([hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles])
+    bits = format(int.from_bytes(digests, "big"), f"0{len(digests) * 8}b")
+    half = len(shingles) / 2
+    fingerprint = 0
+    for column in range(FINGERPRINT_BITS):
+        fingerprint = (fingerprint << 1) | (bits[column::FINGERPRINT_BITS].count("1") > half)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class NearDuplicate(BaseModel):
+    payload: Dict[str, Any]
+    distance: int
+    similarity: float  # 1 - distance / 64
+
+
+class NearDuplicateIndex:
+    """In-memory index of SimHash fingerprints, each with a JSON payload.
+
+    Fingerprints are split into max_distance + 1 bands, each keying an LSH
+    bucket: two fingerprints at most max_distance bits apart agree on at least
+    one whole band, so a lookup only compares the few entries sharing one
+    of its buckets. Per indexed email that costs a fingerprint and one bucket
+    slot per band (about 24 bytes), besides the payload.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        self._bands = [
+            (i * width, (1 << (width if i < bands - 1 else FINGERPRINT_BITS - i * width)) - 1)
+            for i in range(bands)
+        ]
+        self._fingerprints = array("Q")
+        # One dict per band: band value -> positions of the fingerprints with it
+        self._buckets: List[Dict[int, array]] = [{} for _ in range(bands)]
+        self._payloads: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _insert(self, fingerprint: int) -> None:
+        position = len(self._fingerprints)
+        self._fingerprints.append(fingerprint)
+        for buckets, (shift, mask) in zip(self._buckets, self._bands):
+            key = (fingerprint >> shift) & mask
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = array("I")
+            bucket.append(position)
+
+    def _payload(self, position: int) -> Dict[str, Any]:
+        return self._payloads[position]
+
+    def _refresh(self) -> None:
+        """Pick up entries added by other processes (file-backed index)."""
+
+    def add(self, fingerprint: int, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._payloads.append(payload)
+            self._insert(fingerprint)
+
+    def find(self, fingerprint: int) -> Optional[NearDuplicate]:
+        """The closest indexed entry within max_distance bits (the latest
+        one on ties), or None."""
+        with self._lock:
+            self._refresh()
+            best, best_distance = -1, self.max_distance + 1
+            for buckets, (shift, mask) in zip(self._buckets, self._bands):
+                for position in buckets.get((fingerprint >> shift) & mask, ()):
+                    distance = (self._fingerprints[position] ^ fingerprint).bit_count()
+                    if distance < best_distance or (distance == best_distance and position > best):
+                        best, best_distance = position, distance
+            if best < 0:
+                return None
+            return NearDuplicate(
+                payload=self._payload(best),
+                distance=best_distance,
+                similarity=1 - best_distance / FINGERPRINT_BITS,
+            )
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+
+class FileNearDuplicateIndex(NearDuplicateIndex):
+    """NearDuplicateIndex persisted to an append-only file, read through
+    mmap: fingerprints and bucket slots are rebuilt in memory when the file
+    is opened, payloads stay in the file (page cache) until a match needs one.
+
+    Each record is the 8-byte fingerprint, a 4-byte length and the JSON
+    payload. As with MmapBlobStore, several processes can share a file:
+    records are appended with a single write and lookups pick up the tail.
+    """
+
+    _HEADER = struct.Struct(">QI")
+
+    def __init__(self, path: str = ".near_duplicates.bin", max_distance: int = 3):
+        super().__init__(max_distance)
+        self.path = path
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._scanned = 0
+        self._map: Optional[mmap.mmap] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        with self._lock:
+            self._scan()
+            size = os.fstat(self._fd).st_size
+            if self._scanned < size:
+                LOGGER.warning(
+                    f"Near-duplicate index {path}: dropping {size - self._scanned} bytes of a record cut short by a crash"
+                )
+                os.ftruncate(self._fd, self._scanned)
+
+    def _remap(self) -> None:
+        size = os.fstat(self._fd).st_size
+        if self._map is not None and len(self._map) == size:
+            return
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ) if size else None
+
+    def _scan(self) -> None:
+        # Index the records appended since the last scan (by any process)
+        self._remap()
+        end = len(self._map) if self._map is not None else 0
+        offset = self._scanned
+        while offset + self._HEADER.size <= end:
+            fingerprint, length = self._HEADER.unpack_from(self._map, offset)
+            start = offset + self._HEADER.size
+            if start + length > end:
+                break
+            self._offsets.append(start)
+            self._lengths.append(length)
+            self._insert(fingerprint)
+            offset = start + length
+        self._scanned = offset
+
+    def _refresh(self) -> None:
+        if os.fstat(self._fd).st_size > self._scanned:
+            self._scan()
+
+    def _payload(self, position: int) -> Dict[str, Any]:
+        start = self._offsets[position]
+        return json.loads(self._map[start:start + self._lengths[position]])
+
+    def add(self, fingerprint: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+        with self._lock:
+            os.write(self._fd, self._HEADER.pack(fingerprint, len(data)) + data)
+            self._scan()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            os.close(self._fd)
+
+
+_INDEX: NearDuplicateIndex | None = None
+_INDEX_LOADED = False
+
+
+def _index_from_env() -> NearDuplicateIndex | None:
+    """Build the index configured by NEAR_DUP_* environment variables.
+
+    NEAR_DUP_INDEX: none (default; every email is processed in full), memory or file
+    NEAR_DUP_INDEX_PATH: file for the persistent index (default .near_duplicates.bin)
+    NEAR_DUP_MAX_DISTANCE: fingerprint bits two near-duplicates may differ in (default 3)
+    """
+    load_env_once()
+    kind = os.getenv("NEAR_DUP_INDEX", "none").lower()
+    max_distance = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "3"))
+    if kind == "memory":
+        return NearDuplicateIndex(max_distance=max_distance)
+    if kind == "file":
+        index = FileNearDuplicateIndex(os.getenv("NEAR_DUP_INDEX_PATH", ".near_duplicates.bin"), max_distance=max_distance)
+        LOGGER.info(f"Near-duplicate index {index.path}: {len(index)} emails")
+        return index
+    return None
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex | None:
+    """Return the process-wide near-duplicate index, or None if disabled."""
+    global _INDEX, _INDEX_LOADED
+    if not _INDEX_LOADED:
+        _INDEX = _index_from_env()
+        _INDEX_LOADED = True
+    return _INDEX
+
+
+def set_near_duplicate_index(index: NearDuplicateIndex | None) -> None:
+    """Plug in a near-duplicate index (None disables lookups)."""
+    global _INDEX, _INDEX_LOADED
+    _INDEX, _INDEX_LOADED = index, True
+
+
+def find_near_duplicate(email: str) -> Optional[NearDuplicate]:
+    """The indexed email closest to `email`, if an index is configured and
+    one is within its max_distance."""
+    index = get_near_duplicate_index()
+    if index is None:
+        return None
+    match = index.find(simhash(email)) if len(index) else None
+    get_metrics().inc("near_duplicate_lookups_total", result="miss" if match is None else "hit")
+    return match
+
+
+def index_email(email: str, payload: Dict[str, Any]) -> None:
+    """Remember `payload` (e.g. the email's processing results) for later
+    near-duplicates of `email`; a no-op without an index."""
+    index = get_near_duplicate_index()
+    if index is not None:
+        index.add(simhash(email), payload)
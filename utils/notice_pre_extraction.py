@@ -0,0 +1,135 @@
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Fields of NoticeEmailExtract that are machine-parseable from the raw text
+PRE_EXTRACTED_FIELDS = (
+    "date_of_notice_str",
+    "entity_phone",
+    "entity_email",
+    "project_id",
+    "compliance_deadline_str",
+    "max_potential_fine",
+)
+
+_MONTHS = (
+    r"(?:January|February|March|April|May|June|July|August|September|October|November|December|"
+    r"Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)\.?"
+)
+_DATE = rf"(?:{_MONTHS} \d{{1,2}}(?:st|nd|rd|th)?,? \d{{4}}|\d{{1,2}}/\d{{1,2}}/\d{{4}}|\d{{4}}-\d{{2}}-\d{{2}})"
+_DATE_PATTERN = re.compile(_DATE, re.IGNORECASE)
+# Matched on the raw message, so "Date:" must open a line ("Inspection Date:"
+# is not the notice date); the date itself may wrap onto the next line
+_WRAPPED_DATE = _DATE.replace(" ", r"\s+")
+_NOTICE_DATE_PATTERN = re.compile(rf"^[ \t>]*Date:[ \t]*({_WRAPPED_DATE})", re.IGNORECASE | re.MULTILINE)
+_DEADLINE_PATTERN = re.compile(
+    rf"\b(?:deadline|no later than|(?:rectified|addressed|corrected|completed|resolved|comply) by)\b[^$]{{0,80}}?({_DATE})",
+    re.IGNORECASE,
+)
+_PHONE_PATTERN = re.compile(r"(?<![\d-])(?:\(\d{3}\)\s?|\d{3}[.-])\d{3}[.-]\d{4}(?![\d-])")
+_EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}")
+# The sender's address: on a From/Reply-To line, or shortly after a contact cue
+_SENDER_LINE_PATTERN = re.compile(r"^[ \t>]*(?:From|Reply-To|Sender):(.*)$", re.IGNORECASE | re.MULTILINE)
+_RECIPIENT_LINE_PATTERN = re.compile(r"^[ \t>]*(?:To|Cc|Bcc):(.*)$", re.IGNORECASE | re.MULTILINE)
+_CONTACT_CUE_PATTERN = re.compile(r"\b(?:contact|reach(?:ed)? (?:out|us)|questions|e-?mail(?: us)?|write to)\b", re.IGNORECASE)
+_CONTACT_WINDOW = 100
+_PROJECT_ID_PATTERN = re.compile(r"\bproject\s*(?:#|no\.?|number|id)?\s*:?\s*(\d{3,})\b", re.IGNORECASE)
+_DOLLAR_PATTERN = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)\s*(k|thousand|million)?\b", re.IGNORECASE)
+_FINE_CONTEXT_PATTERN = re.compile(r"\b(fines?|penalt(?:y|ies)|civil money)\b", re.IGNORECASE)
+
+_DATE_FORMATS = ("%B %d %Y", "%b %d %Y", "%m/%d/%Y", "%Y-%m-%d")
+_MULTIPLIERS = {"k": 1_000, "thousand": 1_000, "million": 1_000_000}
+
+
+def _parse_date(text: str) -> Optional[str]:
+    """Normalize a matched date to YYYY-mm-dd, or None if it doesn't parse."""
+    cleaned = re.sub(r"(?<=\d)(st|nd|rd|th)\b", "", text).replace(",", "").replace(".", "")
+    cleaned = cleaned.replace("Sept ", "Sep ")
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def _unique(matches: list) -> Optional[Any]:
+    """The single distinct match, or None when there are several (ambiguous)."""
+    distinct = list(dict.fromkeys(matches))
+    return distinct[0] if len(distinct) == 1 else None
+
+
+def _sender_emails(message: str, text: str) -> list:
+    """Addresses that read as the sender's: on a From/Reply-To line or within
+    _CONTACT_WINDOW characters after a contact cue, and not on a To/Cc line."""
+    recipients = {
+        email.rstrip(".").lower()
+        for line in _RECIPIENT_LINE_PATTERN.findall(message)
+        for email in _EMAIL_PATTERN.findall(line)
+    }
+    found = [email for line in _SENDER_LINE_PATTERN.findall(message) for email in _EMAIL_PATTERN.findall(line)]
+    cues = [cue.end() for cue in _CONTACT_CUE_PATTERN.finditer(text)]
+    for match in _EMAIL_PATTERN.finditer(text):
+        if any(0 <= match.start() - end <= _CONTACT_WINDOW for end in cues):
+            found.append(match.group())
+    return [email.rstrip(".") for email in found if email.rstrip(".").lower() not in recipients]
+
+
+def pre_extract_notice_fields(message: str) -> Dict[str, Any]:
+    """Deterministically extract the machine-parseable NoticeEmailExtract fields.
+
+    Only fields found with confidence are returned; a field maps to None when
+    the text clearly doesn't contain it (e.g. no dollar amounts at all). Fields
+    that are ambiguous (several candidates, e.g. a daily and a maximum fine)
+    or out of context (an address that is not the sender's) are left out for
+    the LLM.
+    """
+    # Undo hard line wraps so values split across lines still match
+    text = " ".join(message.split())
+    fields: Dict[str, Any] = {}
+
+    notice_date = _NOTICE_DATE_PATTERN.search(message)
+    if notice_date:
+        parsed = _parse_date(" ".join(notice_date.group(1).split()))
+        if parsed:
+            fields["date_of_notice_str"] = parsed
+    elif not _DATE_PATTERN.search(text):
+        fields["date_of_notice_str"] = None
+
+    deadlines = [_parse_date(m.group(1)) for m in _DEADLINE_PATTERN.finditer(text)]
+    deadline = _unique([d for d in deadlines if d])
+    if deadline:
+        fields["compliance_deadline_str"] = deadline
+    elif not _DATE_PATTERN.search(text):
+        fields["compliance_deadline_str"] = None
+
+    phones = _PHONE_PATTERN.findall(text)
+    if not phones:
+        fields["entity_phone"] = None
+    elif _unique(phones):
+        fields["entity_phone"] = phones[0]
+
+    if not _EMAIL_PATTERN.search(text):
+        fields["entity_email"] = None
+    elif entity_email := _unique(_sender_emails(message, text)):
+        fields["entity_email"] = entity_email
+
+    project_ids = [int(m) for m in _PROJECT_ID_PATTERN.findall(text)]
+    if not re.search(r"\bproject\b", text, re.IGNORECASE):
+        fields["project_id"] = None
+    elif _unique(project_ids):
+        fields["project_id"] = project_ids[0]
+
+    amounts = []
+    for match in _DOLLAR_PATTERN.finditer(text):
+        # Only count amounts that read as fines or penalties
+        window = text[max(0, match.start() - 80):match.end() + 40]
+        if _FINE_CONTEXT_PATTERN.search(window):
+            value = float(match.group(1).replace(",", ""))
+            amounts.append(value * _MULTIPLIERS.get((match.group(2) or "").lower(), 1))
+    if _unique(amounts):
+        fields["max_potential_fine"] = amounts[0]
+    elif not _DOLLAR_PATTERN.search(text):
+        fields["max_potential_fine"] = None
+
+    return fields
@@ -0,0 +1,354 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.graph_utils import simulated_delay
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.graph_utils import simulated_delay
+    from utils.lazy import load_env_once
+    from utils.logging_config import LOGGER
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+SENT = "sent"
+FAILED = "failed"
+
+
+class OutboxJob(BaseModel):
+    id: int
+    idempotency_key: str
+    kind: str
+    destination: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+# Delivers every job in a batch to one destination; raising fails the whole batch
+BatchSender = Callable[[str, List[OutboxJob]], None]
+
+
+def idempotency_key(kind: str, destination: str, send_id: Optional[str] = None) -> str:
+    """Key for one send to one destination. Enqueueing again with the same
+    `send_id` (e.g. a tool call replayed after a crash) delivers once; without
+    a send_id every enqueue is a separate send, even with the same payload."""
+    content = json.dumps(
+        {"kind": kind, "destination": destination, "send_id": send_id or uuid.uuid4().hex}, sort_keys=True
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def tool_send_id(config: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Send identity of a tool call, or None outside one: the graph task
+    running it and the model's tool call id (set by the tool node).
+
+    LangGraph derives task ids from the checkpoint, so a tool step re-run on
+    resume keeps its id while every new run (even of the same email, with a
+    cached model answer) gets a new one."""
+    configurable = (config or {}).get("configurable", {})
+    tool_call_id = configurable.get("tool_call_id")
+    task = configurable.get("checkpoint_ns")
+    if not tool_call_id or not task:
+        return None
+    return f"{task}:{tool_call_id}"
+
+
+class Outbox:
+    """Durable SQLite queue of outgoing email jobs.
+
+    Jobs are claimed in batches per destination, retried with exponential
+    backoff up to `max_attempts`, and deduplicated on their idempotency key.
+    A claim is a lease of `lease_seconds`: jobs whose claimant died (or
+    overran the lease) are claimed again by the next claim_batch, from any
+    process sharing the file.
+    """
+
+    def __init__(
+        self,
+        path: str = ".outbox.sqlite",
+        max_attempts: int = 5,
+        retry_backoff_seconds: float = 1.0,
+        lease_seconds: float = 300.0,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                claimed_at REAL,
+                claimed_by TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, next_attempt_at)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for column, type_ in (("claimed_at", "REAL"), ("claimed_by", "TEXT")):
+            if column not in columns:  # files written before leases
+                self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {type_}")
+
+    def enqueue(
+        self,
+        kind: str,
+        destination: str,
+        payload: Dict[str, Any],
+        send_id: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> int:
+        """Queue a send and return its job id (the existing id for a duplicate key)."""
+        key = key or idempotency_key(kind, destination, send_id)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR IGNORE INTO outbox
+                (idempotency_key, kind, destination, payload, status, next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (key, kind, destination, json.dumps(payload), PENDING, now, now, now),
+            )
+            return self._conn.execute(
+                "SELECT id FROM outbox WHERE idempotency_key = ?", (key,)
+            ).fetchone()[0]
+
+    def claim_batch(self, batch_size: int = 20) -> List[OutboxJob]:
+        """Claim up to batch_size ready jobs, all for the destination whose
+        oldest job has waited longest. Expired claims are released first."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = self._conn.execute(
+                    "UPDATE outbox SET status = ?, claimed_by = NULL WHERE status = ? AND (claimed_at IS NULL OR claimed_at <= ?)",
+                    (PENDING, IN_PROGRESS, now - self.lease_seconds),
+                ).rowcount
+                if expired:
+                    LOGGER.info("Outbox: requeued %s jobs whose claim expired", expired)
+                oldest = self._conn.execute(
+                    """SELECT destination FROM outbox WHERE status = ? AND next_attempt_at <= ?
+                    ORDER BY id LIMIT 1""",
+                    (PENDING, now),
+                ).fetchone()
+                if oldest is None:
+                    self._conn.execute("COMMIT")
+                    return []
+                rows = self._conn.execute(
+                    """SELECT id, idempotency_key, kind, destination, payload, attempts FROM outbox
+                    WHERE status = ? AND next_attempt_at <= ? AND destination = ?
+                    ORDER BY id LIMIT ?""",
+                    (PENDING, now, oldest[0], batch_size),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = ?, claimed_at = ?, claimed_by = ?, updated_at = ? WHERE id = ?",
+                    [(IN_PROGRESS, now, self.owner, now, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            OutboxJob(
+                id=row[0], idempotency_key=row[1], kind=row[2], destination=row[3],
+                payload=json.loads(row[4]), attempts=row[5],
+            )
+            for row in rows
+        ]
+
+    def mark_sent(self, jobs: List[OutboxJob]) -> None:
+        """Record delivery of jobs this outbox still holds the claim on."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """UPDATE outbox SET status = ?, attempts = attempts + 1, claimed_by = NULL, updated_at = ?
+                WHERE id = ? AND claimed_by = ?""",
+                [(SENT, now, job.id, self.owner) for job in jobs],
+            )
+
+    def mark_failed(self, jobs: List[OutboxJob], error: str) -> None:
+        """Schedule a retry with exponential backoff, or give up after max_attempts.
+        Jobs whose claim has meanwhile passed to another claimant are left to it."""
+        now = time.time()
+        updates = []
+        for job in jobs:
+            attempts = job.attempts + 1
+            status = FAILED if attempts >= self.max_attempts else PENDING
+            next_attempt_at = now + self.retry_backoff_seconds * 2 ** (attempts - 1)
+            updates.append((status, attempts, next_attempt_at, error, now, job.id, self.owner))
+        with self._lock:
+            self._conn.executemany(
+                """UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?,
+                claimed_by = NULL, updated_at = ? WHERE id = ? AND claimed_by = ?""",
+                updates,
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {PENDING: 0, IN_PROGRESS: 0, SENT: 0, FAILED: 0, **dict(rows)}
+
+    def unfinished(self) -> int:
+        """Jobs still pending or in progress."""
+        counts = self.counts()
+        return counts[PENDING] + counts[IN_PROGRESS]
+
+
+def simulated_smtp_send(destination: str, jobs: List[OutboxJob]) -> None:
+    """Simulate delivering a batch of emails to one destination over a single
+    SMTP session."""
+    time.sleep(simulated_delay(0.5, 0.5))
+    for job in jobs:
+        LOGGER.info("---> Outbox delivered %s job %s to %s", job.kind, job.id, destination)
+
+
+class OutboxWorkerPool:
+    """Background threads that drain an Outbox through a batch sender."""
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        sender: BatchSender = simulated_smtp_send,
+        workers: int = 4,
+        batch_size: int = 20,
+        poll_interval: float = 0.1,
+    ):
+        self.outbox = outbox
+        self.sender = sender
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "OutboxWorkerPool":
+        """Start the worker threads (no-op if already running)."""
+        if self._threads:
+            return self
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"outbox-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop after the current batches; unsent jobs stay queued on disk."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no job is pending or in progress. Returns False on timeout.
+
+        Jobs waiting for a retry count as pending, so this also waits out backoff.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.outbox.unfinished():
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            jobs = self.outbox.claim_batch(self.batch_size)
+            if not jobs:
+                self._stop.wait(self.poll_interval)
+                continue
+            destination = jobs[0].destination
+            try:
+                self.sender(destination, jobs)
+            except Exception as e:
+                LOGGER.warning(f"Outbox delivery of {len(jobs)} jobs to {destination} failed: {e}")
+                self.outbox.mark_failed(jobs, f"{type(e).__name__}: {e}")
+            else:
+                self.outbox.mark_sent(jobs)
+
+
+_OUTBOX: Outbox | None = None
+_WORKERS: OutboxWorkerPool | None = None
+# Reentrant: get_outbox_workers() calls get_outbox() while holding it
+_OUTBOX_LOCK = threading.RLock()
+
+
+def get_outbox() -> Outbox:
+    """Return the process-wide outbox (OUTBOX_PATH, default .outbox.sqlite;
+    OUTBOX_LEASE_SECONDS, default 300)."""
+    global _OUTBOX
+    with _OUTBOX_LOCK:
+        if _OUTBOX is None:
+            load_env_once()
+            _OUTBOX = Outbox(
+                path=os.getenv("OUTBOX_PATH", ".outbox.sqlite"),
+                lease_seconds=float(os.getenv("OUTBOX_LEASE_SECONDS", "300")),
+            )
+        return _OUTBOX
+
+
+def get_outbox_workers() -> OutboxWorkerPool:
+    """Return the process-wide worker pool for get_outbox() (OUTBOX_WORKERS
+    threads, default 4), starting it on first use. With OUTBOX_WORKERS=0 jobs
+    are only queued, for another process to deliver."""
+    global _WORKERS
+    with _OUTBOX_LOCK:
+        if _WORKERS is None:
+            _WORKERS = OutboxWorkerPool(get_outbox(), workers=int(os.getenv("OUTBOX_WORKERS", "4")))
+        return _WORKERS.start()
+
+
+def set_outbox(outbox: Outbox | None, workers: OutboxWorkerPool | None = None) -> None:
+    """Plug in an outbox and worker pool (None re-reads the environment)."""
+    global _OUTBOX, _WORKERS
+    with _OUTBOX_LOCK:
+        if _WORKERS is not None:
+            _WORKERS.stop()
+        _OUTBOX, _WORKERS = outbox, workers
+
+
+def enqueue_email(kind: str, destination: str, payload: Dict[str, Any], send_id: Optional[str] = None) -> int:
+    """Queue an email for background delivery and make sure workers are running.
+    Repeats with the same `send_id` (see tool_send_id) are delivered once."""
+    job_id = get_outbox().enqueue(kind, destination, payload, send_id=send_id)
+    get_outbox_workers()
+    return job_id
+
+
+# Deliver whatever is queued, e.g. jobs left over from a previous run
+if __name__ == "__main__":
+    outbox = get_outbox()
+    print(f"Outbox {outbox.path}: {outbox.counts()}")
+    workers = get_outbox_workers()
+    workers.drain()
+    workers.stop()
+    print(f"Outbox {outbox.path}: {outbox.counts()}")
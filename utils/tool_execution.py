@@ -0,0 +1,216 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor, merge_configs
+from langchain_core.tools import BaseTool
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.logging_config import LOGGER
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.logging_config import LOGGER
+
+# Defaults for make_parallel_tool_node; override per run with
+# config={"configurable": {"tool_max_concurrency": ..., "tool_timeout_seconds": ...}}
+TOOL_MAX_CONCURRENCY = 8
+TOOL_TIMEOUT_SECONDS = 60.0
+
+
+class ToolCancelled(Exception):
+    """Raised inside a tool call that timed out, when it starts its next step."""
+
+
+class _CancelOnTimeout(BaseCallbackHandler):
+    """Callback handler given to each tool call. Once the call has timed out
+    (`cancel()`), any runnable, graph node, model or tool it starts raises
+    ToolCancelled, so the abandoned call stops at its next step instead of
+    carrying on (and, say, sending escalation emails) after the turn
+    reported it as failed. Tools that loop without starting runnables can
+    poll `tool_cancelled(config)` themselves."""
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, name: str):
+        self.name = name
+        self.cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def _check(self, *args: Any, **kwargs: Any) -> None:
+        if self.cancelled.is_set():
+            raise ToolCancelled(f"{self.name} was cancelled after timing out")
+
+    on_chain_start = on_tool_start = on_llm_start = on_chat_model_start = on_retriever_start = _check
+
+
+def tool_cancelled(config: Optional[RunnableConfig]) -> bool:
+    """Whether the tool call running with `config` has timed out."""
+    handler = (config or {}).get("configurable", {}).get("tool_cancellation")
+    return handler is not None and handler.cancelled.is_set()
+
+
+def _error_message(call: ToolCall, content: str) -> ToolMessage:
+    return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+
+
+def _timeout_message(call: ToolCall, timeout: float) -> ToolMessage:
+    LOGGER.warning(f"Tool {call['name']} timed out after {timeout:g}s; cancelling it at its next step")
+    return _error_message(
+        call,
+        f"Error: {call['name']} timed out after {timeout:g}s and was cancelled. "
+        "A step it had already started may still complete. Please try again.",
+    )
+
+
+def _call_config(call: ToolCall, config: RunnableConfig, cancellation: _CancelOnTimeout) -> RunnableConfig:
+    """The run's config plus the call's id (e.g. to key the outbox's dedupe
+    on it) and its cancellation handler, which nested runs inherit."""
+    return merge_configs(config, {
+        "callbacks": [cancellation],
+        "configurable": {"tool_call_id": call["id"], "tool_cancellation": cancellation},
+    })
+
+
+def _tool_result(output: Any, call: ToolCall) -> ToolMessage:
+    """Tools invoked with a ToolCall return a ToolMessage; wrap anything else."""
+    if isinstance(output, ToolMessage):
+        return output
+    return ToolMessage(content=str(output), name=call["name"], tool_call_id=call["id"])
+
+
+def make_parallel_tool_node(
+    tools: Sequence[BaseTool],
+    max_concurrency: int = TOOL_MAX_CONCURRENCY,
+    timeout_seconds: float = TOOL_TIMEOUT_SECONDS,
+    tool_timeouts: Optional[Dict[str, float]] = None,
+) -> RunnableLambda:
+    """Build a graph node that runs every tool call of the last AIMessage
+    concurrently: sync tools on a thread pool, async ones with asyncio.gather.
+
+    At most `max_concurrency` calls run at once. Each call gets
+    `tool_timeouts[name]` (or `timeout_seconds`) from when it starts; a call
+    that overruns or raises becomes an error ToolMessage instead of failing
+    the turn. A call that overruns is cancelled: async tools at once, sync
+    ones (which cannot be interrupted) when they start their next runnable
+    step, see _CancelOnTimeout. Results are returned in the order the model
+    made the calls.
+    """
+    tools_by_name = {t.name: t for t in tools}
+    tool_timeouts = tool_timeouts or {}
+
+    def settings(config: Optional[RunnableConfig]) -> tuple[int, float]:
+        configurable = (config or {}).get("configurable", {})
+        return (
+            configurable.get("tool_max_concurrency", max_concurrency),
+            configurable.get("tool_timeout_seconds", timeout_seconds),
+        )
+
+    def tool_calls(state: Dict[str, Any]) -> List[ToolCall]:
+        message = state["messages"][-1]
+        return message.tool_calls if isinstance(message, AIMessage) else []
+
+    def run_one(call: ToolCall, config: RunnableConfig, cancellation: _CancelOnTimeout) -> ToolMessage:
+        try:
+            output = tools_by_name[call["name"]].invoke(
+                {**call, "type": "tool_call"}, _call_config(call, config, cancellation)
+            )
+            return _tool_result(output, call)
+        except ToolCancelled as e:
+            LOGGER.warning(str(e))
+            return _error_message(call, f"Error: {e}")
+        except Exception as e:
+            LOGGER.error(f"Tool {call['name']} failed: {e}", exc_info=True)
+            return _error_message(call, f"Error: {repr(e)}\n Please fix your mistakes.")
+
+    def call_tools(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, List[ToolMessage]]:
+        LOGGER.info("--- NODE: Calling Tools ---")
+        calls = tool_calls(state)
+        limit, default_timeout = settings(config)
+        results: Dict[int, ToolMessage] = {}
+        started: Dict[int, float] = {}
+        cancellations = [_CancelOnTimeout(call["name"]) for call in calls]
+
+        for i, call in enumerate(calls):
+            if call["name"] not in tools_by_name:
+                results[i] = _error_message(call, f"Error: {call['name']} is not a valid tool.")
+
+        def start_and_run(i: int) -> ToolMessage:
+            started[i] = time.monotonic()
+            return run_one(calls[i], config, cancellations[i])
+
+        # Not a `with` block: timed-out threads are cancelled at their next step, not awaited
+        executor = ContextThreadPoolExecutor(max_workers=max(1, min(limit, len(calls))))
+        try:
+            runnable: Dict[Future, int] = {
+                executor.submit(start_and_run, i): i for i in range(len(calls)) if i not in results
+            }
+            pending = set(runnable)
+            while pending:
+                now = time.monotonic()
+                deadlines = {
+                    f: started[runnable[f]] + tool_timeouts.get(calls[runnable[f]]["name"], default_timeout)
+                    for f in pending
+                    if runnable[f] in started
+                }
+                # Wake for the nearest deadline, or shortly if some calls are still queued
+                wake = min(deadlines.values(), default=now + 0.05) - now
+                done, pending = wait(pending, timeout=max(wake, 0.0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[runnable[future]] = future.result()
+                now = time.monotonic()
+                for future in [f for f in pending if f in deadlines and deadlines[f] <= now]:
+                    call = calls[runnable[future]]
+                    cancellations[runnable[future]].cancel()
+                    results[runnable[future]] = _timeout_message(call, tool_timeouts.get(call["name"], default_timeout))
+                    pending.discard(future)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return {"messages": [results[i] for i in range(len(calls))]}
+
+    async def acall_tools(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, List[ToolMessage]]:
+        LOGGER.info("--- NODE: Calling Tools ---")
+        calls = tool_calls(state)
+        limit, default_timeout = settings(config)
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def arun_one(call: ToolCall) -> ToolMessage:
+            if call["name"] not in tools_by_name:
+                return _error_message(call, f"Error: {call['name']} is not a valid tool.")
+            timeout = tool_timeouts.get(call["name"], default_timeout)
+            cancellation = _CancelOnTimeout(call["name"])
+            async with semaphore:
+                try:
+                    output = await asyncio.wait_for(
+                        tools_by_name[call["name"]].ainvoke(
+                            {**call, "type": "tool_call"}, _call_config(call, config, cancellation)
+                        ),
+                        timeout,
+                    )
+                    return _tool_result(output, call)
+                except asyncio.TimeoutError:
+                    # wait_for cancelled the coroutine; this stops work it handed to threads
+                    cancellation.cancel()
+                    return _timeout_message(call, timeout)
+                except ToolCancelled as e:
+                    return _error_message(call, f"Error: {e}")
+                except Exception as e:
+                    LOGGER.error(f"Tool {call['name']} failed: {e}", exc_info=True)
+                    return _error_message(call, f"Error: {repr(e)}\n Please fix your mistakes.")
+
+        # gather keeps the results in call order
+        return {"messages": list(await asyncio.gather(*(arun_one(call) for call in calls)))}
+
+    return RunnableLambda(call_tools, afunc=acall_tools, name="call_tools")
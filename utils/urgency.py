@@ -0,0 +1,98 @@
+import asyncio
+import itertools
+import math
+import os
+import time
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Use try-except for robust imports relative to project structure
+try:
+    from utils.email_classifier import MIN_SCORE, REGULATORY_NOTICE, classify_email
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+except ImportError:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from utils.email_classifier import MIN_SCORE, REGULATORY_NOTICE, classify_email
+    from utils.notice_pre_extraction import pre_extract_notice_fields
+
+# Urgency is estimated from the regexes alone (no model call): notices from a
+# regulator score REGULATOR_POINTS, plus up to DEADLINE_POINTS as the
+# compliance deadline nears (full when due today or overdue, none beyond
+# DEADLINE_HORIZON_DAYS) and a point per tenfold of the fine from $1,000.
+REGULATOR_POINTS = 3.0
+DEADLINE_POINTS = 6.0
+DEADLINE_HORIZON_DAYS = 30
+FINE_POINTS_MAX = 3.0
+FINE_FLOOR = 1_000.0
+URGENT_SCORE = 6.0
+
+# Waiting this long is worth one point, so an email with score 0 is served
+# at most (max score) * AGING_SECONDS after any email that arrives later
+AGING_SECONDS = 60.0
+
+
+class Urgency(BaseModel):
+    score: float = 0.0
+    deadline_days: Optional[int] = None  # days until the compliance deadline
+    max_potential_fine: Optional[float] = None
+    reasons: List[str] = Field(default_factory=list)
+
+    @property
+    def urgent(self) -> bool:
+        return self.score >= URGENT_SCORE
+
+
+def estimate_urgency(email: str, today: Optional[date] = None) -> Urgency:
+    """Cheap urgency estimate for an email, from its sender and the deadline
+    and fine the notice regexes find."""
+    classification = classify_email(email)
+    if classification.category != REGULATORY_NOTICE and classification.scores[REGULATORY_NOTICE] < MIN_SCORE:
+        return Urgency()
+    urgency = Urgency(score=REGULATOR_POINTS, reasons=["regulatory notice"])
+    fields = pre_extract_notice_fields(email)
+
+    deadline = fields.get("compliance_deadline_str")
+    if deadline:
+        days = (datetime.strptime(deadline, "%Y-%m-%d").date() - (today or date.today())).days
+        points = DEADLINE_POINTS * min(max(1 - days / DEADLINE_HORIZON_DAYS, 0.0), 1.0)
+        urgency.deadline_days = days
+        if points:
+            urgency.score += points
+            urgency.reasons.append(f"deadline in {days} days" if days >= 0 else f"deadline {-days} days ago")
+
+    fine = fields.get("max_potential_fine")
+    if fine:
+        urgency.max_potential_fine = fine
+        if fine >= FINE_FLOOR:
+            urgency.score += min(math.log10(fine / FINE_FLOOR) + 1, FINE_POINTS_MAX)
+            urgency.reasons.append(f"fine ${fine:,.0f}")
+    return urgency
+
+
+class UrgencyQueue(asyncio.PriorityQueue):
+    """asyncio queue that hands out the most urgent item first.
+
+    `score(item)` is read once, when the item is put. Items age: each
+    `aging_seconds` spent waiting is worth one point, so routine items are
+    not starved by a stream of urgent ones. Since every item ages at the
+    same rate, the order is fixed at put time and a heap keeps it. None
+    (the workers' stop signal) sorts after everything else.
+    """
+
+    def __init__(self, score: Callable[[Any], float], maxsize: int = 0, aging_seconds: float = AGING_SECONDS):
+        super().__init__(maxsize)
+        self._score = score
+        self._aging_seconds = aging_seconds
+        self._order = itertools.count()
+
+    def _put(self, item: Any) -> None:
+        key = math.inf if item is None else time.monotonic() / self._aging_seconds - self._score(item)
+        super()._put((key, next(self._order), item))
+
+    def _get(self) -> Any:
+        return super()._get()[2]